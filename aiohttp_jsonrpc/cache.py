@@ -0,0 +1,177 @@
+import asyncio
+import json
+import time
+from collections import OrderedDict
+from typing import (
+    Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple,
+)
+
+from . import exceptions
+from .common import mark_method, py2json
+
+
+class EncodedResult:
+    """ Method result which has been already serialized by the codec,
+    so it's inserted into the response without encoding again """
+
+    __slots__ = ("value", "data", "codec")
+
+    def __init__(self, value: Any, data: bytes, codec: Any):
+        self.value = value
+        self.data = data
+        self.codec = codec
+
+    def __repr__(self) -> str:
+        return "<{0}: {1!r}>".format(self.__class__.__name__, self.value)
+
+
+@py2json.register(EncodedResult)
+def _(value: EncodedResult) -> Any:
+    return value.value
+
+
+class ResultCache:
+    """ LRU cache of the encoded method results with optional TTL.
+
+    Concurrent calls with the same key are collapsed into the single
+    execution of the method.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: Optional[float] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+        self._data: "OrderedDict[Hashable, Tuple[float, EncodedResult]]"
+        self._data = OrderedDict()
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        # Number of callers awaiting the shared execution
+        self._waiters: Dict[asyncio.Future, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    @staticmethod
+    def make_key(method: Any, args: Any, kwargs: Any) -> Optional[str]:
+        """ Canonical key of the call, positional and keyword
+        arguments of the same parameter produce the same key.
+        Returns None when arguments do not match the signature. """
+        try:
+            bound = method.signature.bind(*args, **kwargs)
+        except TypeError:
+            return None
+
+        bound.apply_defaults()
+        return json.dumps(
+            [method.name, bound.arguments],
+            sort_keys=True, separators=(",", ":"), default=repr,
+        )
+
+    def get(self, key: Hashable) -> Optional[EncodedResult]:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+
+        expires, value = entry
+        if expires and expires < time.monotonic():
+            del self._data[key]
+            return None
+
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: EncodedResult) -> None:
+        expires = time.monotonic() + self.ttl if self.ttl else 0.
+        self._data[key] = (expires, value)
+        self._data.move_to_end(key)
+
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def info(self) -> Dict[str, Any]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+        }
+
+    async def get_or_call(
+        self, key: Hashable, factory: Callable[[], Awaitable[EncodedResult]],
+    ) -> EncodedResult:
+        value = self.get(key)
+        if value is not None:
+            self.hits += 1
+            return value
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            self.misses += 1
+            # The execution does not belong to the first caller,
+            # so its cancellation does not fail the others
+            task = asyncio.ensure_future(self._execute(key, factory))
+            self._inflight[key] = task
+
+        return await self._wait(task)
+
+    async def _execute(
+        self, key: Hashable, factory: Callable[[], Awaitable[EncodedResult]],
+    ) -> EncodedResult:
+        try:
+            value = await factory()
+        finally:
+            self._inflight.pop(key, None)
+
+        self.set(key, value)
+        return value
+
+    async def _wait(self, task: asyncio.Future) -> EncodedResult:
+        self._waiters[task] = self._waiters.get(task, 0) + 1
+
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if task.cancelled():
+                # Cancelled by somebody else, not the caller
+                raise exceptions.ServerError("Shared call has been cancelled")
+            raise
+        finally:
+            waiters = self._waiters.pop(task) - 1
+            if waiters:
+                self._waiters[task] = waiters
+            elif not task.done():
+                # Nobody needs the result anymore
+                task.cancel()
+
+
+def cached(maxsize: int = 1024, ttl: Optional[float] = None) -> Callable:
+    """ Caches the encoded results of the idempotent ``rpc_`` method.
+
+    Counters are available via ``cache_info()`` of the decorated
+    function like for the :func:`functools.lru_cache`.
+    """
+
+    def decorator(func: Any) -> Any:
+        cache = ResultCache(maxsize=maxsize, ttl=ttl)
+        return mark_method(
+            func, __rpc_cache__=cache,
+            cache_info=cache.info, cache_clear=cache.clear,
+        )
+
+    return decorator
+
+
+__all__ = (
+    "EncodedResult",
+    "ResultCache",
+    "cached",
+)
@@ -1,33 +1,68 @@
 import asyncio
+import itertools
 import json
 import logging
+import random
+import time
 import uuid
-from typing import Any, Dict, Iterable, List, Tuple, Union
+from concurrent.futures import Executor
+from typing import (
+    Any, AsyncIterable, AsyncIterator, Awaitable, Callable, Collection, Dict,
+    Iterable, List, Mapping, Optional, Sequence, Set, Tuple, Union,
+)
 
 import aiohttp.client
 import aiohttp.test_utils
 import yarl
 from multidict import CIMultiDict, MultiDict
 
-from . import __pyversion__, __version__, exceptions
-from .common import JSONRPCBody, JSONRPCRequest, py2json
+from . import __pyversion__, __version__, compression, exceptions
+from .codec import (
+    NDJSON_CONTENT_TYPE, Codec, dumps_batch_async, get_codec, loads_async,
+)
+from .common import JSONRPCBody, JSONRPCRequest
+from .compression import REQUEST_ENCODINGS
+from .deadline import TIMEOUT_HEADER, format_timeout, remaining
 from .exceptions import json2py_exception
+from .executor import PROCESS, get_default_pool
+from .hashring import HashRing
+from .metrics import Metrics
+from .retry import LatencyTracker, RetryBudget, RetryPolicy
+from .scanner import JSONScanner
 
 
 log = logging.getLogger(__name__)
 
 
 class Method:
-    def __init__(self, name, execute):
+    def __init__(
+        self, name, execute, execute_stream: Callable = None,
+        id_factory: Callable[[], Any] = None,
+    ):
         self.name = name
         self.execute = execute
+        self.execute_stream = execute_stream
+        self.id_factory = id_factory
 
     def __call__(self, *args, **kwargs):
         return self.execute(self.prepare(*args, **kwargs))
 
+    def stream(self, *args, **kwargs) -> AsyncIterator[Any]:
+        """ Iterates over items of the result as they are received """
+        if self.execute_stream is None:
+            raise TypeError(
+                "Streaming is not supported by the transport of %r" % (
+                    self.name,
+                ),
+            )
+        return self.execute_stream(self.prepare(*args, **kwargs))
+
     def prepare(self, *args, **kwargs) -> JSONRPCRequest:
         return JSONRPCRequest(
-            id=str(uuid.uuid4()),
+            id=(
+                self.id_factory() if self.id_factory is not None
+                else str(uuid.uuid4())
+            ),
             method=str(self.name),
             jsonrpc="2.0",
             params=args if args else kwargs,
@@ -35,10 +70,15 @@ class Method:
 
 
 class Notification(Method):
-    def _create_request(self) -> JSONRPCRequest:
+    def stream(self, *args, **kwargs) -> AsyncIterator[Any]:
+        raise TypeError("Notifications have no result")
+
+    def prepare(self, *args, **kwargs) -> JSONRPCRequest:
+        # Notification is the request without the id
         return JSONRPCRequest(
-            jsonrpc="2.0",
             method=str(self.name),
+            jsonrpc="2.0",
+            params=args if args else kwargs,
         )
 
 
@@ -57,12 +97,34 @@ ClientSessionType = Union[
 class ServerProxy(object):
     __slots__ = (
         "client", "url", "loop", "headers", "loads", "dumps", "client_owner",
+        "codec", "batch_window", "batch_size", "metrics", "compression",
+        "compression_threshold", "compression_executor_threshold",
+        "codec_executor_threshold", "codec_executor", "id_factory",
+        "retry_policies", "retry_budget", "call_timeout",
+        "_batch_queue", "_batch_timer", "_batch_tasks", "_methods",
+        "_latencies", "_notify_tasks",
     )
 
     USER_AGENT = "aiohttp JSON-RPC client (Python: {0}, version: {1})".format(
         __pyversion__, __version__,
     )
 
+    # Encoded requests of the iter_batch are sent by chunks of this size
+    STREAM_CHUNK_SIZE = 64 * 1024
+    # Maximum number of the Method objects reused by name
+    METHOD_CACHE_SIZE = 1024
+
+    # The hooks are not awaited on every call unless overridden
+    _has_body_hook = False
+    _has_headers_hook = False
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._has_body_hook = cls.prepare_body is not ServerProxy.prepare_body
+        cls._has_headers_hook = (
+            cls.prepare_headers is not ServerProxy.prepare_headers
+        )
+
     def __init__(
         self, url: Union[str, yarl.URL],
         client: ClientSessionType = None,
@@ -71,11 +133,28 @@ class ServerProxy(object):
         client_owner: bool = True,
         loads=json.loads,
         dumps=json.dumps,
+        codec: Codec = None,
+        batch_window: Optional[float] = None,
+        batch_size: int = 100,
+        metrics: Optional[Metrics] = None,
+        compression: Optional[str] = None,
+        compression_threshold: int = 1024,
+        compression_executor_threshold: Optional[int] = 1024 * 1024,
+        id_factory: Optional[Callable[[], Any]] = None,
+        retry_policies: Optional[Mapping[str, RetryPolicy]] = None,
+        retry_budget: Optional[RetryBudget] = None,
+        codec_executor_threshold: Optional[int] = None,
+        codec_executor: Optional[Executor] = None,
+        call_timeout: Optional[float] = None,
         **kwargs,
     ):
+        self.loads = loads
+        self.dumps = dumps
+        self.codec = codec or get_codec(dumps, loads)
 
         self.headers = MultiDict(headers or {})
-        self.headers.setdefault("Content-Type", "application/json")
+        self.headers.setdefault("Content-Type", self.codec.content_type)
+        self.headers.setdefault("Accept", self.codec.content_type)
         self.headers.setdefault("User-Agent", self.USER_AGENT)
 
         self.url = str(url)
@@ -85,8 +164,46 @@ class ServerProxy(object):
         )
         self.client_owner = bool(client_owner)
 
-        self.loads = loads
-        self.dumps = dumps
+        # Calls made within batch_window seconds are sent as one batch
+        self.batch_window = batch_window
+        self.batch_size = batch_size
+        self._batch_queue: List[Tuple[JSONRPCRequest, asyncio.Future]] = []
+        self._batch_timer: Optional[asyncio.TimerHandle] = None
+        self._batch_tasks: Set[asyncio.Task] = set()
+        self._notify_tasks: Set[asyncio.Task] = set()
+
+        # Round-trip latency, errors and payload sizes are not
+        # collected when metrics is None
+        self.metrics = metrics
+
+        # Encoding of the request bodies larger than compression_threshold,
+        # responses are decompressed by the aiohttp client itself
+        if compression is not None and compression not in REQUEST_ENCODINGS:
+            raise ValueError("Unsupported compression %r" % compression)
+
+        self.compression = compression
+        self.compression_threshold = compression_threshold
+        self.compression_executor_threshold = compression_executor_threshold
+
+        # Responses and batch requests larger than this are decoded and
+        # encoded in the codec_executor (the process pool by default)
+        self.codec_executor_threshold = codec_executor_threshold
+        self.codec_executor = codec_executor
+
+        # Request ids must be unique among calls in-flight,
+        # the counter is much cheaper than the uuid4
+        self.id_factory = id_factory or itertools.count(1).__next__
+        self._methods: Dict[str, Method] = {}
+
+        # Only methods having the policy are idempotent, so only
+        # they are retried and hedged
+        self.retry_policies = dict(retry_policies or {})
+        self.retry_budget = retry_budget or RetryBudget()
+        self._latencies: Dict[str, LatencyTracker] = {}
+
+        # Every request is limited by call_timeout and the deadline of
+        # the current context, the rest of the time is sent to the server
+        self.call_timeout = call_timeout
 
     @staticmethod
     def _parse_response(response):
@@ -102,29 +219,440 @@ class ServerProxy(object):
                     error.get("code", exceptions.SystemError.code),
                     error.get("message", "Unknown error"),
                     default_exc_class=exceptions.ServerError,
+                    data=error.get("data"),
                 )
         return response.get("result")
 
     async def __remote_call(self, json_request: JSONRPCRequest) -> Any:
-        request = py2json(json_request)
-        response = await self.client.post(
-            str(self.url),
-            headers=await self.prepare_headers(self.headers),
-            data=self.dumps(
-                await self.prepare_body(py2json(request)),
+        if self.batch_window is None:
+            return await self.__send(json_request)
+
+        future = self.loop.create_future()
+        self._batch_queue.append((json_request, future))
+
+        if len(self._batch_queue) >= self.batch_size:
+            self.__flush()
+        elif self._batch_timer is None:
+            self._batch_timer = self.loop.call_later(
+                self.batch_window, self.__flush,
+            )
+
+        return await future
+
+    def __flush(self) -> None:
+        if self._batch_timer is not None:
+            self._batch_timer.cancel()
+            self._batch_timer = None
+
+        queue, self._batch_queue = self._batch_queue, []
+        if not queue:
+            return
+
+        task = self.loop.create_task(self.__send_batch(queue))
+        self._batch_tasks.add(task)
+        task.add_done_callback(self._batch_tasks.discard)
+
+    async def __send_batch(
+        self, queue: List[Tuple[JSONRPCRequest, asyncio.Future]],
+    ) -> None:
+        try:
+            if len(queue) == 1:
+                results = [await self.__send(queue[0][0])]
+            else:
+                results = await self(*[request for request, _ in queue])
+        except Exception as e:
+            results = [e] * len(queue)
+
+        if len(queue) > 1 and self.retry_policies:
+            # The batch was made by the client, so the calls of idempotent
+            # methods are retried like the calls sent alone
+            results = await asyncio.gather(*[
+                self.__retry_batched(request, result)
+                for (request, _), result in zip(queue, results)
+            ])
+
+        for (_, future), result in zip(queue, results):
+            if future.done():
+                # The caller has been cancelled
+                continue
+
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    async def __send(self, json_request: JSONRPCRequest) -> Any:
+        if self.metrics is None:
+            return await self.__execute(json_request)
+
+        started = time.perf_counter()
+        error = None
+
+        try:
+            return await self.__execute(json_request)
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            self._observe_call(
+                json_request.get("method"),
+                time.perf_counter() - started, error,
+            )
+
+    def __get_policy(
+        self, json_request: JSONRPCRequest,
+    ) -> Optional[RetryPolicy]:
+        if not self.retry_policies or "id" not in json_request:
+            return None
+        return self.retry_policies.get(json_request.get("method"))
+
+    async def __execute(self, json_request: JSONRPCRequest) -> Any:
+        policy = self.__get_policy(json_request)
+        if policy is None:
+            return await self.__post(json_request)
+
+        self.retry_budget.deposit()
+
+        try:
+            return await self.__hedge(json_request, policy)
+        except Exception as e:
+            return await self.__retry(json_request, policy, e)
+
+    async def __retry_batched(
+        self, json_request: JSONRPCRequest, result: Any,
+    ) -> Any:
+        """ Returns the result of the call sent within the batch, or of
+        its retries when it failed """
+        policy = self.__get_policy(json_request)
+        if policy is None:
+            return result
+
+        self.retry_budget.deposit()
+        if not isinstance(result, Exception):
+            return result
+
+        try:
+            return await self.__retry(json_request, policy, result)
+        except Exception as e:
+            return e
+
+    async def __retry(
+        self, json_request: JSONRPCRequest, policy: RetryPolicy,
+        exception: Exception,
+    ) -> Any:
+        """ Retries the call failed with the exception on the first
+        attempt, raises the last exception when it's not retried anymore """
+        attempt = 1
+
+        while True:
+            delay = policy.delay(attempt, exception)
+            budget = remaining()
+
+            if (
+                attempt >= policy.attempts or
+                not policy.is_retryable(exception) or
+                # The retry would not be answered in time anyway
+                (budget is not None and budget <= delay) or
+                not self.retry_budget.withdraw()
+            ):
+                raise exception
+
+            log.debug(
+                "Call %r failed: %r, retrying in %.3f seconds",
+                json_request.get("method"), exception, delay,
+            )
+
+            await asyncio.sleep(delay)
+            attempt += 1
+
+            try:
+                return await self.__hedge(json_request, policy)
+            except Exception as e:
+                exception = e
+
+    async def __hedge(
+        self, json_request: JSONRPCRequest, policy: RetryPolicy,
+    ) -> Any:
+        method = json_request.get("method")
+        latencies = self._latencies.get(method)
+
+        if latencies is None:
+            latencies = self._latencies[method] = LatencyTracker()
+
+        delay = None
+        if policy.hedge_quantile is not None:
+            delay = latencies.quantile(policy.hedge_quantile)
+
+        if delay is None:
+            return await self.__timed_post(json_request, latencies)
+
+        tasks = {
+            self.loop.create_task(
+                self.__timed_post(json_request, latencies),
             ),
-        )
+        }
+        hedges = 0
+        error: Optional[BaseException] = None
 
-        response.raise_for_status()
+        try:
+            while tasks:
+                done, _ = await asyncio.wait(
+                    tasks,
+                    timeout=delay if hedges < policy.max_hedges else None,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+
+                if not done:
+                    if self.retry_budget.withdraw():
+                        log.debug("Hedging the slow call %r", method)
+                        tasks.add(self.loop.create_task(
+                            self.__timed_post(json_request, latencies),
+                        ))
+                        hedges += 1
+                    else:
+                        hedges = policy.max_hedges
+                    continue
 
-        if "id" not in request:
+                for task in done:
+                    tasks.discard(task)
+                    error = task.exception()
+
+                    if error is None:
+                        return task.result()
+                    if not policy.is_retryable(error):
+                        raise error
+
+            raise error
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def __timed_post(
+        self, json_request: JSONRPCRequest, latencies: LatencyTracker,
+    ) -> Any:
+        started = self.loop.time()
+        result = await self.__post(json_request)
+        latencies.observe(self.loop.time() - started)
+        return result
+
+    async def __post(self, json_request: JSONRPCRequest) -> Any:
+        if "id" not in json_request:
             # Notification
+            await self._request(json_request, read=False)
             return
 
         return self._parse_response(
-            self.loads((await response.read()).decode()),
+            await self._loads(await self._request(json_request)),
         )
 
+    async def _request(self, body: JSONRPCBody, read: bool = True) -> bytes:
+        """ Sends the request body and returns the response body """
+        expires = self._get_expiration()
+        data, response = await self._send_request(body)
+
+        try:
+            response.raise_for_status()
+            result = b""
+            if read:
+                result = await self._wait_until(response.read(), expires)
+        finally:
+            response.release()
+
+        self._observe_sizes(data, result)
+        return result
+
+    async def _send_request(
+        self, body: JSONRPCBody, headers: Optional[MultiDict] = None,
+    ) -> Tuple[bytes, aiohttp.ClientResponse]:
+        """ Returns the sent data and the response,
+        which must be released by the caller """
+        if self._has_body_hook:
+            body = await self.prepare_body(body)
+
+        if self.codec_executor_threshold is None or not isinstance(body, list):
+            data = self.codec.dumps(body)
+        else:
+            data = await dumps_batch_async(
+                self.codec, body,
+                executor_threshold=self.codec_executor_threshold,
+                executor=self.codec_executor or get_default_pool(PROCESS),
+            )
+
+        if headers is None:
+            headers = self.headers
+        if self._has_headers_hook:
+            headers = await self.prepare_headers(headers)
+
+        if (
+            self.compression is not None and
+            len(data) >= self.compression_threshold
+        ):
+            data = await compression.compress_async(
+                self.compression, data,
+                executor_threshold=self.compression_executor_threshold,
+            )
+            headers = CIMultiDict(headers)
+            headers["Content-Encoding"] = self.compression
+
+        timeout = self._get_timeout()
+        if timeout is None:
+            return data, await self._post(data, headers, body)
+
+        headers = CIMultiDict(headers)
+        headers[TIMEOUT_HEADER] = format_timeout(timeout)
+
+        try:
+            return data, await asyncio.wait_for(
+                self._post(data, headers, body), timeout,
+            )
+        except asyncio.TimeoutError:
+            raise exceptions.CallTimeout(
+                "Deadline of the request is exceeded",
+            )
+
+    def _get_expiration(self) -> Optional[float]:
+        """ Returns the time.monotonic() time when the response must be
+        received completely or None when it's not limited """
+        timeout = self._get_timeout()
+        if timeout is None:
+            return None
+        return time.monotonic() + timeout
+
+    @staticmethod
+    async def _wait_until(
+        awaitable: Awaitable[Any], expires: Optional[float],
+    ) -> Any:
+        """ Awaits the part of the response within the time left """
+        if expires is None:
+            return await awaitable
+
+        try:
+            return await asyncio.wait_for(
+                awaitable, max(expires - time.monotonic(), 0),
+            )
+        except asyncio.TimeoutError:
+            raise exceptions.CallTimeout(
+                "Deadline of the request is exceeded",
+            )
+
+    def _get_timeout(self) -> Optional[float]:
+        """ Returns the time left for the request or None when it's not
+        limited, raises CallTimeout when the deadline is exceeded """
+        timeout = remaining()
+
+        if self.call_timeout is not None and (
+            timeout is None or self.call_timeout < timeout
+        ):
+            timeout = self.call_timeout
+
+        if timeout is not None and timeout <= 0:
+            raise exceptions.CallTimeout(
+                "Deadline is exceeded before the request is sent",
+            )
+
+        return timeout
+
+    async def _loads(self, data: bytes) -> Any:
+        if self.codec_executor_threshold is None:
+            return self.codec.loads(data)
+
+        return await loads_async(
+            self.codec, data,
+            executor_threshold=self.codec_executor_threshold,
+            executor=self.codec_executor or get_default_pool(PROCESS),
+        )
+
+    async def _post(
+        self, data: Any, headers: MultiDict, body: JSONRPCBody = None,
+    ) -> Any:
+        """ Sends the encoded data, ``body`` is the request it was
+        encoded from or None when the data is streamed """
+        return await self.client.post(
+            str(self.url), headers=headers, data=data,
+        )
+
+    async def __remote_stream(
+        self, json_request: JSONRPCRequest,
+    ) -> AsyncIterator[Any]:
+        headers = MultiDict(self.headers)
+        headers["Accept"] = "{0}, {1}".format(
+            NDJSON_CONTENT_TYPE, self.codec.content_type,
+        )
+
+        # The whole stream is received within the time budget
+        expires = self._get_expiration()
+        _, response = await self._send_request(json_request, headers)
+
+        try:
+            response.raise_for_status()
+
+            if response.content_type != NDJSON_CONTENT_TYPE:
+                # The server collected all items into the list
+                result = self._parse_response(self.codec.loads(
+                    await self._wait_until(response.read(), expires),
+                ))
+                for item in result or ():
+                    yield item
+                return
+
+            async for line in self._iter_lines(response.content, expires):
+                frame = self.codec.loads(line)
+
+                if "item" in frame:
+                    yield frame["item"]
+                    continue
+
+                self._parse_response(frame)
+                return
+
+            raise exceptions.TransportError("Stream is interrupted")
+        finally:
+            response.release()
+
+    async def _iter_lines(
+        self, content: aiohttp.StreamReader, expires: Optional[float] = None,
+    ) -> AsyncIterator[bytes]:
+        # StreamReader.readline limits the length of the line
+        buffer = bytearray()
+
+        while True:
+            chunk = await self._wait_until(content.readany(), expires)
+            if not chunk:
+                break
+
+            buffer += chunk
+            start = 0
+
+            while True:
+                end = buffer.find(b"\n", start)
+                if end < 0:
+                    break
+                if end > start:
+                    yield bytes(buffer[start:end])
+                start = end + 1
+
+            del buffer[:start]
+
+        if buffer.strip():
+            yield bytes(buffer)
+
+    def _observe_call(
+        self, method: str, seconds: float, error: Optional[BaseException],
+    ) -> None:
+        self.metrics.observe_call(
+            str(method), seconds,
+            None if error is None else getattr(
+                error, "code", exceptions.TransportError.code,
+            ),
+        )
+
+    def _observe_sizes(self, request: bytes, response: bytes) -> None:
+        if self.metrics is None:
+            return
+
+        self.metrics.observe_request_size(len(request))
+        self.metrics.observe_response_size(len(response))
+
     async def prepare_headers(self, headers: MultiDict) -> MultiDict:
         return headers
 
@@ -133,9 +661,10 @@ class ServerProxy(object):
     ) -> JSONRPCBody:
         return body
 
-    async def __call__(
-        self, *prepared_methods: JSONRPCRequest, return_exceptions=True
-    ) -> Any:
+    @staticmethod
+    def _prepare_batch(
+        prepared_methods: Iterable[Union[JSONRPCRequest, Method]],
+    ) -> Tuple[List[JSONRPCRequest], List[Any]]:
         request = []
         request_indecies = []
 
@@ -143,34 +672,29 @@ class ServerProxy(object):
             if isinstance(req, Method):
                 req = req.prepare()
 
-            if isinstance(req, Notification):
-                req = req.prepare()
-
             request_indecies.append(req.get("id"))
             request.append(req)
 
-        response = await self.client.post(
-            str(self.url),
-            headers=await self.prepare_headers(self.headers),
-            data=self.dumps(
-                await self.prepare_body(py2json(request)),
-            ),
-        )
-
-        response.raise_for_status()
+        return request, request_indecies
 
+    @classmethod
+    def _parse_batch_response(
+        cls, data: Any, request_indecies: List[Any], return_exceptions: bool,
+    ) -> List[Any]:
         responses: Dict[Any, Any] = {}
-        data: List[JSONRPCRequest] = self.loads(
-            (await response.read()).decode(),
-        )
+
+        if isinstance(data, dict):
+            # The whole batch has been rejected
+            cls._parse_response(data)
+            raise exceptions.ServerError("Batch response must be an array")
 
         for response in data:
             req_id = response.get("id")
-            if not req_id:
+            if req_id is None:
                 continue
 
             try:
-                responses[req_id] = self._parse_response(response)
+                responses[req_id] = cls._parse_response(response)
             except Exception as e:
                 if return_exceptions:
                     responses[req_id] = e
@@ -186,16 +710,230 @@ class ServerProxy(object):
             result.append(responses[req_id])
         return result
 
+    async def __call__(
+        self, *prepared_methods: JSONRPCRequest, return_exceptions=True
+    ) -> Any:
+        request, request_indecies = self._prepare_batch(prepared_methods)
+
+        if self.metrics is None:
+            return await self._post_batch(
+                request, request_indecies, return_exceptions,
+            )
+
+        self.metrics.observe_batch(len(request))
+        started = time.perf_counter()
+        results = None
+        error = None
+
+        try:
+            results = await self._post_batch(
+                request, request_indecies, return_exceptions,
+            )
+            return results
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+
+            for idx, req in enumerate(request):
+                result = results[idx] if results is not None else error
+                self._observe_call(
+                    req.get("method"), elapsed,
+                    result if isinstance(result, Exception) else error,
+                )
+
+    async def _post_batch(
+        self, request: List[JSONRPCRequest], request_indecies: List[Any],
+        return_exceptions: bool,
+    ) -> List[Any]:
+        return self._parse_batch_response(
+            await self._loads(await self._request(request)),
+            request_indecies, return_exceptions,
+        )
+
+    async def iter_batch(
+        self, requests: Union[
+            Iterable[Union[JSONRPCRequest, Method]],
+            AsyncIterable[Union[JSONRPCRequest, Method]],
+        ],
+        return_exceptions: bool = True,
+    ) -> AsyncIterator[Tuple[Any, Any]]:
+        """ Sends the batch and yields ``(request_id, result)`` pairs
+        in the order of the responses.
+
+        Requests are encoded while the body is being sent and responses
+        are parsed as they are received, so neither the whole batch nor
+        all results are held in memory. Notifications have no responses.
+        """
+        if not self.codec.streamable:
+            request, _ = self._prepare_batch(
+                [request async for request in self._aiter(requests)],
+            )
+            data = await self._loads(await self._request(request))
+            for item in self._iter_batch_response(data, return_exceptions):
+                yield item
+            return
+
+        headers = await self.prepare_headers(self.headers)
+        compressor = None
+
+        # Only the server enforces the deadline of the streamed batch,
+        # since the responses are received until the end of it
+        timeout = self._get_timeout()
+        if timeout is not None:
+            headers = CIMultiDict(headers)
+            headers[TIMEOUT_HEADER] = format_timeout(timeout)
+
+        if self.compression in compression.STREAM_ENCODINGS:
+            compressor = compression.compressobj(self.compression)
+            headers = CIMultiDict(headers)
+            headers["Content-Encoding"] = self.compression
+
+        response = await self._post(
+            self.__encode_batch(requests, compressor), headers,
+        )
+
+        try:
+            response.raise_for_status()
+            scanner = JSONScanner()
+
+            async for chunk in response.content.iter_any():
+                for element in scanner.feed(chunk):
+                    for item in self._iter_batch_response(
+                        [self.codec.loads(element)], return_exceptions,
+                    ):
+                        yield item
+
+            for element in scanner.close():
+                # Not a batch, so the whole batch has been rejected
+                for item in self._iter_batch_response(
+                    self.codec.loads(element), return_exceptions,
+                ):
+                    yield item
+        finally:
+            response.release()
+
+    async def __encode_batch(
+        self, requests: Union[Iterable, AsyncIterable], compressor: Any,
+    ) -> AsyncIterator[bytes]:
+        chunks: List[bytes] = []
+        size = 0
+        separator = b"["
+
+        def join() -> bytes:
+            data = b"".join(chunks)
+            chunks.clear()
+            if compressor is None:
+                return data
+            return compressor.compress(data)
+
+        async for request in self._aiter(requests):
+            if isinstance(request, Method):
+                request = request.prepare()
+
+            if self._has_body_hook:
+                request = await self.prepare_body(request)
+
+            chunks.append(separator)
+            chunks.append(self.codec.dumps(request))
+            size += len(chunks[-1]) + 1
+            separator = b","
+
+            if size >= self.STREAM_CHUNK_SIZE:
+                size = 0
+                data = join()
+                if data:
+                    yield data
+
+        chunks.append(b"[]" if separator == b"[" else b"]")
+        data = join()
+
+        if compressor is not None:
+            data += compressor.flush()
+
+        yield data
+
+    @staticmethod
+    async def _aiter(
+        iterable: Union[Iterable, AsyncIterable],
+    ) -> AsyncIterator[Any]:
+        if hasattr(iterable, "__aiter__"):
+            async for item in iterable:
+                yield item
+        else:
+            for item in iterable:
+                yield item
+
+    @classmethod
+    def _iter_batch_response(
+        cls, data: Any, return_exceptions: bool,
+    ) -> Iterable[Tuple[Any, Any]]:
+        if isinstance(data, dict):
+            # The whole batch has been rejected
+            cls._parse_response(data)
+            raise exceptions.ServerError("Batch response must be an array")
+
+        for response in data:
+            try:
+                result = cls._parse_response(response)
+            except Exception as e:
+                if not return_exceptions:
+                    raise
+                result = e
+
+            yield response.get("id"), result
+
     def __getattr__(self, method_name: str) -> Method:
         return self[method_name]
 
     def __getitem__(self, method_name: str) -> Method:
-        return Method(method_name, self.__remote_call)
+        method = self._methods.get(method_name)
+        if method is not None:
+            return method
+
+        method = Method(
+            method_name, self.__remote_call, self.__remote_stream,
+            id_factory=self.id_factory,
+        )
+
+        if len(self._methods) < self.METHOD_CACHE_SIZE:
+            self._methods[method_name] = method
+        return method
 
     def create_notification(self, method: str):
         return Notification(method, self.__remote_call)
 
+    def notify(self, method: str, *args: Any, **kwargs: Any) -> asyncio.Task:
+        """ Sends the notification in background and returns immediately.
+        Failures are logged, notifications in-flight are awaited by the
+        :meth:`close`. """
+        task = self.loop.create_task(self._send_notification(
+            self.create_notification(method)(*args, **kwargs),
+        ))
+        self._notify_tasks.add(task)
+        task.add_done_callback(self._notify_tasks.discard)
+        return task
+
+    @staticmethod
+    async def _send_notification(sending: Awaitable[Any]) -> None:
+        try:
+            await sending
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            log.exception("Failed to send the notification")
+
     async def close(self, force=False):
+        if self._notify_tasks:
+            await asyncio.gather(*self._notify_tasks, return_exceptions=True)
+
+        if self._batch_queue:
+            self.__flush()
+
+        if self._batch_tasks:
+            await asyncio.gather(*self._batch_tasks, return_exceptions=True)
+
         if not self.client_owner and not force:
             return
         return await self.client.close()
@@ -207,3 +945,574 @@ class ServerProxy(object):
         if self.client.closed:
             return
         await self.close()
+
+
+class Endpoint:
+    """ The server of the :class:`BalancedServerProxy` with its own
+    connection pool """
+
+    __slots__ = ("url", "client", "outstanding", "failures", "ejected")
+
+    def __init__(self, url: str, client: ClientSessionType):
+        self.url = url
+        self.client = client
+        # Requests sent and not answered yet
+        self.outstanding = 0
+        # Consecutive connection failures
+        self.failures = 0
+        self.ejected = False
+
+    def __repr__(self) -> str:
+        return "<Endpoint {0} outstanding={1}{2}>".format(
+            self.url, self.outstanding, " ejected" if self.ejected else "",
+        )
+
+
+class BalancedServerProxy(ServerProxy):
+    """ Spreads calls over replicas of the server.
+
+    Every call or batch is sent to the endpoint chosen by the
+    ``strategy``: ``"power_of_two"`` takes the less loaded of two random
+    endpoints, ``"least_outstanding"`` the least loaded of all. The load
+    is the number of requests sent to the endpoint and not answered yet.
+
+    The endpoint failing to connect ``max_failures`` times in a row is
+    ejected and probed in background by :meth:`probe` every
+    ``eject_time`` seconds (doubling up to ``max_eject_time``) until it
+    answers again. Requests which could not connect are resent to the
+    other endpoint. When all endpoints are ejected they are used anyway.
+    """
+
+    __slots__ = (
+        "endpoints", "strategy", "max_failures", "eject_time",
+        "max_eject_time", "probe_timeout", "_healthy", "_probes",
+        "_rotation",
+    )
+
+    POWER_OF_TWO = "power_of_two"
+    LEAST_OUTSTANDING = "least_outstanding"
+
+    def __init__(
+        self, urls: Sequence[Union[str, yarl.URL]],
+        loop: asyncio.AbstractEventLoop = None,
+        client_factory: Optional[Callable[[], ClientSessionType]] = None,
+        strategy: str = POWER_OF_TWO,
+        max_failures: int = 3,
+        eject_time: float = 1,
+        max_eject_time: float = 30,
+        probe_timeout: float = 5,
+        **kwargs: Any
+    ):
+        if not urls:
+            raise ValueError("At least one url is required")
+
+        if strategy not in (self.POWER_OF_TWO, self.LEAST_OUTSTANDING):
+            raise ValueError("Unsupported strategy %r" % strategy)
+
+        loop = loop or asyncio.get_event_loop()
+
+        if client_factory is None:
+            def client_factory() -> ClientSessionType:
+                return aiohttp.client.ClientSession(loop=loop)
+
+        # Every endpoint has its own session, so the connection pools
+        # are never shared between the endpoints
+        self.endpoints = [Endpoint(str(url), client_factory()) for url in urls]
+
+        super().__init__(
+            self.endpoints[0].url, self.endpoints[0].client, loop, **kwargs
+        )
+
+        self.strategy = strategy
+        self.max_failures = max_failures
+        self.eject_time = eject_time
+        self.max_eject_time = max_eject_time
+        self.probe_timeout = probe_timeout
+
+        self._healthy: List[Endpoint] = list(self.endpoints)
+        self._probes: Dict[Endpoint, asyncio.Task] = {}
+        self._rotation = itertools.count()
+
+    def _select(
+        self, exclude: Collection[Endpoint] = (), body: JSONRPCBody = None,
+    ) -> Endpoint:
+        candidates = self._healthy or self.endpoints
+
+        if exclude:
+            candidates = [
+                endpoint for endpoint in candidates
+                if endpoint not in exclude
+            ] or candidates
+
+        if len(candidates) == 1:
+            return candidates[0]
+
+        if self.strategy == self.POWER_OF_TWO:
+            first, second = random.sample(candidates, 2)
+            return first if first.outstanding <= second.outstanding else second
+
+        # Endpoints with the same load are taken in turn
+        offset = next(self._rotation) % len(candidates)
+        best = candidates[offset]
+
+        for endpoint in itertools.chain(
+            candidates[offset + 1:], candidates[:offset],
+        ):
+            if endpoint.outstanding < best.outstanding:
+                best = endpoint
+
+        return best
+
+    async def _post(
+        self, data: Any, headers: MultiDict, body: JSONRPCBody = None,
+    ) -> Any:
+        # Streamed bodies can not be sent twice
+        attempts = len(self.endpoints) if isinstance(data, bytes) else 1
+        tried: List[Endpoint] = []
+
+        while True:
+            endpoint = self._select(tried, body)
+            tried.append(endpoint)
+            endpoint.outstanding += 1
+
+            try:
+                response = await endpoint.client.post(
+                    endpoint.url, headers=headers, data=data,
+                )
+            except aiohttp.ClientConnectorError as e:
+                # The request has not been sent, so it is safe to resend it
+                self._on_failure(endpoint, e)
+                if len(tried) >= attempts:
+                    raise
+                continue
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                self._on_failure(endpoint, e)
+                raise
+            finally:
+                endpoint.outstanding -= 1
+
+            endpoint.failures = 0
+            return response
+
+    def _on_failure(self, endpoint: Endpoint, exc: BaseException) -> None:
+        endpoint.failures += 1
+
+        if endpoint.ejected or endpoint.failures < self.max_failures:
+            return
+
+        log.warning(
+            "Endpoint %s failed %d times: %r, ejecting it",
+            endpoint.url, endpoint.failures, exc,
+        )
+
+        endpoint.ejected = True
+        self._healthy = [e for e in self.endpoints if not e.ejected]
+
+        task = self.loop.create_task(self._prober(endpoint))
+        self._probes[endpoint] = task
+        task.add_done_callback(lambda _: self._probes.pop(endpoint, None))
+
+    def _restore(self, endpoint: Endpoint) -> None:
+        log.info("Endpoint %s is available again", endpoint.url)
+
+        endpoint.failures = 0
+        endpoint.ejected = False
+        self._healthy = [e for e in self.endpoints if not e.ejected]
+
+    async def _prober(self, endpoint: Endpoint) -> None:
+        delay = self.eject_time
+
+        while True:
+            await asyncio.sleep(delay)
+
+            try:
+                await asyncio.wait_for(
+                    self.probe(endpoint), timeout=self.probe_timeout,
+                )
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                log.debug("Probe of %s failed: %r", endpoint.url, e)
+                delay = min(delay * 2, self.max_eject_time)
+                continue
+            except Exception:
+                # The endpoint would stay ejected forever without the prober
+                log.exception("Probe of %s failed", endpoint.url)
+                delay = min(delay * 2, self.max_eject_time)
+                continue
+
+            self._restore(endpoint)
+            return
+
+    async def probe(self, endpoint: Endpoint) -> None:
+        """ Checks the ejected endpoint, raises ``aiohttp.ClientError``
+        when it is still unavailable. The empty batch is sent by default,
+        it is answered without calling any method. """
+        headers = self.headers
+        if self._has_headers_hook:
+            headers = await self.prepare_headers(headers)
+
+        response = await endpoint.client.post(
+            endpoint.url, headers=headers, data=b"[]",
+        )
+
+        try:
+            response.raise_for_status()
+        finally:
+            response.release()
+
+    async def close(self, force=False):
+        for task in list(self._probes.values()):
+            task.cancel()
+
+        await super().close(force=force)
+
+        if not self.client_owner and not force:
+            return
+
+        for endpoint in self.endpoints[1:]:
+            await endpoint.client.close()
+
+
+KeyExtractor = Union[int, str, Callable[[JSONRPCRequest], Any]]
+
+
+class HashedServerProxy(BalancedServerProxy):
+    """ Routes calls by the key, so calls with the same key are served
+    by the same replica and hit its warm caches.
+
+    ``keys`` maps the method name to the position (``int``) or the name
+    (``str``) of the argument used as the key, or to the callable taking
+    the request and returning the key. Keys are placed on the consistent
+    hash ring with ``vnodes`` virtual nodes per endpoint, so keys of the
+    ejected endpoint are served by the next ones and only they are moved.
+    Calls without the key are balanced by the ``strategy``.
+
+    Batches are split by the endpoint, parts are sent concurrently and
+    the results are merged back in the order of the requests.
+    """
+
+    __slots__ = ("keys", "ring", "_by_url")
+
+    def __init__(
+        self, urls: Sequence[Union[str, yarl.URL]],
+        keys: Mapping[str, KeyExtractor],
+        vnodes: int = 160,
+        **kwargs: Any
+    ):
+        super().__init__(urls, **kwargs)
+
+        self.keys = dict(keys)
+        self._by_url = {endpoint.url: endpoint for endpoint in self.endpoints}
+        self.ring = HashRing(self._by_url, vnodes=vnodes)
+
+    def get_key(self, request: JSONRPCRequest) -> Any:
+        """ Returns the routing key of the request or None """
+        extractor = self.keys.get(request.get("method"))
+
+        if extractor is None:
+            return None
+
+        if callable(extractor):
+            return extractor(request)
+
+        params = request.get("params")
+
+        try:
+            if isinstance(extractor, int) and isinstance(params, (list, tuple)):
+                return params[extractor]
+            if isinstance(extractor, str) and isinstance(params, dict):
+                return params[extractor]
+        except (IndexError, KeyError):
+            pass
+
+        return None
+
+    def _route(
+        self, request: Any, exclude: Collection[Endpoint] = (),
+    ) -> Optional[Endpoint]:
+        key = self.get_key(request) if isinstance(request, dict) else None
+
+        if key is None:
+            return None
+
+        for url in self.ring.iterate(key):
+            endpoint = self._by_url[url]
+            if not endpoint.ejected and endpoint not in exclude:
+                return endpoint
+
+        return None
+
+    def _select(
+        self, exclude: Collection[Endpoint] = (), body: JSONRPCBody = None,
+    ) -> Endpoint:
+        requests = body if isinstance(body, list) else [body]
+
+        for request in requests:
+            endpoint = self._route(request, exclude)
+            if endpoint is not None:
+                return endpoint
+
+        return super()._select(exclude, body)
+
+    async def _post_batch(
+        self, request: List[JSONRPCRequest], request_indecies: List[Any],
+        return_exceptions: bool,
+    ) -> List[Any]:
+        groups: Dict[Optional[Endpoint], List[JSONRPCRequest]] = {}
+
+        for req in request:
+            groups.setdefault(self._route(req), []).append(req)
+
+        if len(groups) < 2:
+            return await super()._post_batch(
+                request, request_indecies, return_exceptions,
+            )
+
+        responses = await asyncio.gather(
+            *[self._request(group) for group in groups.values()],
+            return_exceptions=True
+        )
+
+        results: Dict[Any, Any] = {}
+
+        for group, data in zip(groups.values(), responses):
+            ids = [req.get("id") for req in group]
+
+            if isinstance(data, Exception):
+                # The part of the batch has not been delivered
+                if not return_exceptions:
+                    raise data
+                parsed = [data] * len(group)
+            else:
+                parsed = self._parse_batch_response(
+                    await self._loads(data), ids, return_exceptions,
+                )
+
+            results.update(zip(ids, parsed))
+
+        return [
+            None if req_id is None else results[req_id]
+            for req_id in request_indecies
+        ]
+
+
+class WebSocketServerProxy(ServerProxy):
+    """ Keeps the single WebSocket connection to the
+    ``JSONRPCWebSocketView`` and multiplexes concurrent calls over it.
+
+    The connection is established on the first call and re-established
+    in background when it's lost. Calls in-flight at the moment of
+    disconnection fail with :class:`aiohttp.ClientConnectionError`.
+
+    Responses are awaited no longer than ``call_timeout`` or the deadline
+    of the current context. Batching, retries and the compression of
+    the requests are not supported by this transport.
+    """
+
+    UNSUPPORTED_OPTIONS = ("batch_window", "retry_policies", "compression")
+
+    __slots__ = (
+        "heartbeat", "reconnect_delay", "max_reconnect_delay",
+        "_ws", "_pending", "_reader", "_reconnect", "_lock", "_closed",
+    )
+
+    def __init__(
+        self, url: Union[str, yarl.URL],
+        client: ClientSessionType = None,
+        *args: Any,
+        heartbeat: Optional[float] = 30,
+        reconnect_delay: float = 0.5,
+        max_reconnect_delay: float = 30,
+        **kwargs: Any
+    ):
+        for option in self.UNSUPPORTED_OPTIONS:
+            if kwargs.get(option):
+                raise TypeError(
+                    "%s is not supported by %s" % (
+                        option, self.__class__.__name__,
+                    ),
+                )
+
+        super().__init__(url, client, *args, **kwargs)
+
+        self.heartbeat = heartbeat
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+
+        self._ws: Optional[aiohttp.ClientWebSocketResponse] = None
+        self._pending: Dict[Any, asyncio.Future] = {}
+        self._reader: Optional[asyncio.Task] = None
+        self._reconnect: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+        self._closed = False
+
+    @property
+    def connected(self) -> bool:
+        return self._ws is not None and not self._ws.closed
+
+    async def connect(self) -> aiohttp.ClientWebSocketResponse:
+        if self.connected:
+            return self._ws
+
+        async with self._lock:
+            if self.connected:
+                return self._ws
+
+            if self._closed:
+                raise aiohttp.ClientConnectionError("Proxy is closed")
+
+            self._ws = await self.client.ws_connect(
+                self.url,
+                headers=await self.prepare_headers(self.headers),
+                heartbeat=self.heartbeat,
+            )
+            self._reader = self.loop.create_task(self._read(self._ws))
+            return self._ws
+
+    async def _read(self, ws: aiohttp.ClientWebSocketResponse) -> None:
+        try:
+            async for message in ws:
+                if message.type == aiohttp.WSMsgType.TEXT:
+                    self._on_message(message.data.encode())
+                elif message.type == aiohttp.WSMsgType.BINARY:
+                    self._on_message(message.data)
+        finally:
+            self._fail_pending(
+                aiohttp.ClientConnectionError("WebSocket connection lost"),
+            )
+
+            if not self._closed:
+                log.warning("Connection to %s lost, reconnecting", self.url)
+                self._reconnect = self.loop.create_task(self._reconnector())
+
+    def _on_message(self, body: bytes) -> None:
+        try:
+            data = self.codec.loads(body)
+        except ValueError:
+            log.exception("Can not parse the message")
+            return
+
+        for response in data if isinstance(data, list) else [data]:
+            future = None
+            if isinstance(response, dict):
+                future = self._pending.pop(response.get("id"), None)
+
+            if future is None:
+                log.warning("Unexpected message: %r", response)
+                continue
+
+            if not future.done():
+                future.set_result(response)
+
+    def _fail_pending(self, exception: Exception) -> None:
+        pending, self._pending = self._pending, {}
+
+        for future in pending.values():
+            if not future.done():
+                future.set_exception(exception)
+
+    async def _reconnector(self) -> None:
+        delay = self.reconnect_delay
+
+        while not self._closed and not self.connected:
+            try:
+                await self.connect()
+            except aiohttp.ClientError as e:
+                log.warning(
+                    "Reconnection to %s failed: %r, next attempt in %.1f "
+                    "seconds", self.url, e, delay,
+                )
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, self.max_reconnect_delay)
+
+    async def _send(self, request: JSONRPCBody) -> None:
+        ws = await self.connect()
+        if self._has_body_hook:
+            request = await self.prepare_body(request)
+
+        data = self.codec.dumps(request)
+
+        if self.codec.charset:
+            await ws.send_str(data.decode(self.codec.charset))
+        else:
+            await ws.send_bytes(data)
+
+    def _create_future(self, request_id: Any) -> asyncio.Future:
+        future = self.loop.create_future()
+        self._pending[request_id] = future
+        return future
+
+    async def _wait(self, future: Awaitable[Any]) -> Any:
+        timeout = self._get_timeout()
+        if timeout is None:
+            return await future
+
+        try:
+            return await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            raise exceptions.CallTimeout(
+                "Deadline of the request is exceeded",
+            )
+
+    async def __remote_call(self, json_request: JSONRPCRequest) -> Any:
+        if "id" not in json_request:
+            await self._send(json_request)
+            return
+
+        future = self._create_future(json_request["id"])
+
+        try:
+            await self._send(json_request)
+            return self._parse_response(await self._wait(future))
+        finally:
+            self._pending.pop(json_request["id"], None)
+
+    async def __call__(
+        self, *prepared_methods: JSONRPCRequest, return_exceptions=True
+    ) -> Any:
+        request, request_indecies = self._prepare_batch(prepared_methods)
+        ids = [req_id for req_id in request_indecies if req_id is not None]
+        futures = [self._create_future(req_id) for req_id in ids]
+
+        try:
+            await self._send(request)
+            data = await self._wait(asyncio.gather(*futures))
+        finally:
+            for req_id in ids:
+                self._pending.pop(req_id, None)
+
+        return self._parse_batch_response(
+            data, request_indecies, return_exceptions,
+        )
+
+    def __getitem__(self, method_name: str) -> Method:
+        method = self._methods.get(method_name)
+        if method is not None:
+            return method
+
+        method = Method(
+            method_name, self.__remote_call, id_factory=self.id_factory,
+        )
+
+        if len(self._methods) < self.METHOD_CACHE_SIZE:
+            self._methods[method_name] = method
+        return method
+
+    def create_notification(self, method: str) -> Notification:
+        return Notification(method, self.__remote_call)
+
+    async def close(self, force=False):
+        if self._notify_tasks:
+            await asyncio.gather(*self._notify_tasks, return_exceptions=True)
+
+        self._closed = True
+
+        if self._reconnect is not None:
+            self._reconnect.cancel()
+
+        if self._ws is not None:
+            await self._ws.close()
+
+        if self._reader is not None:
+            await asyncio.gather(self._reader, return_exceptions=True)
+
+        return await super().close(force=force)
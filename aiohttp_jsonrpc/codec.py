@@ -0,0 +1,366 @@
+import asyncio
+import json
+import logging
+import math
+import pickle
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Any, Callable, Iterable, List, Optional, Sequence
+from weakref import WeakKeyDictionary
+
+from .common import json_default, native_subclasses_registered, py2json
+
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+
+if orjson is not None:
+    # datetime and subclasses of native types go through py2json for
+    # the same output as other codecs, non-str keys are not allowed,
+    # so such dicts are encoded by the stdlib json the same way as well
+    ORJSON_OPTIONS = (
+        orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_SUBCLASS
+    )
+
+
+log = logging.getLogger(__name__)
+
+# Items of the streamed result, one JSON document per line
+NDJSON_CONTENT_TYPE = "application/x-ndjson"
+
+# Keys the json module renders unlike str(key) of py2json
+# (True, False, None and the non-finite floats)
+_NATIVE_KEYS = (b'"true":', b'"false":', b'"null":', b'NaN":', b'Infinity":')
+
+
+class Codec:
+    """ Serializes JSON-RPC bodies to bytes and back """
+
+    content_type = "application/json"
+    charset: Optional[str] = "utf-8"
+    # The body is JSON, so it might be scanned incrementally
+    streamable = True
+
+    def dumps(self, value: Any) -> bytes:
+        raise NotImplementedError
+
+    def loads(self, data: bytes) -> Any:
+        raise NotImplementedError
+
+    def dumps_result(self, request_id: Any, result: bytes) -> bytes:
+        """ Builds the success response around the encoded result """
+        return b"".join((
+            b'{"jsonrpc":"2.0","id":', self.dumps(request_id),
+            b',"result":', result, b"}",
+        ))
+
+    def dumps_batch(self, responses: Iterable[bytes]) -> bytes:
+        """ Joins encoded responses into the batch response """
+        return b"[" + b",".join(responses) + b"]"
+
+    @property
+    def content_type_header(self) -> str:
+        if not self.charset:
+            return self.content_type
+        return "{0}; charset={1}".format(self.content_type, self.charset)
+
+    def __repr__(self) -> str:
+        return "<{0}: {1}>".format(self.__class__.__name__, self.content_type)
+
+
+class JSONCodec(Codec):
+    """ Codec based on the stdlib ``json`` module """
+
+    def __init__(self) -> None:
+        self.encoder = json.JSONEncoder(
+            ensure_ascii=False,
+            separators=(",", ":"),
+            default=json_default,
+        )
+
+    def dumps(self, value: Any) -> bytes:
+        if not native_subclasses_registered():
+            try:
+                data = self.encoder.encode(value).encode()
+            except TypeError:
+                # e.g. dict keys which are not str, int, float, bool or None
+                pass
+            else:
+                if not any(key in data for key in _NATIVE_KEYS):
+                    return data
+
+        return self.encoder.encode(py2json(value)).encode()
+
+    def loads(self, data: bytes) -> Any:
+        # json.loads detects the UTF-8/16/32 encoding of bytes by itself
+        return json.loads(data)
+
+
+class ORJSONCodec(Codec):
+    """ Codec based on ``orjson``, falls back to the stdlib ``json``
+    for values orjson refuses to encode (e.g. integers over 64 bits) """
+
+    def __init__(self) -> None:
+        if orjson is None:
+            raise RuntimeError("orjson is not installed")
+        self.fallback = JSONCodec()
+
+    def dumps(self, value: Any) -> bytes:
+        try:
+            data = orjson.dumps(
+                value, default=json_default, option=ORJSON_OPTIONS,
+            )
+        except TypeError:
+            return self.fallback.dumps(value)
+
+        # orjson encodes NaN and infinity as null, json as NaN and Infinity
+        if b"null" in data and _has_non_finite(value):
+            return self.fallback.dumps(value)
+        return data
+
+    def loads(self, data: bytes) -> Any:
+        return orjson.loads(data)
+
+
+def _has_non_finite(value: Any) -> bool:
+    """ Looks for NaN and infinity in JSON-native containers """
+    stack = [value]
+    while stack:
+        value = stack.pop()
+        cls = value.__class__
+        if cls is dict:
+            stack.extend(value.values())
+        elif cls is list or cls is tuple:
+            stack.extend(value)
+        elif cls is float and not math.isfinite(value):
+            return True
+    return False
+
+
+class UJSONCodec(Codec):
+    """ Codec based on ``ujson``, falls back to the stdlib ``json``
+    for values ujson refuses to encode """
+
+    def __init__(self) -> None:
+        if ujson is None:
+            raise RuntimeError("ujson is not installed")
+        self.fallback = JSONCodec()
+
+    def dumps(self, value: Any) -> bytes:
+        if native_subclasses_registered():
+            return self.fallback.dumps(value)
+
+        try:
+            return ujson.dumps(
+                value, ensure_ascii=False, default=json_default,
+            ).encode()
+        except (TypeError, OverflowError):
+            return self.fallback.dumps(value)
+
+    def loads(self, data: bytes) -> Any:
+        return ujson.loads(data)
+
+
+class CallableCodec(Codec):
+    """ Adapter for the str based ``dumps``/``loads`` pair like
+    ``json.dumps``/``json.loads`` and compatible replacements """
+
+    def __init__(
+        self, dumps: Callable[..., str], loads: Callable[[str], Any],
+        **dumps_kwargs: Any
+    ):
+        self._dumps = dumps
+        self._loads = loads
+        self._dumps_kwargs = dumps_kwargs
+
+    def dumps(self, value: Any) -> bytes:
+        result = self._dumps(py2json(value), **self._dumps_kwargs)
+        if isinstance(result, str):
+            return result.encode()
+        return result
+
+    def loads(self, data: bytes) -> Any:
+        return self._loads(data.decode())
+
+
+class MsgPackCodec(Codec):
+    """ Binary codec based on ``msgpack``, the envelope is the same as
+    in the JSON, but ``bytes`` and ``Binary`` are packed natively
+    instead of the base64 encoded string """
+
+    content_type = "application/msgpack"
+    charset = None
+    streamable = False
+
+    def __init__(self) -> None:
+        if msgpack is None:
+            raise RuntimeError("msgpack is not installed")
+        self.packer_kwargs = dict(default=json_default, use_bin_type=True)
+
+    def dumps(self, value: Any) -> bytes:
+        return msgpack.packb(value, **self.packer_kwargs)
+
+    def loads(self, data: bytes) -> Any:
+        try:
+            return msgpack.unpackb(data, raw=False, strict_map_key=False)
+        except (msgpack.UnpackException, TypeError) as e:
+            # e.g. truncated data or unhashable map keys
+            raise ValueError(str(e)) from e
+
+    def dumps_result(self, request_id: Any, result: bytes) -> bytes:
+        return b"".join((
+            b"\x83", self.dumps("jsonrpc"), self.dumps("2.0"),
+            self.dumps("id"), self.dumps(request_id),
+            self.dumps("result"), result,
+        ))
+
+    def dumps_batch(self, responses: Iterable[bytes]) -> bytes:
+        responses = list(responses)
+        header = msgpack.Packer().pack_array_header(len(responses))
+        return header + b"".join(responses)
+
+
+def _create_default_codec() -> Codec:
+    if orjson is not None:
+        return ORJSONCodec()
+    if ujson is not None:
+        return UJSONCodec()
+    return JSONCodec()
+
+
+DEFAULT_CODEC = _create_default_codec()
+log.debug("Default JSON-RPC codec is %r", DEFAULT_CODEC)
+
+
+def get_codec(
+    dumps: Callable[..., str] = json.dumps,
+    loads: Callable[[str], Any] = json.loads,
+    **dumps_kwargs: Any
+) -> Codec:
+    """ Returns the default codec for the stdlib ``dumps``/``loads``
+    and wraps any other pair into the :class:`CallableCodec` """
+
+    if dumps is json.dumps and loads is json.loads:
+        return DEFAULT_CODEC
+    return CallableCodec(dumps, loads, **dumps_kwargs)
+
+
+_PICKLABLE: "WeakKeyDictionary[Codec, bool]" = WeakKeyDictionary()
+
+
+def _can_submit(codec: Codec, executor: Optional[Executor]) -> bool:
+    """ Codecs are passed to the process pool by pickle,
+    e.g. the CallableCodec with lambdas can not be passed """
+    if not isinstance(executor, ProcessPoolExecutor):
+        return True
+
+    result = _PICKLABLE.get(codec)
+    if result is None:
+        try:
+            pickle.dumps(codec)
+            result = True
+        except (pickle.PicklingError, TypeError, AttributeError):
+            log.warning("%r can not be used in the process pool", codec)
+            result = False
+        _PICKLABLE[codec] = result
+
+    return result
+
+
+def _dumps_items(codec: Codec, items: Sequence[Any]) -> List[bytes]:
+    return [codec.dumps(item) for item in items]
+
+
+async def _dumps_chunk(
+    codec: Codec, items: Sequence[Any], executor: Optional[Executor],
+) -> List[bytes]:
+    try:
+        return await asyncio.get_event_loop().run_in_executor(
+            executor, _dumps_items, codec, items,
+        )
+    except Exception as e:
+        # Items the codec supports might be not picklable (e.g. generators),
+        # real encoding errors are raised again by the inline encoding
+        log.debug("Encoding the chunk inline, the executor failed: %r", e)
+        return _dumps_items(codec, items)
+
+
+async def loads_async(
+    codec: Codec, data: bytes, executor_threshold: Optional[int] = None,
+    executor: Optional[Executor] = None,
+) -> Any:
+    """ Decodes the body, bodies larger than ``executor_threshold``
+    are decoded in the executor to keep the event loop responsive """
+    if (
+        executor_threshold is None or
+        len(data) < executor_threshold or
+        not _can_submit(codec, executor)
+    ):
+        return codec.loads(data)
+
+    return await asyncio.get_event_loop().run_in_executor(
+        executor, codec.loads, data,
+    )
+
+
+async def dumps_batch_async(
+    codec: Codec, items: Sequence[Any],
+    executor_threshold: Optional[int] = None,
+    executor: Optional[Executor] = None,
+) -> bytes:
+    """ Encodes the batch. The size of the batch is estimated by the
+    first element, when it exceeds ``executor_threshold`` the rest of
+    elements are encoded in the executor by chunks of about this size
+    in parallel, and encoded fragments are joined. """
+    if (
+        executor_threshold is None or
+        len(items) < 2 or
+        not _can_submit(codec, executor)
+    ):
+        return codec.dumps(items)
+
+    first = codec.dumps(items[0])
+    chunk_size = max(1, executor_threshold // max(len(first), 1))
+
+    if len(items) <= chunk_size:
+        return codec.dumps_batch(
+            [first] + _dumps_items(codec, items[1:]),
+        )
+
+    chunks = await asyncio.gather(*[
+        _dumps_chunk(codec, items[idx:idx + chunk_size], executor)
+        for idx in range(1, len(items), chunk_size)
+    ])
+
+    return codec.dumps_batch(
+        [first] + [fragment for chunk in chunks for fragment in chunk],
+    )
+
+
+__all__ = (
+    "CallableCodec",
+    "Codec",
+    "DEFAULT_CODEC",
+    "JSONCodec",
+    "MsgPackCodec",
+    "NDJSON_CONTENT_TYPE",
+    "ORJSONCodec",
+    "UJSONCodec",
+    "dumps_batch_async",
+    "get_codec",
+    "loads_async",
+)
@@ -77,7 +77,7 @@ def _(value):
     return {
         "type": "binary",
         "encoding": "base64",
-        "data": base64.b64encode(value),
+        "data": base64.b64encode(value).decode(),
     }
 
 
@@ -103,6 +103,60 @@ def _(e: BaseException) -> JSONRPCError:
     )
 
 
+def json_default(value):
+    """ Converts a single non-JSON-native value through the types
+    registered by ``py2json.register``.
+
+    Intended to be the ``default=`` hook of the JSON encoder, so
+    JSON-native containers are walked once by the encoder itself
+    without building the intermediate tree.
+    """
+    result = py2json.dispatch(value.__class__)(value)
+    if result is not value:
+        return result
+
+    # Unregistered subclasses of str, int and float are returned as is,
+    # the encoder passing them here expects the exact type
+    for base, convert in _SCALAR_TYPES:
+        if isinstance(value, base):
+            return convert(value)
+    return result
+
+
+_SCALAR_TYPES = (
+    (str, str.__str__), (int, int.__int__), (float, float.__float__),
+)
+_NATIVE_TYPES = (str, int, float, list, tuple, dict)
+_registry_state = [0, False]
+
+
+def native_subclasses_registered() -> bool:
+    """ Whether ``py2json`` has handlers for subclasses of JSON-native
+    types, which the encoders serialize natively without calling the
+    ``default=`` hook """
+    size = len(py2json.registry)
+    if _registry_state[0] != size:
+        _registry_state[:] = size, any(
+            cls is not bool and cls not in _NATIVE_TYPES and
+            issubclass(cls, _NATIVE_TYPES)
+            for cls in py2json.registry
+        )
+    return _registry_state[1]
+
+
+def mark_method(func: typing.Any, **attributes: typing.Any) -> typing.Any:
+    """ Sets the attributes of the ``rpc_`` method for the view, the
+    function wrapped by the ``staticmethod`` or ``classmethod`` is marked
+    instead of the descriptor itself """
+    target = func
+    if isinstance(func, (staticmethod, classmethod)):
+        target = func.__func__
+
+    for name, value in attributes.items():
+        setattr(target, name, value)
+    return func
+
+
 def awaitable(func):
     # Avoid python 3.8+ warning
     if asyncio.iscoroutinefunction(func):
@@ -134,5 +188,7 @@ __all__ = (
     "JSONRPCError",
     "JSONRPCRequest",
     "JSONRPCResponse",
+    "json_default",
+    "native_subclasses_registered",
     "py2json",
 )
@@ -0,0 +1,160 @@
+import asyncio
+import gzip
+import zlib
+from concurrent.futures import Executor
+from typing import Any, Callable, Dict, Iterable, NamedTuple, Optional
+
+
+try:
+    import brotli
+except ImportError:
+    try:
+        import brotlicffi as brotli
+    except ImportError:
+        brotli = None
+
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+class Compressor(NamedTuple):
+    encoding: str
+    compress: Callable[[bytes], bytes]
+    decompress: Callable[[bytes], bytes]
+
+
+def _inflate(data: bytes) -> bytes:
+    try:
+        return zlib.decompress(data)
+    except zlib.error:
+        # Some implementations send the raw deflate stream
+        return zlib.decompress(data, -zlib.MAX_WBITS)
+
+
+# Ordered by preference, when the client accepts several
+# encodings with the same quality the first one is selected
+COMPRESSORS: Dict[str, Compressor] = {}
+
+if zstandard is not None:
+    COMPRESSORS["zstd"] = Compressor(
+        "zstd",
+        lambda data: zstandard.ZstdCompressor(level=3).compress(data),
+        lambda data: zstandard.ZstdDecompressor().decompressobj().decompress(
+            data,
+        ),
+    )
+
+if brotli is not None:
+    COMPRESSORS["br"] = Compressor(
+        "br",
+        lambda data: brotli.compress(data, quality=4),
+        brotli.decompress,
+    )
+
+COMPRESSORS["gzip"] = Compressor(
+    "gzip",
+    lambda data: gzip.compress(data, compresslevel=5),
+    gzip.decompress,
+)
+
+COMPRESSORS["deflate"] = Compressor(
+    "deflate",
+    lambda data: zlib.compress(data, 5),
+    _inflate,
+)
+
+
+# Encodings of the request bodies the aiohttp server decodes itself,
+# "br" depends on the brotli package of the server and "zstd" is not
+# supported at all, so the client can not rely on them
+REQUEST_ENCODINGS = ("gzip", "deflate")
+
+# Encodings of the streamed responses, the compressor is flushed
+# after every chunk, so the client can decode it immediately
+STREAM_ENCODINGS = ("gzip", "deflate")
+
+
+def compressobj(encoding: str) -> Any:
+    """ Returns the zlib compressor of the ``STREAM_ENCODINGS`` """
+    if encoding == "gzip":
+        return zlib.compressobj(5, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    if encoding == "deflate":
+        return zlib.compressobj(5, zlib.DEFLATED, zlib.MAX_WBITS)
+    raise ValueError("Unsupported stream encoding %r" % encoding)
+
+
+def negotiate(
+    accept_encoding: Optional[str],
+    encodings: Optional[Iterable[str]] = None,
+) -> Optional[str]:
+    """ Selects the encoding by the ``Accept-Encoding`` header value,
+    returns None when the body should not be compressed """
+    if not accept_encoding:
+        return None
+
+    supported = list(encodings if encodings is not None else COMPRESSORS)
+    accepted: Dict[str, float] = {}
+
+    for item in accept_encoding.split(","):
+        encoding, _, params = item.strip().partition(";")
+        quality = 1.
+
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                continue
+
+        accepted[encoding.strip().lower()] = quality
+
+    wildcard = accepted.get("*", 0.)
+    best, best_quality = None, 0.
+
+    for encoding in supported:
+        if encoding not in COMPRESSORS:
+            continue
+
+        quality = accepted.get(encoding, wildcard)
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+
+    return best
+
+
+def compress(encoding: str, data: bytes) -> bytes:
+    return COMPRESSORS[encoding].compress(data)
+
+
+def decompress(encoding: str, data: bytes) -> bytes:
+    return COMPRESSORS[encoding].decompress(data)
+
+
+async def compress_async(
+    encoding: str, data: bytes, executor_threshold: Optional[int] = None,
+    executor: Optional[Executor] = None,
+) -> bytes:
+    """ Compresses the body, bodies larger than ``executor_threshold``
+    are compressed in the executor to keep the event loop responsive """
+    if executor_threshold is None or len(data) < executor_threshold:
+        return compress(encoding, data)
+
+    return await asyncio.get_event_loop().run_in_executor(
+        executor, COMPRESSORS[encoding].compress, data,
+    )
+
+
+__all__ = (
+    "COMPRESSORS",
+    "Compressor",
+    "REQUEST_ENCODINGS",
+    "STREAM_ENCODINGS",
+    "compress",
+    "compressobj",
+    "compress_async",
+    "decompress",
+    "negotiate",
+)
@@ -0,0 +1,72 @@
+import math
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+
+# The remaining time in seconds, it's relative, so clocks
+# of the client and the server must not be synchronized
+TIMEOUT_HEADER = "X-JSONRPC-Timeout"
+
+# The absolute time.monotonic() deadline of the current call
+_DEADLINE: ContextVar[Optional[float]] = ContextVar(
+    "jsonrpc_deadline", default=None,
+)
+
+
+def remaining() -> Optional[float]:
+    """ Returns the time budget of the current call in seconds (negative
+    when it's exceeded) or None when there is no deadline. Calls of the
+    ``ServerProxy`` made within the ``rpc_`` method are limited by it. """
+    value = _DEADLINE.get()
+    if value is None:
+        return None
+    return value - time.monotonic()
+
+
+@contextmanager
+def deadline(timeout: Optional[float]) -> Iterator[None]:
+    """ Limits calls made within the block by ``timeout`` seconds.
+    The nested block might only shorten the current deadline. """
+    if timeout is None:
+        yield
+        return
+
+    value = time.monotonic() + timeout
+    current = _DEADLINE.get()
+    if current is not None and current < value:
+        value = current
+
+    token = _DEADLINE.set(value)
+    try:
+        yield
+    finally:
+        _DEADLINE.reset(token)
+
+
+def parse_timeout(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+
+    try:
+        timeout = float(value)
+    except ValueError:
+        return None
+
+    if not math.isfinite(timeout):
+        return None
+    return timeout
+
+
+def format_timeout(timeout: float) -> str:
+    return "%.3f" % max(timeout, 0.)
+
+
+__all__ = (
+    "TIMEOUT_HEADER",
+    "deadline",
+    "format_timeout",
+    "parse_timeout",
+    "remaining",
+)
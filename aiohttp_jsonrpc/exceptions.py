@@ -1,15 +1,20 @@
+from typing import Any, Optional
+
 from .common import py2json
 
 
 __all__ = (
-    "JSONRPCError", "ApplicationError", "InvalidCharacterError",
-    "ParseError", "ServerError", "SystemError", "TransportError",
+    "JSONRPCError", "ApplicationError", "CallTimeout",
+    "InvalidCharacterError", "Overloaded", "ParseError", "QueueFull",
+    "RateLimited", "ServerError", "SystemError", "TransportError",
     "UnsupportedEncodingError",
 )
 
 
 class JSONRPCError(Exception):
     code = -32500
+    # Sent as the "data" member of the error object when set
+    data: Any = None
 
     @property
     def message(self):
@@ -51,6 +56,45 @@ class InvalidArguments(ServerError):
     code = -32602
 
 
+class CallTimeout(ServerError):
+    code = -32001
+
+
+class QueueFull(ServerError):
+    code = -32002
+
+
+class Overloaded(ServerError):
+    """ The call is rejected by the admission control of the server,
+    the client should retry it after ``retry_after`` seconds """
+
+    code = -32003
+
+    def __init__(
+        self, message: str = "Server is overloaded",
+        retry_after: Optional[float] = None,
+    ):
+        super().__init__(message)
+        if retry_after is not None:
+            self.data = {"retry_after": retry_after}
+
+    @property
+    def retry_after(self) -> Optional[float]:
+        if not isinstance(self.data, dict):
+            return None
+
+        value = self.data.get("retry_after")
+        if isinstance(value, (int, float)) and value >= 0:
+            return value
+        return None
+
+
+class RateLimited(Overloaded):
+    """ The client has exceeded the rate limit of the server """
+
+    code = -32004
+
+
 class ApplicationError(JSONRPCError):
     code = -32500
 
@@ -73,6 +117,8 @@ __EXCEPTION_CODES = {
     InvalidData.code: InvalidData,
     MethodNotFound.code: MethodNotFound,
     InvalidArguments.code: InvalidArguments,
+    CallTimeout.code: CallTimeout,
+    QueueFull.code: QueueFull,
     ApplicationError.code: ApplicationError,
     SystemError.code: SystemError,
     TransportError.code: TransportError,
@@ -98,14 +144,18 @@ def register_exception(exception_type: BaseException, code: int):
     __EXCEPTION_TYPES[exception_type] = code
 
 
-def json2py_exception(code: int, fault: str, default_exc_class=JSONRPCError):
+def json2py_exception(
+    code: int, fault: str, default_exc_class=JSONRPCError, data: Any = None,
+):
     if code not in __EXCEPTION_CODES:
         exc = default_exc_class(fault)
         exc.code = code
-        return exc
+    else:
+        exc = __EXCEPTION_CODES[code](fault)
 
-    exc = __EXCEPTION_CODES[code]
-    return exc(fault)
+    if data is not None:
+        exc.data = data
+    return exc
 
 
 @py2json.register(Exception)
@@ -117,4 +167,10 @@ def _(value: Exception):
             code = __EXCEPTION_TYPES[klass]
             break
 
+    if isinstance(value, JSONRPCError) and value.data is not None:
+        return {"code": code, "message": reason, "data": value.data}
     return {"code": code, "message": reason}
+
+
+register_exception(Overloaded, Overloaded.code)
+register_exception(RateLimited, RateLimited.code)
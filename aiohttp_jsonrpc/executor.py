@@ -0,0 +1,106 @@
+import asyncio
+import pickle
+from concurrent.futures import (
+    Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor,
+)
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from . import exceptions
+from .common import mark_method
+
+
+THREAD = "thread"
+PROCESS = "process"
+
+_POOLS: Dict[str, Executor] = {}
+
+
+def run_in_thread(func: Any) -> Any:
+    """ Marks the ``rpc_`` method to be executed in the thread pool
+    of the view (see ``JSONRPCView.THREAD_POOL``) """
+    return mark_method(func, __rpc_executor__=THREAD)
+
+
+def run_in_process(func: Any) -> Any:
+    """ Marks the ``rpc_`` method to be executed in the process pool
+    of the view (see ``JSONRPCView.PROCESS_POOL``).
+
+    The method must be a ``staticmethod`` (the view instance is bound to
+    the request and can not be passed to another process), the function,
+    arguments and result must be picklable.
+    """
+    return mark_method(func, __rpc_executor__=PROCESS)
+
+
+def get_default_pool(kind: str) -> Executor:
+    """ Returns the process wide pool, creates it on the first call """
+    pool = _POOLS.get(kind)
+
+    if pool is None:
+        if kind == PROCESS:
+            pool = ProcessPoolExecutor()
+        else:
+            pool = ThreadPoolExecutor(thread_name_prefix="jsonrpc")
+        _POOLS[kind] = pool
+
+    return pool
+
+
+def pickle_call(func: Callable, args: Tuple, kwargs: Dict[str, Any]) -> bytes:
+    try:
+        return pickle.dumps((func, args, kwargs), pickle.HIGHEST_PROTOCOL)
+    except (pickle.PicklingError, TypeError, AttributeError) as e:
+        raise TypeError(
+            "Call of %r can not be passed to the process pool: %s" % (
+                func, e,
+            ),
+        ) from e
+
+
+def call_pickled(payload: bytes) -> Any:
+    func, args, kwargs = pickle.loads(payload)
+    return func(*args, **kwargs)
+
+
+class ExecutorQueue:
+    """ Limits the number of calls submitted to the executor
+    and not finished yet """
+
+    __slots__ = ("size", "pending")
+
+    def __init__(self, size: Optional[int]):
+        self.size = size
+        self.pending = 0
+
+    def _release(self) -> None:
+        self.pending -= 1
+
+    async def run(
+        self, executor: Executor, func: Callable, *args: Any
+    ) -> Any:
+        if self.size is not None and self.pending >= self.size:
+            raise exceptions.QueueFull(
+                "Executor queue is full (%d calls pending)" % self.pending,
+            )
+
+        loop = asyncio.get_event_loop()
+        future: Future = executor.submit(func, *args)
+
+        # The call is still running in the executor even when awaiting
+        # is cancelled, so the slot is released only when it's finished
+        self.pending += 1
+        future.add_done_callback(
+            lambda _: loop.call_soon_threadsafe(self._release),
+        )
+
+        return await asyncio.wrap_future(future)
+
+
+__all__ = (
+    "ExecutorQueue",
+    "PROCESS",
+    "THREAD",
+    "get_default_pool",
+    "run_in_process",
+    "run_in_thread",
+)
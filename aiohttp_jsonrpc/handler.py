@@ -1,51 +1,1056 @@
 import asyncio
+import contextvars
+import inspect
 import json
 import logging
-from typing import Union
+import time
+import zlib
+from concurrent.futures import Executor
+from contextlib import contextmanager
+from functools import partial
+from types import AsyncGeneratorType
+from typing import (
+    Any, AsyncIterator, Awaitable, Callable, Dict, Hashable, Iterator, List,
+    Mapping, Optional, Tuple, Union,
+)
 
-from aiohttp.web import HTTPBadRequest, Response, View
+from aiohttp import WSMsgType
+from aiohttp.web import (
+    HTTPBadRequest, HTTPException, HTTPRequestEntityTooLarge,
+    HTTPServiceUnavailable, HTTPTooManyRequests, Response, StreamResponse,
+    View, WebSocketResponse,
+)
 
-from . import exceptions
-from .common import (
-    JSONRPCBody, JSONRPCRequest, JSONRPCResponse, awaitable, py2json,
+from . import compression, exceptions
+from .cache import EncodedResult, ResultCache
+from .codec import (
+    DEFAULT_CODEC, NDJSON_CONTENT_TYPE, Codec, dumps_batch_async, get_codec,
+    loads_async,
+)
+from .common import JSONRPCBody, JSONRPCRequest, JSONRPCResponse, py2json
+from .deadline import TIMEOUT_HEADER, deadline, parse_timeout, remaining
+from .executor import (
+    PROCESS, THREAD, ExecutorQueue, call_pickled, get_default_pool,
+    pickle_call,
 )
+from .limiter import NORMAL, AdaptiveLimiter
+from .metrics import UNKNOWN_METHOD, Metrics
+from .notifications import NotificationQueue
+from .ratelimit import RateLimiter
+from .scanner import JSONScanner
 
 
 log = logging.getLogger(__name__)
 
+# Marks the end of the requests for the response writer
+_END = object()
+# The client identity has not been taken yet
+_MISSING = object()
+
+
+class RPCMethod:
+    """ Precompiled call descriptor of the single ``rpc_`` method """
+
+    __slots__ = (
+        "name", "func", "bound", "is_coroutine", "is_generator",
+        "is_async_generator", "executor", "cache", "inline", "priority",
+        "target", "_signature",
+    )
+
+    def __init__(self, name: str, func: Callable, bound: bool = True):
+        self.name = name
+        self.func = func
+        self.bound = bound
+        self.is_coroutine = asyncio.iscoroutinefunction(func)
+        self.is_async_generator = inspect.isasyncgenfunction(func)
+        self.is_generator = (
+            self.is_async_generator or inspect.isgeneratorfunction(func)
+        )
+        self.executor: Optional[str] = getattr(
+            func, "__rpc_executor__", None,
+        )
+        if self.executor == PROCESS and bound:
+            raise TypeError(
+                "Method %r executed in the process pool "
+                "must be a staticmethod" % name,
+            )
+
+        self.cache: Optional[ResultCache] = getattr(
+            func, "__rpc_cache__", None,
+        )
+        # Might be called without awaiting anything, the synchronous
+        # function returning an awaitable is scheduled as _PendingCall
+        self.inline = (
+            not self.is_coroutine and
+            not self.is_async_generator and
+            self.executor is None and
+            self.cache is None
+        )
+        self.priority: float = getattr(func, "__rpc_priority__", NORMAL)
+
+        self.target = "{0}.{1}".format(
+            getattr(func, "__module__", None),
+            getattr(func, "__qualname__", type(func).__name__),
+        )
+        self._signature = None
+
+    @property
+    def signature(self) -> inspect.Signature:
+        if self._signature is None:
+            signature = inspect.signature(self.func)
+            if self.bound:
+                signature = signature.replace(
+                    parameters=list(signature.parameters.values())[1:],
+                )
+            self._signature = signature
+        return self._signature
+
+    def __call__(self, view: "JSONRPCView", *args, **kwargs) -> Any:
+        if self.bound:
+            return self.func(view, *args, **kwargs)
+        return self.func(*args, **kwargs)
+
+    def __repr__(self) -> str:
+        return "<{0}: {1} => {2}>".format(
+            self.__class__.__name__, self.name, self.target,
+        )
+
+
+class _PendingCall:
+    """ The call of the method which returned an awaitable """
+
+    __slots__ = ("json_request", "method", "result", "started")
+
+    def __init__(
+        self, json_request: JSONRPCRequest, method: RPCMethod, result: Any,
+        started: float,
+    ):
+        self.json_request = json_request
+        self.method = method
+        self.result = result
+        self.started = started
+
+    def discard(self) -> None:
+        """ Drops the call which will never be awaited """
+        if asyncio.iscoroutine(self.result):
+            self.result.close()
+        elif asyncio.isfuture(self.result):
+            self.result.cancel()
+
+
+class _ChunkWriter:
+    """ Joins small pieces of the stream into larger chunks.
+
+    The response is prepared on the first flush, so errors occurred
+    before might be still returned as the regular response. The
+    compressor is flushed with every chunk, aiohttp keeps compressed
+    data in the buffer until the end of the stream.
+    """
+
+    __slots__ = (
+        "request", "response", "limit", "chunks", "size", "lock",
+        "compressor",
+    )
+
+    def __init__(
+        self, request: Any, response: StreamResponse, limit: int,
+        encoding: Optional[str] = None,
+    ):
+        self.request = request
+        self.response = response
+        self.limit = limit
+        self.chunks: List[bytes] = []
+        self.size = 0
+        self.lock = asyncio.Lock()
+        self.compressor = None
+
+        if encoding is not None:
+            self.compressor = compression.compressobj(encoding)
+            response.headers["Content-Encoding"] = encoding
+
+    @property
+    def prepared(self) -> bool:
+        return self.response.prepared
+
+    def append(self, data: bytes) -> bool:
+        """ Returns True when the buffer should be flushed """
+        self.chunks.append(data)
+        self.size += len(data)
+        return self.size >= self.limit
+
+    async def flush(self) -> None:
+        if not self.chunks:
+            return
+
+        data = b"".join(self.chunks)
+        self.chunks.clear()
+        self.size = 0
+
+        # The lock keeps the order of concurrent flushes
+        async with self.lock:
+            await self._write(data, zlib.Z_SYNC_FLUSH)
+
+    async def close(self) -> None:
+        await self.flush()
+
+        async with self.lock:
+            await self._write(b"", zlib.Z_FINISH)
+            await self.response.write_eof()
+
+    async def _write(self, data: bytes, mode: int) -> None:
+        if not self.response.prepared:
+            await self.response.prepare(self.request)
+
+        if self.compressor is not None:
+            data = self.compressor.compress(data) + self.compressor.flush(mode)
+
+        if data:
+            await self.response.write(data)
+
+    async def flush_periodically(
+        self, stop: asyncio.Event, interval: float,
+    ) -> None:
+        while not stop.is_set():
+            try:
+                await asyncio.wait_for(stop.wait(), interval)
+            except asyncio.TimeoutError:
+                await self.flush()
+
 
 class JSONRPCView(View):
     METHOD_PREFIX = "rpc_"
 
     DUMPS = json.dumps
     LOADS = json.loads
+    CODEC: Optional[Codec] = None
+    # Additional codecs selected by the Content-Type of the request,
+    # responses are encoded by the codec named in the Accept header
+    CODECS: Tuple[Codec, ...] = ()
+
+    # Maximum number of the calls in the one batch request
+    MAX_BATCH_SIZE: Optional[int] = None
+    # Maximum size of the request body, the client_max_size
+    # of the application is used when None
+    MAX_BODY_SIZE: Optional[int] = None
+    # Maximum nesting depth of arrays and objects in the JSON request
+    MAX_DEPTH: Optional[int] = None
+    # Execute calls of the JSON batch as soon as they are received,
+    # before the whole request body is read
+    STREAM_BATCH = False
+    # Write responses of the JSON batch as soon as they and all the
+    # previous ones are ready, instead of building the whole response
+    STREAM_RESPONSE = False
+    # Ready responses are buffered up to this size before being written
+    STREAM_CHUNK_SIZE = 64 * 1024
+    # Maximum delay of the buffered items of the async generator
+    STREAM_FLUSH_INTERVAL = 0.1
+    # Maximum number of the batch calls executed concurrently
+    BATCH_CONCURRENCY: Optional[int] = 64
+    # Timeout of the single coroutine call, synchronous code
+    # can not be interrupted and is not a subject of this timeout.
+    # The deadline sent by the client shortens it
+    CALL_TIMEOUT: Optional[float] = None
+    # Interval of checking whether the client is still connected, the
+    # request is cancelled after the disconnect. None disables checks
+    DISCONNECT_CHECK_INTERVAL: Optional[float] = None
+
+    # Executors for the methods marked by the run_in_thread and
+    # run_in_process decorators, the process wide pools are used when None
+    THREAD_POOL: Optional[Executor] = None
+    PROCESS_POOL: Optional[Executor] = None
+    # Maximum number of calls submitted to each executor and not finished
+    EXECUTOR_QUEUE_SIZE: Optional[int] = 1024
+
+    # Metrics registry, instrumentation is disabled when None
+    METRICS: Optional[Metrics] = None
+
+    # Admission control, calls over the adaptive concurrency limit are
+    # rejected by the Overloaded error. Calls of methods which do not
+    # await anything are not limited. None disables the limit
+    CONCURRENCY_LIMITER: Optional[AdaptiveLimiter] = None
+
+    # Token buckets of the client (see get_client_id) for all calls and
+    # per method name, every call of the batch takes the token. Calls
+    # over the rate are rejected by the RateLimited error
+    RATE_LIMITER: Optional[RateLimiter] = None
+    METHOD_RATE_LIMITERS: Mapping[str, RateLimiter] = {}
+    # The client is identified by this header (set it only behind the
+    # trusted proxy) or by the peer address when it's missing
+    CLIENT_ID_HEADER: Optional[str] = None
+
+    # Responses larger than this are compressed with the best
+    # encoding accepted by the client, None disables compression
+    COMPRESSION_THRESHOLD: Optional[int] = None
+    COMPRESSION_ENCODINGS = tuple(compression.COMPRESSORS)
+    # Larger responses are compressed in the THREAD_POOL
+    COMPRESSION_EXECUTOR_THRESHOLD: Optional[int] = 1024 * 1024
+
+    # Request bodies and batch responses larger than this are decoded
+    # and encoded in the PROCESS_POOL, None disables it. Codecs hold
+    # the GIL, so the THREAD_POOL would not unblock the event loop
+    CODEC_EXECUTOR_THRESHOLD: Optional[int] = None
+
+    # Notifications are acknowledged immediately and processed in
+    # background by NOTIFICATION_WORKERS tasks, None processes them
+    # before the response is sent. Requests which do not fit into the
+    # queue are answered by the NOTIFICATION_OVERLOAD_STATUS (503 or 429),
+    # the overflow of requests larger than the queue is processed in place
+    NOTIFICATION_QUEUE_SIZE: Optional[int] = None
+    NOTIFICATION_WORKERS = 4
+    NOTIFICATION_OVERLOAD_STATUS = 503
+    # Queued notifications are processed on shutdown within this time
+    NOTIFICATION_DRAIN_TIMEOUT: Optional[float] = 10
+
+    _methods: Dict[str, RPCMethod] = {}
+    _codec: Codec = DEFAULT_CODEC
+    _codecs: Dict[str, Codec] = {DEFAULT_CODEC.content_type: DEFAULT_CODEC}
+    _executor_queues: Dict[str, ExecutorQueue] = {}
+    _notifications: Optional[NotificationQueue] = None
+    _has_cache = False
+    _has_rate_limits = False
+    _client_id: Any = _MISSING
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._methods = cls._build_dispatch_table()
+        cls._has_cache = any(
+            method.cache is not None for method in cls._methods.values()
+        )
+        cls._codec = cls.CODEC or get_codec(
+            cls.DUMPS, cls.LOADS, ensure_ascii=False,
+        )
+        cls._codecs = {codec.content_type: codec for codec in cls.CODECS}
+        cls._codecs[cls._codec.content_type] = cls._codec
+        cls._executor_queues = {
+            THREAD: ExecutorQueue(cls.EXECUTOR_QUEUE_SIZE),
+            PROCESS: ExecutorQueue(cls.EXECUTOR_QUEUE_SIZE),
+        }
+        cls._has_rate_limits = bool(
+            cls.RATE_LIMITER is not None or cls.METHOD_RATE_LIMITERS,
+        )
+        cls._notifications = None
+        if cls.NOTIFICATION_QUEUE_SIZE is not None:
+            cls._notifications = NotificationQueue(
+                cls.NOTIFICATION_QUEUE_SIZE, cls.NOTIFICATION_WORKERS,
+            )
+
+    @classmethod
+    async def drain_notifications(cls, app: Any = None) -> None:
+        """ Processes queued notifications, must be connected to the
+        ``app.on_shutdown`` signal for the graceful shutdown """
+        if cls._notifications is not None:
+            await cls._notifications.drain(cls.NOTIFICATION_DRAIN_TIMEOUT)
+
+    @classmethod
+    def _build_dispatch_table(cls) -> Dict[str, RPCMethod]:
+        table = {}
+        prefix = cls.METHOD_PREFIX
+
+        for attribute in dir(cls):
+            if not attribute.startswith(prefix):
+                continue
+
+            func = getattr(cls, attribute)
+            if not callable(func):
+                continue
+
+            name = attribute[len(prefix):]
+            static = inspect.getattr_static(cls, attribute)
+            table[name] = RPCMethod(
+                name, func,
+                # staticmethods, classmethods and callable objects which
+                # are not descriptors must not receive the view instance,
+                # while functions wrapped by e.g. lru_cache must
+                bound=(
+                    not isinstance(static, (staticmethod, classmethod)) and
+                    hasattr(type(static), "__get__")
+                ),
+            )
+
+        return table
 
     async def post(self):
+        timeout = parse_timeout(self.request.headers.get(TIMEOUT_HEADER))
+
+        if timeout is None and self.DISCONNECT_CHECK_INTERVAL is None:
+            return await self._post()
+
+        with deadline(timeout), self._watch_disconnection():
+            return await self._post()
+
+    @contextmanager
+    def _watch_disconnection(self) -> Iterator[None]:
+        interval = self.DISCONNECT_CHECK_INTERVAL
+        if interval is None:
+            yield
+            return
+
+        loop = asyncio.get_event_loop()
+        task = asyncio.current_task()
+        handle = None
+
+        def check():
+            nonlocal handle
+            transport = self.request.transport
+
+            if transport is None or transport.is_closing():
+                log.info("Client disconnected, cancelling the request")
+                task.cancel()
+                return
+
+            handle = loop.call_later(interval, check)
+
+        handle = loop.call_later(interval, check)
+        try:
+            yield
+        finally:
+            handle.cancel()
+
+    async def _post(self):
         await self.authorize()
 
-        body: bytes = await self.request.read()
-        json_request: JSONRPCBody = self._parse_body(body)
-        batch_mode = False
+        codec = self._request_codec() or self._codec
+        response_codec = self._response_codec(codec)
+        scanner = self._create_scanner(codec)
 
-        if isinstance(json_request, dict):
-            requests = [json_request]
-        elif isinstance(json_request, list):
-            requests = json_request
-            batch_mode = True
-        else:
+        if scanner is not None and scanner.collect:
+            return await self._post_streaming(scanner, codec, response_codec)
+
+        try:
+            body: bytes = await self._read_body(scanner)
+        except exceptions.InvalidData as e:
+            return self._make_response(
+                self._format_error(e, None), codec=response_codec,
+            )
+
+        metrics = self.METRICS
+        if metrics is not None:
+            return await self._post_instrumented(
+                metrics, body, codec, response_codec,
+            )
+
+        json_request: JSONRPCBody = await self._decode_body(body, codec)
+
+        if not isinstance(json_request, (dict, list)):
             raise HTTPBadRequest
 
-        results = await asyncio.gather(
-            *[self._handle(request) for request in requests]
+        self._check_notifications(json_request)
+
+        if (
+            isinstance(json_request, dict) and
+            self._is_stream_items(json_request, response_codec)
+        ):
+            return await self._stream_items(json_request, response_codec)
+
+        if (
+            isinstance(json_request, list) and
+            self._is_stream_response(response_codec) and
+            not self._exceeds_batch_size(json_request)
+        ):
+            return await self._stream_batch(
+                self._iter_list(json_request), response_codec,
+            )
+
+        return await self._compress_response(
+            await self._encode_response(
+                await self._execute(json_request), response_codec,
+            ),
         )
 
-        if batch_mode:
-            return self._make_response(list(filter(None, results)))
+    def _create_scanner(self, codec: Codec) -> Optional[JSONScanner]:
+        if not codec.streamable:
+            return None
+
+        if (
+            self.MAX_DEPTH is None and
+            self.MAX_BATCH_SIZE is None and
+            not self.STREAM_BATCH
+        ):
+            return None
+
+        return JSONScanner(
+            max_depth=self.MAX_DEPTH,
+            max_items=self.MAX_BATCH_SIZE,
+            collect=self.STREAM_BATCH,
+        )
+
+    async def _iter_body(self) -> AsyncIterator[bytes]:
+        limit = self.MAX_BODY_SIZE
+        if limit is None:
+            # aiohttp has no public accessor of this setting
+            limit = getattr(self.request, "_client_max_size", None)
+
+        size = self.request.content_length
+        if limit and size is not None and size > limit:
+            raise HTTPRequestEntityTooLarge(max_size=limit, actual_size=size)
+
+        size = 0
+        async for chunk in self.request.content.iter_any():
+            size += len(chunk)
+            if limit and size > limit:
+                raise HTTPRequestEntityTooLarge(
+                    max_size=limit, actual_size=size,
+                )
+            yield chunk
+
+    async def _read_body(self, scanner: Optional[JSONScanner] = None) -> bytes:
+        if scanner is None and self.MAX_BODY_SIZE is None:
+            return await self.request.read()
+
+        chunks = []
+
+        try:
+            async for chunk in self._iter_body():
+                if scanner is not None:
+                    scanner.feed(chunk)
+                chunks.append(chunk)
+
+            if scanner is not None:
+                scanner.close()
+        except ValueError:
+            raise HTTPBadRequest
+
+        return b"".join(chunks)
+
+    async def _post_streaming(
+        self, scanner: JSONScanner, codec: Codec, response_codec: Codec,
+    ):
+        if self._is_stream_response(response_codec):
+            return await self._stream_batch(
+                self._iter_requests(scanner, codec), response_codec, scanner,
+            )
+
+        try:
+            results = await self._execute_stream(
+                self._iter_requests(scanner, codec),
+            )
+        except exceptions.InvalidData as e:
+            return self._make_response(
+                self._format_error(e, None), codec=response_codec,
+            )
+        except ValueError:
+            raise HTTPBadRequest
+
+        metrics = self.METRICS
+        if metrics is not None:
+            metrics.observe_request_size(scanner.size)
+            if scanner.batch:
+                metrics.observe_batch(scanner.items)
+
+        if scanner.batch:
+            json_response = list(filter(None, results))
+        else:
+            json_response = results[0]
+
+        return await self._compress_response(
+            await self._encode_response(json_response, response_codec),
+        )
+
+    async def _iter_requests(
+        self, scanner: JSONScanner, codec: Codec,
+    ) -> AsyncIterator[JSONRPCRequest]:
+        async for chunk in self._iter_body():
+            for element in scanner.feed(chunk):
+                yield codec.loads(element)
+
+        for element in scanner.close():
+            # The single request, it is not a batch
+            json_request = codec.loads(element)
+            if not isinstance(json_request, dict):
+                raise HTTPBadRequest
+            yield json_request
+
+    async def _execute_stream(
+        self, requests: AsyncIterator[JSONRPCRequest],
+    ) -> List[Optional[JSONRPCResponse]]:
+        """ Executes calls while the next ones are being received,
+        the reading is paused while ``BATCH_CONCURRENCY`` calls
+        are in progress """
+        results: List[Optional[JSONRPCResponse]] = []
+        tasks = set()
+        semaphore = None
+
+        if self.BATCH_CONCURRENCY is not None:
+            semaphore = asyncio.Semaphore(self.BATCH_CONCURRENCY)
+
+        async def execute(idx: int, handling: Awaitable[Any]):
+            try:
+                results[idx] = await handling
+            finally:
+                if semaphore is not None:
+                    semaphore.release()
+
+        try:
+            async for request in requests:
+                idx = len(results)
+                results.append(None)
+
+                response = None
+                if self._is_inline(request):
+                    response = await self._handle(request, defer=True)
+                    if response.__class__ is not _PendingCall:
+                        results[idx] = response
+                        continue
+
+                if semaphore is not None:
+                    await semaphore.acquire()
+
+                if response is None:
+                    handling = self._handle(request)
+                else:
+                    handling = self._handle_pending(response)
+
+                task = asyncio.ensure_future(execute(idx, handling))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+
+            if tasks:
+                await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+
+        return results
+
+    def _is_stream_response(self, codec: Codec) -> bool:
+        # Metrics of the response phases would be meaningless
+        return (
+            self.STREAM_RESPONSE and
+            codec.streamable and
+            self.METRICS is None
+        )
+
+    @staticmethod
+    async def _iter_list(
+        requests: List[JSONRPCRequest],
+    ) -> AsyncIterator[JSONRPCRequest]:
+        for request in requests:
+            yield request
+
+    async def _stream_batch(
+        self, requests: AsyncIterator[JSONRPCRequest], codec: Codec,
+        scanner: Optional[JSONScanner] = None,
+    ) -> StreamResponse:
+        """ Writes responses as a JSON array in the order of the calls.
+
+        At most ``BATCH_CONCURRENCY`` calls are executed or wait to
+        be written at once, so the memory is held by the window of
+        the batch only and written responses are released.
+        """
+        window: asyncio.Queue = asyncio.Queue()
+        semaphore = None
+        if self.BATCH_CONCURRENCY is not None:
+            semaphore = asyncio.Semaphore(self.BATCH_CONCURRENCY)
+
+        producer = asyncio.ensure_future(
+            self._schedule(requests, window, semaphore),
+        )
+
+        writer = self._create_stream_writer(codec.content_type_header)
+        separator = b"["
+
+        try:
+            while True:
+                if window.empty():
+                    # Nothing is ready, so send what we have
+                    await writer.flush()
+                    item = await window.get()
+                else:
+                    item = window.get_nowait()
+
+                if item is _END:
+                    break
+
+                if isinstance(item, asyncio.Future):
+                    if not item.done():
+                        await writer.flush()
+                    item = await item
+
+                if semaphore is not None:
+                    semaphore.release()
+
+                if scanner is not None and not scanner.batch:
+                    # The single request, it is not a batch
+                    await producer
+                    return await self._compress_response(
+                        self._make_response(item, codec=codec),
+                    )
+
+                if item is None:
+                    continue
+
+                if writer.append(separator + self._build_json(item, codec)):
+                    await writer.flush()
+                separator = b","
+
+            await producer
+        except (exceptions.JSONRPCError, ValueError, HTTPException) as e:
+            if not writer.prepared:
+                if isinstance(e, exceptions.JSONRPCError):
+                    return self._make_response(
+                        self._format_error(e, None), codec=codec,
+                    )
+                if isinstance(e, ValueError):
+                    raise HTTPBadRequest
+                raise
+
+            # Headers are sent already, so the error is the last response
+            if not isinstance(e, exceptions.JSONRPCError):
+                e = exceptions.InvalidData(
+                    e.text if isinstance(e, HTTPException) else str(e),
+                )
+
+            error = self._build_json(self._format_error(e, None), codec)
+            writer.append(separator + error)
+            separator = b","
+        finally:
+            producer.cancel()
+            while not window.empty():
+                item = window.get_nowait()
+                if isinstance(item, asyncio.Future):
+                    item.cancel()
+
+        writer.append(b"[]" if separator == b"[" else b"]")
+        await writer.close()
+        return writer.response
+
+    async def _schedule(
+        self, requests: AsyncIterator[JSONRPCRequest], window: asyncio.Queue,
+        semaphore: Optional[asyncio.Semaphore],
+    ):
+        try:
+            async for request in requests:
+                # Released by the writer when the response is written
+                if semaphore is not None:
+                    await semaphore.acquire()
+
+                if not self._is_inline(request):
+                    window.put_nowait(
+                        asyncio.ensure_future(self._handle(request)),
+                    )
+                    continue
+
+                response = await self._handle(request, defer=True)
+                if response.__class__ is _PendingCall:
+                    response = asyncio.ensure_future(
+                        self._handle_pending(response),
+                    )
+                window.put_nowait(response)
+        finally:
+            window.put_nowait(_END)
+
+    def _create_stream_writer(self, content_type: str) -> "_ChunkWriter":
+        encoding = None
+        response = StreamResponse(headers={"Content-Type": content_type})
+
+        if self.COMPRESSION_THRESHOLD is not None:
+            encoding = compression.negotiate(
+                self.request.headers.get("Accept-Encoding"),
+                [
+                    encoding for encoding in self.COMPRESSION_ENCODINGS
+                    if encoding in compression.STREAM_ENCODINGS
+                ],
+            )
+            response.headers.add("Vary", "Accept-Encoding")
+
+        return _ChunkWriter(
+            self.request, response, self.STREAM_CHUNK_SIZE, encoding,
+        )
+
+    def _is_stream_items(
+        self, json_request: JSONRPCRequest, codec: Codec,
+    ) -> bool:
+        if "id" not in json_request or not codec.streamable:
+            return False
+
+        try:
+            method = self._methods[json_request["method"]]
+        except (KeyError, TypeError):
+            return False
+
+        if (
+            not method.is_generator or
+            method.executor is not None or
+            method.cache is not None
+        ):
+            return False
+
+        return NDJSON_CONTENT_TYPE in self.request.headers.get("Accept", "")
+
+    async def _stream_items(
+        self, json_request: JSONRPCRequest, codec: Codec,
+    ) -> StreamResponse:
+        """ Streams items of the generator method as NDJSON.
+
+        Every item is sent as the ``{"item": ...}`` line, the last line
+        is the regular JSON-RPC response, its result is the number of
+        items, or the error raised by the generator.
+        """
+        if self._has_rate_limits:
+            exception = await self._check_rate_limits(json_request)
+            if exception is not None:
+                return self._make_response(
+                    self._reject_call(json_request, exception), codec=codec,
+                )
+
+        limiter = self.CONCURRENCY_LIMITER
+        if limiter is None:
+            return await self._write_items(json_request, codec)
+
+        method = self._methods[json_request["method"]]
+        if not limiter.acquire(method.priority):
+            return self._make_response(
+                self._reject_call(
+                    json_request, self._overloaded(method, limiter),
+                ),
+                codec=codec,
+            )
+
+        try:
+            return await self._write_items(json_request, codec)
+        finally:
+            limiter.discard()
+
+    async def _write_items(
+        self, json_request: JSONRPCRequest, codec: Codec,
+    ) -> StreamResponse:
+        request_id = json_request["id"]
+        method = self._methods[json_request["method"]]
+        log.info("RPC Call: %s => %s", method.name, method.target)
+
+        try:
+            args, kwargs = self._parse_params(json_request)
+            items = method(self, *args, **kwargs)
+        except Exception as e:
+            return self._make_response(
+                self._format_error(e, request_id), codec=codec,
+            )
+
+        writer = self._create_stream_writer(NDJSON_CONTENT_TYPE)
+
+        stop = asyncio.Event()
+        flusher = None
+        if method.is_async_generator:
+            flusher = asyncio.ensure_future(
+                writer.flush_periodically(stop, self.STREAM_FLUSH_INTERVAL),
+            )
+
+        try:
+            # Items are written within CALL_TIMEOUT and the deadline
+            count = await self._await_result(
+                method, self._write_all(method, items, writer, codec),
+            )
+            final = self._format_success(count, request_id)
+        except (ConnectionError, asyncio.CancelledError):
+            raise
+        except Exception as e:
+            final = self._format_error(e, request_id)
+        finally:
+            stop.set()
+            if flusher is not None:
+                await flusher
+            if method.is_async_generator:
+                await items.aclose()
+            else:
+                items.close()
+
+        writer.append(self._build_json(final, codec) + b"\n")
+        await writer.close()
+        return writer.response
+
+    async def _write_all(
+        self, method: RPCMethod, items: Any, writer: "_ChunkWriter",
+        codec: Codec,
+    ) -> int:
+        count = 0
+
+        if method.is_async_generator:
+            async for item in items:
+                count += 1
+                if writer.append(self._build_item(item, codec)):
+                    await writer.flush()
         else:
-            return self._make_response(results[0])
+            for item in items:
+                count += 1
+                if writer.append(self._build_item(item, codec)):
+                    await writer.flush()
+
+        return count
+
+    @staticmethod
+    def _build_item(item: Any, codec: Codec) -> bytes:
+        return b'{"item":' + codec.dumps(item) + b"}\n"
+
+    async def _post_instrumented(
+        self, metrics: Metrics, body: bytes, codec: Codec,
+        response_codec: Codec,
+    ):
+        metrics.observe_request_size(len(body))
+
+        started = time.perf_counter()
+        json_request: JSONRPCBody = await self._decode_body(body, codec)
+        parsed = time.perf_counter()
+        metrics.observe_phase("parse", parsed - started)
+
+        if isinstance(json_request, list):
+            metrics.observe_batch(len(json_request))
+        elif not isinstance(json_request, dict):
+            raise HTTPBadRequest
+
+        self._check_notifications(json_request)
+
+        json_response = await self._execute(json_request)
+        executed = time.perf_counter()
+        metrics.observe_phase("execute", executed - parsed)
+
+        response = await self._compress_response(
+            await self._encode_response(json_response, response_codec),
+        )
+        metrics.observe_phase("serialize", time.perf_counter() - executed)
+        metrics.observe_response_size(len(response.body))
+        return response
+
+    async def _compress_response(self, response: Response) -> Response:
+        body = response.body
+
+        if self.COMPRESSION_THRESHOLD is None or not body:
+            return response
+
+        # The encoding depends on the request, compressed or not
+        response.headers.add("Vary", "Accept-Encoding")
+
+        if len(body) < self.COMPRESSION_THRESHOLD:
+            return response
+
+        encoding = compression.negotiate(
+            self.request.headers.get("Accept-Encoding"),
+            self.COMPRESSION_ENCODINGS,
+        )
+
+        if encoding is None:
+            return response
+
+        response.body = await compression.compress_async(
+            encoding, body,
+            executor_threshold=self.COMPRESSION_EXECUTOR_THRESHOLD,
+            executor=self.THREAD_POOL or get_default_pool(THREAD),
+        )
+        response.headers["Content-Encoding"] = encoding
+        return response
+
+    async def _execute(self, json_request: JSONRPCBody) -> Any:
+        if isinstance(json_request, dict):
+            return await self._handle(json_request)
+
+        if self._exceeds_batch_size(json_request):
+            return self._reject_batch(
+                json_request,
+                exceptions.InvalidData(
+                    "Batch size %d exceeds the limit %d" % (
+                        len(json_request), self.MAX_BATCH_SIZE,
+                    ),
+                ),
+            )
+
+        results = await self._execute_batch(json_request)
+        return list(filter(None, results))
+
+    def _exceeds_batch_size(self, requests: List[JSONRPCRequest]) -> bool:
+        return (
+            self.MAX_BATCH_SIZE is not None and
+            len(requests) > self.MAX_BATCH_SIZE
+        )
+
+    def _reject_batch(
+        self, requests: List[JSONRPCRequest], exception: Exception,
+    ) -> Any:
+        return self._format_error(exception, None)
+
+    async def _execute_batch(
+        self, requests: List[JSONRPCRequest],
+    ) -> List[Optional[JSONRPCResponse]]:
+        results: List[Optional[JSONRPCResponse]] = [None] * len(requests)
+        pending = []
+
+        for idx, request in enumerate(requests):
+            if not self._is_inline(request):
+                pending.append((idx, request))
+                continue
+
+            # Nothing to wait for, so there is no reason to create a task,
+            # unless the method returned an awaitable after all
+            response = await self._handle(request, defer=True)
+            if response.__class__ is _PendingCall:
+                pending.append((idx, response))
+            else:
+                results[idx] = response
+
+        if not pending:
+            return results
+
+        iterator = iter(pending)
+
+        async def worker():
+            for idx, request in iterator:
+                if request.__class__ is _PendingCall:
+                    results[idx] = await self._handle_pending(request)
+                else:
+                    results[idx] = await self._handle(request)
+
+        workers = len(pending)
+        if self.BATCH_CONCURRENCY is not None:
+            workers = min(workers, self.BATCH_CONCURRENCY)
+
+        await asyncio.gather(*[worker() for _ in range(workers)])
+        return results
+
+    def _is_inline(self, json_request: JSONRPCRequest) -> bool:
+        try:
+            method = self._methods[json_request["method"]]
+        except (KeyError, TypeError):
+            # Will be failed without awaiting anything
+            return True
+
+        return method.inline
+
+    def _request_codec(self) -> Optional[Codec]:
+        codec = self._codecs.get(self.request.content_type)
+        if codec is not None:
+            return codec
+
+        # Any JSON flavored Content-Type is accepted as before
+        if "json" in self.request.headers.get("Content-Type", ""):
+            return self._codec
+
+        return None
+
+    def _response_codec(self, codec: Codec) -> Codec:
+        """ Selects the codec of the response by the ``Accept`` header,
+        the codec of the request is preferred when it is acceptable """
+        accept = self.request.headers.get("Accept")
+        if not accept:
+            return codec
+
+        accepted = [
+            item.partition(";")[0].strip().lower()
+            for item in accept.split(",")
+        ]
+
+        if codec.content_type in accepted:
+            return codec
+
+        for media_type in accepted:
+            if media_type in self._codecs:
+                return self._codecs[media_type]
+
+        return codec
 
     @classmethod
-    def _make_response(cls, json_response, status: int = None, reason=None):
+    def _make_response(
+        cls, json_response, status: int = None, reason=None,
+        codec: Optional[Codec] = None,
+    ):
+        codec = codec or cls._codec
         log.debug("Sending response:\n%r", json_response)
 
         if json_response is None:
@@ -58,22 +1063,65 @@ class JSONRPCView(View):
         return Response(
             status=status or 200,
             reason=reason,
-            body=cls._build_json(json_response),
-            headers={"Content-Type": "application/json; charset=utf-8"},
+            body=cls._build_json(json_response, codec),
+            headers={"Content-Type": codec.content_type_header},
+        )
+
+    async def _decode_body(self, body: bytes, codec: Codec) -> JSONRPCBody:
+        threshold = self.CODEC_EXECUTOR_THRESHOLD
+
+        if threshold is None or len(body) < threshold:
+            return self._parse_body(body, codec)
+
+        try:
+            return await loads_async(
+                codec, body, executor_threshold=threshold,
+                executor=self.PROCESS_POOL or get_default_pool(PROCESS),
+            )
+        except ValueError:
+            raise HTTPBadRequest
+
+    async def _encode_response(
+        self, json_response: Any, codec: Codec,
+    ) -> Response:
+        if (
+            self.CODEC_EXECUTOR_THRESHOLD is None or
+            not isinstance(json_response, list) or
+            # Cached results are encoded already
+            self._has_cache and any(
+                self._is_encoded(item, codec) for item in json_response
+            )
+        ):
+            return self._make_response(json_response, codec=codec)
+
+        log.debug("Sending response:\n%r", json_response)
+        return Response(
+            body=await dumps_batch_async(
+                codec, json_response,
+                executor_threshold=self.CODEC_EXECUTOR_THRESHOLD,
+                executor=self.PROCESS_POOL or get_default_pool(PROCESS),
+            ),
+            headers={"Content-Type": codec.content_type_header},
         )
 
-    def _parse_body(self, body) -> JSONRPCBody:
+    def _parse_body(self, body, codec: Optional[Codec] = None) -> JSONRPCBody:
         try:
-            return self._parse_json(body)
+            return self._parse_json(body, codec)
         except ValueError:
             raise HTTPBadRequest
 
-    def _lookup_method(self, method_name):
-        method = getattr(
+    def _lookup_method(self, method_name: str) -> RPCMethod:
+        try:
+            return self._methods[method_name]
+        except (KeyError, TypeError):
+            pass
+
+        # Slow path for methods which are assigned to the instance
+        func = getattr(
             self, "{0}{1}".format(self.METHOD_PREFIX, method_name), None,
         )
 
-        if not callable(method):
+        if not callable(func):
             log.warning(
                 "Can't find method %s%s in %r",
                 self.METHOD_PREFIX,
@@ -84,45 +1132,352 @@ class JSONRPCView(View):
             raise exceptions.ApplicationError(
                 "Method %r not found" % method_name,
             )
-        return method
+        return RPCMethod(method_name, func, bound=False)
 
     async def authorize(self):
-        if "json" not in self.request.headers.get("Content-Type", ""):
+        if self._request_codec() is None:
             raise HTTPBadRequest
 
-    async def _handle(self, json_request: JSONRPCRequest):
+    async def get_client_id(self) -> Hashable:
+        """ Identity of the caller for rate limits, might be overridden
+        to take it from the credentials checked by ``authorize`` """
+        if self.CLIENT_ID_HEADER is not None:
+            client_id = self.request.headers.get(self.CLIENT_ID_HEADER)
+            if client_id:
+                return client_id
+        return self.request.remote
+
+    def _check_notifications(self, json_request: JSONRPCBody) -> None:
+        """ Rejects the request when its notifications do not fit into
+        the queue now. The request with more notifications than the whole
+        queue would never fit, so the overflow is processed in place """
+        queue = self._notifications
+        if queue is None:
+            return
+
+        requests = json_request if isinstance(json_request, list) else [
+            json_request,
+        ]
+        count = sum(
+            1 for request in requests
+            if isinstance(request, dict) and "id" not in request
+        )
+
+        if queue.free < count <= queue.size:
+            exception = (
+                HTTPTooManyRequests
+                if self.NOTIFICATION_OVERLOAD_STATUS == 429
+                else HTTPServiceUnavailable
+            )
+            raise exception(
+                text="Notification queue is full",
+                headers={"Retry-After": "1"},
+            )
+
+    async def _handle(
+        self, json_request: JSONRPCRequest, defer: bool = False,
+    ):
+        """ Handles the single call. With ``defer`` the inline method
+        returning an awaitable is not awaited, the :class:`_PendingCall`
+        is returned to be finished by ``_handle_pending`` concurrently
+        with other calls """
+        if self._has_rate_limits and isinstance(json_request, dict):
+            exception = await self._check_rate_limits(json_request)
+            if exception is not None:
+                return self._reject_call(json_request, exception)
+
+        if (
+            self._notifications is not None and
+            isinstance(json_request, dict) and
+            "id" not in json_request and
+            self._notifications.put_nowait(
+                partial(self._handle_call, json_request),
+            )
+        ):
+            return None
+
+        # The notification is processed in place when the queue is full
+        if not self._is_inline(json_request):
+            if self.CONCURRENCY_LIMITER is None:
+                return await self._handle_call(json_request)
+
+            return await self._handle_limited(
+                self.CONCURRENCY_LIMITER, json_request,
+            )
+
+        response = self._start_call(json_request)
+        if defer or response.__class__ is not _PendingCall:
+            return response
+        return await self._handle_pending(response)
+
+    async def _handle_pending(self, pending: "_PendingCall"):
+        """ Finishes the call of the inline method which returned
+        an awaitable, like the call of any coroutine method """
+        if self.CONCURRENCY_LIMITER is None:
+            return await self._finish_call(pending)
+
+        return await self._handle_limited(
+            self.CONCURRENCY_LIMITER, pending.json_request, pending,
+        )
+
+    async def _handle_limited(
+        self, limiter: AdaptiveLimiter, json_request: JSONRPCRequest,
+        pending: Optional["_PendingCall"] = None,
+    ):
+        method = self._methods[json_request["method"]]
+
+        if not limiter.acquire(method.priority):
+            if pending is not None:
+                pending.discard()
+            return self._reject_call(
+                json_request, self._overloaded(method, limiter),
+            )
+
+        latency = None
+        started = time.monotonic()
+
+        try:
+            if pending is None:
+                response = await self._handle_call(json_request)
+            else:
+                response = await self._finish_call(pending)
+
+            if not (
+                response and "error" in response and
+                response["error"].get("code") == exceptions.CallTimeout.code
+            ):
+                latency = time.monotonic() - started
+
+            return response
+        finally:
+            limiter.release(latency)
+
+    @staticmethod
+    def _overloaded(
+        method: RPCMethod, limiter: AdaptiveLimiter,
+    ) -> exceptions.Overloaded:
+        return exceptions.Overloaded(
+            "Server is overloaded, call of %r is rejected" % method.name,
+            retry_after=limiter.retry_after,
+        )
+
+    async def _check_rate_limits(
+        self, json_request: JSONRPCRequest,
+    ) -> Optional[exceptions.RateLimited]:
+        if self._client_id is _MISSING:
+            # Taken once, the view serves the single request or connection
+            self._client_id = await self.get_client_id()
+
+        method_name = json_request.get("method")
+        limiter = None
+        if isinstance(method_name, str):
+            limiter = self.METHOD_RATE_LIMITERS.get(method_name)
+
+        wait = 0.
+        if limiter is not None:
+            wait = limiter.take(self._client_id)
+        if not wait and self.RATE_LIMITER is not None:
+            wait = self.RATE_LIMITER.take(self._client_id)
+
+        if not wait:
+            return None
+
+        return exceptions.RateLimited(
+            "Rate limit of the call %r is exceeded" % method_name,
+            retry_after=round(wait, 3),
+        )
+
+    def _reject_call(
+        self, json_request: JSONRPCRequest, exception: exceptions.Overloaded,
+    ):
+        method_name = json_request.get("method")
+        if not isinstance(method_name, str) or method_name not in self._methods:
+            method_name = UNKNOWN_METHOD
+
+        log.info("Call of %r is rejected: %s", method_name, exception)
+
+        if self.METRICS is not None:
+            self.METRICS.observe_call(method_name, 0, exception.code)
+
+        if "id" not in json_request:
+            return None
+        return self._format_error(exception, json_request.get("id"))
+
+    async def _handle_call(self, json_request: JSONRPCRequest):
+        response = self._start_call(json_request)
+        if response.__class__ is _PendingCall:
+            return await self._finish_call(response)
+        return response
+
+    def _start_call(self, json_request: JSONRPCRequest):
+        """ Calls the method, returns the response or
+        the :class:`_PendingCall` when the result should be awaited """
+        if not isinstance(json_request, dict):
+            return self._format_error(
+                exceptions.InvalidData("Request must be an object"), None,
+            )
+
         request_id = json_request.get("id")
+        started = time.perf_counter() if self.METRICS is not None else 0.
+        method = None
 
         try:
             method_name = json_request["method"]
             method = self._lookup_method(method_name)
 
-            log.info(
-                "RPC Call: %s => %s.%s.%s",
-                method_name,
-                method.__module__,
-                method.__class__.__name__,
-                method.__name__,
-            )
-
-            params = json_request.get("params")
+            log.info("RPC Call: %s => %s", method_name, method.target)
 
-            args = []
-            kwargs = {}
+            budget = remaining()
+            if budget is not None and budget <= 0:
+                raise exceptions.CallTimeout(
+                    "Deadline of the call %r is exceeded" % method_name,
+                )
 
-            if isinstance(params, list):
-                args = params
-            elif isinstance(params, dict):
-                kwargs = params
+            args, kwargs = self._parse_params(json_request)
 
-            result = await awaitable(method)(*args, **kwargs)
+            result = self._call(method, args, kwargs)
+            if (
+                hasattr(result, "__await__") or
+                isinstance(result, AsyncGeneratorType)
+            ):
+                return _PendingCall(json_request, method, result, started)
 
             if "id" not in json_request:
-                return None
+                response = None
+            else:
+                response = self._format_success(result, request_id)
+        except Exception as e:
+            response = self._format_error(e, request_id)
+
+        self._observe_call(method, started, response)
+        return response
 
-            return self._format_success(result, request_id)
+    async def _finish_call(self, pending: "_PendingCall"):
+        json_request = pending.json_request
+        request_id = json_request.get("id")
+        method = pending.method
+
+        try:
+            result = pending.result
+            if isinstance(result, AsyncGeneratorType):
+                result = self._collect(result)
+            result = await self._await_result(method, result)
+
+            if "id" not in json_request:
+                response = None
+            else:
+                response = self._format_success(result, request_id)
         except Exception as e:
-            return self._format_error(e, request_id)
+            response = self._format_error(e, request_id)
+
+        self._observe_call(method, pending.started, response)
+        return response
+
+    def _observe_call(
+        self, method: Optional[RPCMethod], started: float,
+        response: Optional[JSONRPCResponse],
+    ) -> None:
+        if self.METRICS is None:
+            return
+
+        self.METRICS.observe_call(
+            method.name if method is not None else UNKNOWN_METHOD,
+            time.perf_counter() - started,
+            response["error"]["code"]
+            if response and "error" in response else None,
+        )
+
+    @staticmethod
+    def _parse_params(
+        json_request: JSONRPCRequest,
+    ) -> Tuple[List[Any], Dict[str, Any]]:
+        params = json_request.get("params")
+
+        if isinstance(params, list):
+            return params, {}
+        if isinstance(params, dict):
+            return [], params
+        return [], {}
+
+    def _call(
+        self, method: RPCMethod, args: List[Any], kwargs: Dict[str, Any],
+    ) -> Any:
+        """ Returns the result of the method or an awaitable of it """
+        if method.cache is not None:
+            return self._call_cached(method, args, kwargs)
+        return self._call_uncached(method, args, kwargs)
+
+    def _call_uncached(
+        self, method: RPCMethod, args: List[Any], kwargs: Dict[str, Any],
+    ) -> Any:
+        if method.executor is not None:
+            return self._call_in_executor(method, args, kwargs)
+        return method(self, *args, **kwargs)
+
+    async def _call_cached(
+        self, method: RPCMethod, args: List[Any], kwargs: Dict[str, Any],
+    ) -> Any:
+        key = method.cache.make_key(method, args, kwargs)
+
+        async def execute():
+            result = self._call_uncached(method, args, kwargs)
+            if hasattr(result, "__await__"):
+                result = await result
+            elif isinstance(result, AsyncGeneratorType):
+                result = [item async for item in result]
+            return EncodedResult(result, self._codec.dumps(result), self._codec)
+
+        if key is None:
+            # Arguments do not match the signature, so the call will fail
+            return await execute()
+
+        return await method.cache.get_or_call(key, execute)
+
+    def _call_in_executor(
+        self, method: RPCMethod, args: List[Any], kwargs: Dict[str, Any],
+    ):
+        queue = self._executor_queues[method.executor]
+
+        if method.executor == PROCESS:
+            return queue.run(
+                self.PROCESS_POOL or get_default_pool(PROCESS),
+                call_pickled, pickle_call(method.func, args, kwargs),
+            )
+
+        return queue.run(
+            self.THREAD_POOL or get_default_pool(THREAD),
+            partial(
+                contextvars.copy_context().run, method, self, *args, **kwargs
+            ),
+        )
+
+    @staticmethod
+    async def _collect(generator: AsyncIterator[Any]) -> List[Any]:
+        return [item async for item in generator]
+
+    async def _await_result(self, method: RPCMethod, result: Any) -> Any:
+        timeout = self.CALL_TIMEOUT
+        budget = remaining()
+
+        if budget is not None and (timeout is None or budget < timeout):
+            try:
+                return await asyncio.wait_for(result, max(budget, 0))
+            except asyncio.TimeoutError:
+                raise exceptions.CallTimeout(
+                    "Deadline of the call %r is exceeded" % method.name,
+                )
+
+        if timeout is None:
+            return await result
+
+        try:
+            return await asyncio.wait_for(result, timeout)
+        except asyncio.TimeoutError:
+            raise exceptions.CallTimeout(
+                "Method %r timed out after %s seconds" % (
+                    method.name, timeout,
+                ),
+            )
 
     @staticmethod
     def _format_success(result, request_id: Union[str, int]):
@@ -143,9 +1498,122 @@ class JSONRPCView(View):
         )
 
     @classmethod
-    def _parse_json(cls, json_string):
-        return cls.LOADS(json_string.decode())
+    def _parse_json(cls, body: bytes, codec: Optional[Codec] = None) -> Any:
+        return (codec or cls._codec).loads(body)
 
     @classmethod
-    def _build_json(cls, data):
-        return cls.DUMPS(py2json(data), ensure_ascii=False)
+    def _build_json(cls, data: Any, codec: Optional[Codec] = None) -> bytes:
+        codec = codec or cls._codec
+
+        if not cls._has_cache:
+            return codec.dumps(data)
+
+        if isinstance(data, list):
+            if any(cls._is_encoded(item, codec) for item in data):
+                return codec.dumps_batch(
+                    cls._build_json(item, codec) for item in data
+                )
+        elif cls._is_encoded(data, codec):
+            return codec.dumps_result(data["id"], data["result"].data)
+
+        return codec.dumps(data)
+
+    @classmethod
+    def _is_encoded(
+        cls, response: JSONRPCResponse, codec: Optional[Codec] = None,
+    ) -> bool:
+        result = response.get("result")
+        return (
+            isinstance(result, EncodedResult) and
+            result.codec is (codec or cls._codec)
+        )
+
+
+class JSONRPCWebSocketView(JSONRPCView):
+    """ Serves JSON-RPC calls over the persistent WebSocket connection.
+
+    Every message is a single call or a batch, responses are sent back
+    as they are ready, so many calls can be in-flight concurrently and
+    are matched by the ``id`` on the client side. POST requests are
+    still handled like in the :class:`JSONRPCView`.
+    """
+
+    # Interval of the WebSocket ping frames
+    HEARTBEAT: Optional[float] = 30
+    MAX_MESSAGE_SIZE = 4 * 1024 * 1024
+    # Maximum number of messages processed concurrently per connection,
+    # the next messages are not read until one of them is finished
+    MESSAGE_CONCURRENCY = 64
+
+    async def authorize(self):
+        # WebSocket handshake has no body so there is no Content-Type
+        if self.request.method == "POST":
+            await super().authorize()
+
+    async def get(self):
+        await self.authorize()
+
+        ws = WebSocketResponse(
+            heartbeat=self.HEARTBEAT, max_msg_size=self.MAX_MESSAGE_SIZE,
+        )
+        await ws.prepare(self.request)
+
+        tasks = set()
+
+        try:
+            async for message in ws:
+                if message.type == WSMsgType.TEXT:
+                    body = message.data.encode()
+                elif message.type == WSMsgType.BINARY:
+                    body = message.data
+                else:
+                    continue
+
+                if len(tasks) >= self.MESSAGE_CONCURRENCY:
+                    await asyncio.wait(
+                        tasks, return_when=asyncio.FIRST_COMPLETED,
+                    )
+
+                task = asyncio.ensure_future(self._handle_message(ws, body))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+        finally:
+            for task in tasks:
+                task.cancel()
+
+        return ws
+
+    async def _handle_message(self, ws: WebSocketResponse, body: bytes):
+        try:
+            json_request = self._parse_json(body)
+        except ValueError as e:
+            response = self._format_error(exceptions.ParseError(str(e)), None)
+        else:
+            if isinstance(json_request, (dict, list)):
+                response = await self._execute(json_request)
+            else:
+                response = self._format_error(
+                    exceptions.InvalidData("Request must be an object"),
+                    None,
+                )
+
+        if response is None or response == [] or ws.closed:
+            return
+
+        data = self._build_json(response)
+
+        if self._codec.charset:
+            await ws.send_str(data.decode(self._codec.charset))
+        else:
+            await ws.send_bytes(data)
+
+    def _reject_batch(
+        self, requests: List[JSONRPCRequest], exception: Exception,
+    ) -> Any:
+        # The client matches responses by id, so the error
+        # is reported for every call of the batch
+        return [
+            self._format_error(exception, request["id"])
+            for request in requests
+            if isinstance(request, dict) and "id" in request
+        ]
@@ -0,0 +1,92 @@
+import bisect
+import hashlib
+from typing import Any, Iterable, Iterator, List, Optional, Set
+
+
+def _hash(value: Any) -> int:
+    # The stable hash, unlike the builtin one it does not
+    # depend on the process and PYTHONHASHSEED
+    digest = hashlib.blake2b(str(value).encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big")
+
+
+class HashRing:
+    """ Consistent hash ring with virtual nodes.
+
+    Every node is placed on the ring ``vnodes`` times, the key belongs
+    to the first node clockwise from the hash of the key. So adding or
+    removing the node moves only about ``1 / len(nodes)`` of the keys,
+    and virtual nodes keep the keys spread evenly.
+    """
+
+    __slots__ = ("vnodes", "_points", "_nodes", "_members")
+
+    def __init__(self, nodes: Iterable[str] = (), vnodes: int = 160):
+        self.vnodes = vnodes
+        self._points: List[int] = []
+        self._nodes: List[str] = []
+        self._members: Set[str] = set()
+
+        for node in nodes:
+            self.add(node)
+
+    def __len__(self) -> int:
+        return len(self._members)
+
+    def __contains__(self, node: str) -> bool:
+        return node in self._members
+
+    def add(self, node: str) -> None:
+        if node in self._members:
+            return
+
+        self._members.add(node)
+        ring = list(zip(self._points, self._nodes))
+        ring.extend(
+            (_hash("{0}#{1}".format(node, idx)), node)
+            for idx in range(self.vnodes)
+        )
+        self._rebuild(ring)
+
+    def remove(self, node: str) -> None:
+        if node not in self._members:
+            return
+
+        self._members.discard(node)
+        self._rebuild(
+            item for item in zip(self._points, self._nodes)
+            if item[1] != node
+        )
+
+    def _rebuild(self, ring: Iterable) -> None:
+        ring = sorted(ring)
+        self._points = [point for point, _ in ring]
+        self._nodes = [node for _, node in ring]
+
+    def get(self, key: Any) -> Optional[str]:
+        """ Returns the node of the key """
+        return next(self.iterate(key), None)
+
+    def iterate(self, key: Any) -> Iterator[str]:
+        """ Yields distinct nodes clockwise starting from the node of
+        the key, the next ones take over keys of the unavailable node """
+        if not self._points:
+            return
+
+        start = bisect.bisect(self._points, _hash(key))
+        seen: Set[str] = set()
+        size = len(self._nodes)
+
+        for idx in range(start, start + size):
+            node = self._nodes[idx % size]
+            if node in seen:
+                continue
+
+            yield node
+            seen.add(node)
+
+            if len(seen) == len(self._members):
+                return
+
+
+__all__ = ("HashRing",)
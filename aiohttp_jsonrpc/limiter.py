@@ -0,0 +1,126 @@
+import math
+from typing import Any, Callable, Optional
+
+from .common import mark_method
+
+
+# Fractions of the concurrency limit which calls of the method might
+# occupy, so less important calls are rejected first under overload
+CRITICAL = 1.0
+HIGH = 0.9
+NORMAL = 0.8
+LOW = 0.5
+
+
+class AdaptiveLimiter:
+    """ Adaptive limit of concurrent calls (the gradient algorithm).
+
+    The limit grows while the latency of calls stays close to its long
+    term average and shrinks as soon as the latency rises above it
+    ``tolerance`` times, i.e. when calls start queueing somewhere. Calls
+    which are timed out or cancelled shrink the limit multiplicatively.
+
+    The call of the method having the ``priority`` share is admitted
+    while the number of calls in progress does not exceed
+    ``share * limit``, so one call is admitted at least.
+    """
+
+    __slots__ = (
+        "limit", "min_limit", "max_limit", "smoothing", "tolerance",
+        "long_window", "retry_after", "inflight", "_long_latency",
+    )
+
+    def __init__(
+        self, initial_limit: float = 20,
+        min_limit: float = 4,
+        max_limit: float = 1000,
+        smoothing: float = 0.2,
+        tolerance: float = 1.5,
+        long_window: int = 600,
+        retry_after: float = 1,
+    ):
+        if not 0 < min_limit <= initial_limit <= max_limit:
+            raise ValueError(
+                "min_limit <= initial_limit <= max_limit must be positive",
+            )
+
+        self.limit = float(initial_limit)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.smoothing = smoothing
+        self.tolerance = tolerance
+        self.long_window = long_window
+        # Hint for clients, how many seconds to wait before the retry
+        self.retry_after = retry_after
+
+        self.inflight = 0
+        self._long_latency: Optional[float] = None
+
+    def acquire(self, share: float = NORMAL) -> bool:
+        """ Returns False when the call must be rejected,
+        otherwise :meth:`release` must be called after it """
+        if self.inflight + 1 > max(1., self.limit * share):
+            return False
+
+        self.inflight += 1
+        return True
+
+    def release(self, latency: Optional[float]) -> None:
+        """ Takes the latency of the finished call into account,
+        None means the call has been dropped (timed out or cancelled) """
+        inflight = self.inflight
+        self.inflight -= 1
+
+        if latency is None:
+            self._set_limit(self.limit * 0.9)
+            return
+
+        if self._long_latency is None:
+            self._long_latency = latency
+        else:
+            self._long_latency += (
+                (latency - self._long_latency) / self.long_window
+            )
+
+        if inflight < self.limit / 2:
+            # The limit is not reached, so the latency says nothing about it
+            return
+
+        gradient = max(0.5, min(
+            1., self.tolerance * self._long_latency / max(latency, 1e-9),
+        ))
+        # The square root gives the room for growth
+        limit = self.limit * gradient + math.sqrt(self.limit)
+        self._set_limit(
+            self.limit * (1 - self.smoothing) + limit * self.smoothing,
+        )
+
+    def discard(self) -> None:
+        """ Releases the call without taking its latency into account,
+        e.g. the stream whose duration depends on the number of items """
+        self.inflight -= 1
+
+    def _set_limit(self, limit: float) -> None:
+        self.limit = min(self.max_limit, max(self.min_limit, limit))
+
+
+def priority(share: float) -> Callable:
+    """ Sets the fraction of the concurrency limit the ``rpc_`` method
+    might occupy (see ``JSONRPCView.CONCURRENCY_LIMITER``) """
+    if not 0 < share <= 1:
+        raise ValueError("share must be between 0 and 1")
+
+    def decorator(func: Any) -> Any:
+        return mark_method(func, __rpc_priority__=share)
+
+    return decorator
+
+
+__all__ = (
+    "AdaptiveLimiter",
+    "CRITICAL",
+    "HIGH",
+    "LOW",
+    "NORMAL",
+    "priority",
+)
@@ -0,0 +1,197 @@
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from aiohttp.web import Request, Response
+
+
+LATENCY_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1., 2.5, 5., 10.,
+)
+
+SIZE_BUCKETS = (1, 2, 5, 10, 50, 100, 500, 1000, 5000, 10000, 50000)
+
+BYTES_BUCKETS = (
+    256, 1024, 4096, 16384, 65536, 262144,
+    1048576, 4194304, 16777216, 67108864,
+)
+
+UNKNOWN_METHOD = "<unknown>"
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class Histogram:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        # The last one is the +Inf bucket
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> Iterable[Tuple[str, int]]:
+        total = 0
+        for bound, count in zip(self.buckets, self.counts):
+            total += count
+            yield repr(float(bound)), total
+        yield "+Inf", self.count
+
+
+def _escape(value: str) -> str:
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace("\n", "\\n")
+        .replace('"', '\\"')
+    )
+
+
+def _labels(**labels: Any) -> str:
+    if not labels:
+        return ""
+    return "{%s}" % ",".join(
+        '{0}="{1}"'.format(key, _escape(value))
+        for key, value in sorted(labels.items())
+    )
+
+
+class Metrics:
+    """ Collects the call latencies, error codes, batch and payload sizes
+    and renders them in the Prometheus text exposition format.
+
+    The same class is used by the ``JSONRPCView.METRICS`` and the
+    ``metrics`` argument of the ``ServerProxy``, metric names are
+    prefixed by the ``namespace``.
+    """
+
+    def __init__(
+        self, namespace: str = "jsonrpc",
+        latency_buckets: Tuple[float, ...] = LATENCY_BUCKETS,
+        size_buckets: Tuple[int, ...] = SIZE_BUCKETS,
+        bytes_buckets: Tuple[int, ...] = BYTES_BUCKETS,
+    ):
+        self.namespace = namespace
+        self.latency_buckets = latency_buckets
+
+        self.calls: Dict[str, Histogram] = {}
+        self.errors: Dict[Tuple[str, int], int] = defaultdict(int)
+        self.phases: Dict[str, Histogram] = {}
+        self.batch_size = Histogram(size_buckets)
+        self.request_bytes = Histogram(bytes_buckets)
+        self.response_bytes = Histogram(bytes_buckets)
+
+    def observe_call(
+        self, method: str, seconds: float, error_code: Optional[int] = None,
+    ) -> None:
+        histogram = self.calls.get(method)
+        if histogram is None:
+            histogram = self.calls[method] = Histogram(self.latency_buckets)
+
+        histogram.observe(seconds)
+
+        if error_code is not None:
+            self.errors[(method, error_code)] += 1
+
+    def observe_phase(self, phase: str, seconds: float) -> None:
+        histogram = self.phases.get(phase)
+        if histogram is None:
+            histogram = self.phases[phase] = Histogram(self.latency_buckets)
+        histogram.observe(seconds)
+
+    def observe_batch(self, size: int) -> None:
+        self.batch_size.observe(size)
+
+    def observe_request_size(self, size: int) -> None:
+        self.request_bytes.observe(size)
+
+    def observe_response_size(self, size: int) -> None:
+        self.response_bytes.observe(size)
+
+    def _histogram(
+        self, lines: List[str], name: str, description: str,
+        histograms: Dict[str, Histogram], label: Optional[str] = None,
+    ) -> None:
+        name = "{0}_{1}".format(self.namespace, name)
+        lines.append("# HELP {0} {1}".format(name, description))
+        lines.append("# TYPE {0} histogram".format(name))
+
+        for key, histogram in sorted(histograms.items()):
+            labels = {label: key} if label else {}
+
+            for bound, count in histogram.cumulative():
+                lines.append("{0}_bucket{1} {2}".format(
+                    name, _labels(le=bound, **labels), count,
+                ))
+
+            lines.append("{0}_sum{1} {2!r}".format(
+                name, _labels(**labels), histogram.sum,
+            ))
+            lines.append("{0}_count{1} {2}".format(
+                name, _labels(**labels), histogram.count,
+            ))
+
+    def render(self) -> str:
+        lines: List[str] = []
+
+        self._histogram(
+            lines, "call_duration_seconds", "Call latency by method",
+            self.calls, label="method",
+        )
+
+        name = "{0}_call_errors_total".format(self.namespace)
+        lines.append("# HELP {0} Errors by method and code".format(name))
+        lines.append("# TYPE {0} counter".format(name))
+        for (method, code), count in sorted(self.errors.items()):
+            lines.append("{0}{1} {2}".format(
+                name, _labels(method=method, code=code), count,
+            ))
+
+        self._histogram(
+            lines, "phase_duration_seconds", "Time spent by phase",
+            self.phases, label="phase",
+        )
+        self._histogram(
+            lines, "batch_size", "Number of calls in batch requests",
+            {"": self.batch_size},
+        )
+        self._histogram(
+            lines, "request_bytes", "Request body size",
+            {"": self.request_bytes},
+        )
+        self._histogram(
+            lines, "response_bytes", "Response body size",
+            {"": self.response_bytes},
+        )
+
+        lines.append("")
+        return "\n".join(lines)
+
+
+def metrics_handler(*registries: Metrics) -> Callable:
+    """ Creates the aiohttp handler exposing the metrics, e.g.::
+
+        app.router.add_get("/metrics", metrics_handler(JSONRPCView.METRICS))
+    """
+
+    async def handler(request: Request) -> Response:
+        return Response(
+            body="".join(r.render() for r in registries).encode(),
+            headers={"Content-Type": CONTENT_TYPE},
+        )
+
+    return handler
+
+
+__all__ = (
+    "Histogram",
+    "Metrics",
+    "metrics_handler",
+)
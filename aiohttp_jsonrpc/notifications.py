@@ -0,0 +1,102 @@
+import asyncio
+import contextvars
+import logging
+from typing import Awaitable, Callable, List, Optional
+
+
+log = logging.getLogger(__name__)
+
+
+class NotificationQueue:
+    """ Bounded queue of notifications processed in background by
+    ``workers`` consumer tasks.
+
+    Consumers are started on the first notification within the running
+    event loop and stopped by :meth:`drain`.
+    """
+
+    __slots__ = ("size", "workers", "_queue", "_tasks", "_loop")
+
+    def __init__(self, size: int, workers: int = 4):
+        if size < 1 or workers < 1:
+            raise ValueError("size and workers must be positive")
+
+        self.size = size
+        self.workers = workers
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def __len__(self) -> int:
+        if self._queue is None:
+            return 0
+        return self._queue.qsize()
+
+    @property
+    def free(self) -> int:
+        """ Number of notifications which might be queued yet """
+        return self.size - len(self)
+
+    def _start(self) -> asyncio.Queue:
+        loop = asyncio.get_event_loop()
+
+        if self._loop is not loop:
+            # The queue and tasks of the other loop are not usable anymore
+            self._loop = loop
+            self._queue = asyncio.Queue(maxsize=self.size)
+            # Consumers are started within the request, the empty context
+            # keeps them from inheriting its variables (e.g. the deadline)
+            self._tasks = [
+                contextvars.Context().run(loop.create_task, self._consume())
+                for _ in range(self.workers)
+            ]
+
+        return self._queue
+
+    def put_nowait(self, func: Callable[[], Awaitable]) -> bool:
+        """ Queues the processing of the notification,
+        returns False when the queue is full """
+        try:
+            self._start().put_nowait(func)
+        except asyncio.QueueFull:
+            return False
+        return True
+
+    async def _consume(self) -> None:
+        queue = self._queue
+
+        while True:
+            func = await queue.get()
+
+            try:
+                await func()
+            except Exception:
+                log.exception("Notification processing failed")
+            finally:
+                queue.task_done()
+
+    async def drain(self, timeout: Optional[float] = None) -> None:
+        """ Waits until queued notifications are processed and stops
+        consumers, notifications left after ``timeout`` are dropped """
+        if self._loop is None:
+            return
+
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except asyncio.TimeoutError:
+            log.warning(
+                "%d queued notifications are dropped on shutdown", len(self),
+            )
+        finally:
+            tasks, self._tasks = self._tasks, []
+            self._loop = None
+            self._queue = None
+
+            for task in tasks:
+                task.cancel()
+
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+
+__all__ = ("NotificationQueue",)
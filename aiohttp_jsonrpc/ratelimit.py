@@ -0,0 +1,61 @@
+import time
+from collections import OrderedDict
+from typing import Hashable, Optional
+
+
+class RateLimiter:
+    """ Token buckets of ``rate`` calls per second and ``burst`` calls
+    at most, keyed by the client identity.
+
+    Every bucket is the single float, the time when it would be full
+    again (the generic cell rate algorithm), so it's refilled lazily on
+    access without any timers. Up to ``maxsize`` least recently used
+    buckets are kept, the evicted one starts full again.
+    """
+
+    __slots__ = ("rate", "burst", "maxsize", "_interval", "_buckets")
+
+    def __init__(
+        self, rate: float, burst: Optional[float] = None,
+        maxsize: int = 100000,
+    ):
+        if rate <= 0 or maxsize < 1:
+            raise ValueError("rate and maxsize must be positive")
+
+        self.rate = rate
+        self.burst = max(1., rate if burst is None else burst)
+        self.maxsize = maxsize
+
+        self._interval = 1. / rate
+        self._buckets: "OrderedDict[Hashable, float]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def take(self, key: Hashable) -> float:
+        """ Takes the token from the bucket of the key, returns zero
+        on success or the number of seconds until it will be available """
+        now = time.monotonic()
+        full_at = self._buckets.get(key, now)
+        if full_at < now:
+            full_at = now
+
+        full_at += self._interval
+        wait = full_at - now - self.burst * self._interval
+        # Sums of intervals are not exact
+        if wait > 1e-9:
+            return wait
+
+        self._buckets[key] = full_at
+        self._buckets.move_to_end(key)
+
+        if len(self._buckets) > self.maxsize:
+            self._buckets.popitem(last=False)
+
+        return 0.
+
+    def clear(self) -> None:
+        self._buckets.clear()
+
+
+__all__ = ("RateLimiter",)
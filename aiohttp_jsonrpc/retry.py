@@ -0,0 +1,183 @@
+import asyncio
+import random
+import time
+from collections import deque
+from typing import Collection, Optional, Tuple, Type
+
+import aiohttp
+
+from .deadline import parse_timeout
+from .exceptions import CallTimeout, Overloaded, QueueFull, RateLimited
+
+
+RETRY_EXCEPTIONS: Tuple[Type[BaseException], ...] = (
+    aiohttp.ClientConnectionError, asyncio.TimeoutError,
+)
+RETRY_CODES = (
+    CallTimeout.code, QueueFull.code, Overloaded.code, RateLimited.code,
+)
+RETRY_STATUSES = (502, 503, 504)
+
+
+class RetryPolicy:
+    """ Retries and hedging of the idempotent method.
+
+    Failed calls are retried up to ``attempts`` times in total, the
+    delay before the retry is random between zero and the exponential
+    backoff (the "full jitter"). Only exceptions of ``exceptions``
+    types, JSON-RPC errors with ``codes`` and HTTP errors with
+    ``statuses`` are retried, any other error is the answer.
+
+    With ``hedge_quantile`` set, the duplicate request is sent when
+    the call has not been answered within this quantile of the
+    observed latency of the method, and the first answer is taken.
+    """
+
+    __slots__ = (
+        "attempts", "backoff", "max_backoff", "exceptions", "codes",
+        "statuses", "hedge_quantile", "max_hedges",
+    )
+
+    def __init__(
+        self, attempts: int = 3,
+        backoff: float = 0.05,
+        max_backoff: float = 2,
+        exceptions: Tuple[Type[BaseException], ...] = RETRY_EXCEPTIONS,
+        codes: Collection[int] = RETRY_CODES,
+        statuses: Collection[int] = RETRY_STATUSES,
+        hedge_quantile: Optional[float] = None,
+        max_hedges: int = 1,
+    ):
+        if attempts < 1:
+            raise ValueError("attempts must be positive")
+
+        if hedge_quantile is not None and not 0 < hedge_quantile < 1:
+            raise ValueError("hedge_quantile must be between 0 and 1")
+
+        self.attempts = attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.exceptions = tuple(exceptions)
+        self.codes = frozenset(codes)
+        self.statuses = frozenset(statuses)
+        self.hedge_quantile = hedge_quantile
+        self.max_hedges = max_hedges
+
+    def delay(
+        self, attempt: int, exc: Optional[BaseException] = None,
+    ) -> float:
+        """ Delay before the ``attempt``-th retry, the Retry-After
+        hint of the overloaded server is added to it """
+        delay = random.uniform(
+            0, min(self.max_backoff, self.backoff * 2 ** (attempt - 1)),
+        )
+
+        hint = retry_after(exc) if exc is not None else None
+        if hint is not None:
+            delay += hint
+        return delay
+
+    def is_retryable(self, exc: BaseException) -> bool:
+        if isinstance(exc, aiohttp.ClientResponseError):
+            return exc.status in self.statuses
+        if isinstance(exc, self.exceptions):
+            return True
+        return getattr(exc, "code", None) in self.codes
+
+
+def retry_after(exc: BaseException) -> Optional[float]:
+    """ Returns seconds the server asked to wait before the retry """
+    if isinstance(exc, Overloaded):
+        return exc.retry_after
+
+    if isinstance(exc, aiohttp.ClientResponseError) and exc.headers:
+        # HTTP dates are not supported, the server sends seconds
+        value = parse_timeout(exc.headers.get("Retry-After"))
+        if value is not None and value >= 0:
+            return value
+
+    return None
+
+
+class RetryBudget:
+    """ Limits retries and hedged requests, so they can not multiply the
+    load of the struggling server.
+
+    Every call deposits ``ratio`` tokens, every retry or hedged request
+    takes one. Besides that ``min_per_second`` tokens are added over
+    time, so rare calls are retried as well. At most ``max_tokens``
+    are kept.
+    """
+
+    __slots__ = ("ratio", "min_per_second", "max_tokens", "tokens", "_updated")
+
+    def __init__(
+        self, ratio: float = 0.1, min_per_second: float = 10,
+        max_tokens: float = 10,
+    ):
+        self.ratio = ratio
+        self.min_per_second = min_per_second
+        self.max_tokens = max_tokens
+        self.tokens = float(max_tokens)
+        self._updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(
+            self.max_tokens,
+            self.tokens + (now - self._updated) * self.min_per_second,
+        )
+        self._updated = now
+
+    def deposit(self) -> None:
+        self._refill()
+        self.tokens = min(self.max_tokens, self.tokens + self.ratio)
+
+    def withdraw(self) -> bool:
+        """ Takes the token, returns False when the budget is exhausted """
+        self._refill()
+
+        if self.tokens < 1:
+            return False
+
+        self.tokens -= 1
+        return True
+
+
+class LatencyTracker:
+    """ Quantiles of the last ``window`` latencies of the method.
+
+    Quantiles are recalculated when a tenth of values are new, so they
+    are cheap enough to be requested on every call.
+    """
+
+    __slots__ = ("min_samples", "_values", "_sorted", "_stale")
+
+    def __init__(self, window: int = 1000, min_samples: int = 10):
+        self.min_samples = min_samples
+        self._values = deque(maxlen=window)
+        self._sorted: list = []
+        self._stale = 0
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def observe(self, seconds: float) -> None:
+        self._values.append(seconds)
+        self._stale += 1
+
+    def quantile(self, q: float) -> Optional[float]:
+        """ Returns None until ``min_samples`` values are observed """
+        if len(self._values) < self.min_samples:
+            return None
+
+        if self._stale > len(self._values) // 10:
+            self._sorted = sorted(self._values)
+            self._stale = 0
+
+        return self._sorted[min(len(self._sorted) - 1, int(
+            q * len(self._sorted),
+        ))]
+
+
+__all__ = ("LatencyTracker", "RetryBudget", "RetryPolicy", "retry_after")
@@ -0,0 +1,205 @@
+import re
+from typing import List, Optional
+
+from .exceptions import InvalidData
+
+
+# Only brackets, commas and strings matter to find the boundaries
+# of the batch elements, everything else is skipped by the regex
+_TOKEN = re.compile(rb'[\[\]{},"]')
+# Escaped characters and the rest of the string, but the closing quote
+_STRING_PART = re.compile(rb'[^"\\]*(?:\\.[^"\\]*)*', re.DOTALL)
+
+_QUOTE = ord('"')
+_BACKSLASH = ord("\\")
+_COMMA = ord(",")
+_OPEN = frozenset(b"[{")
+_CLOSE = frozenset(b"]}")
+
+
+class JSONScanner:
+    """ Incremental scanner of the JSON request body.
+
+    Chunks are passed to the :meth:`feed` as they are received, the
+    nesting depth and the number of batch elements are checked on the
+    fly, so the request exceeding limits is rejected before the whole
+    body is read. When ``collect`` is set, complete elements of the
+    batch are returned as they arrive and released from the buffer.
+
+    The scanner checks only the structure, the elements themselves
+    are parsed by the codec.
+    """
+
+    __slots__ = (
+        "max_depth", "max_items", "collect", "batch", "items", "size",
+        "_depth", "_buffer", "_position", "_start", "_done", "_in_string",
+        "_escape",
+    )
+
+    def __init__(
+        self, max_depth: Optional[int] = None,
+        max_items: Optional[int] = None, collect: bool = True,
+    ):
+        self.max_depth = max_depth
+        self.max_items = max_items
+        self.collect = collect
+
+        # None until the first significant byte is received
+        self.batch: Optional[bool] = None
+        self.items = 0
+        self.size = 0
+
+        self._depth = 0
+        self._buffer = bytearray()
+        # The next byte to scan
+        self._position = 0
+        # The first byte of the current batch element
+        self._start = 0
+        self._done = False
+        # The string continues in the next chunk, so it's not rescanned
+        self._in_string = False
+        # The chunk ends with the backslash inside the string
+        self._escape = False
+
+    def feed(self, data: bytes) -> List[bytes]:
+        """ Consumes the chunk and returns the batch elements completed
+        by it. Raises ``ValueError`` on the malformed body and
+        :class:`InvalidData` when limits are exceeded. """
+        self.size += len(data)
+        buffer = self._buffer
+        buffer += data
+
+        if self.batch is None:
+            head = buffer.lstrip()
+            if not head:
+                return []
+
+            self.batch = head[0] == ord("[")
+
+        if self._done:
+            if buffer[self._position:].strip():
+                raise ValueError("Extra data after the batch")
+            return []
+
+        elements: List[bytes] = []
+        position = self._position
+        depth = self._depth
+        max_depth = self.max_depth
+        batch = self.batch
+        in_string = self._in_string
+        escape = self._escape
+
+        while True:
+            if in_string:
+                if escape:
+                    if position >= len(buffer):
+                        break
+                    position += 1
+                    escape = False
+
+                position = _STRING_PART.match(buffer, position).end()
+                if position >= len(buffer):
+                    break
+
+                position += 1
+                if buffer[position - 1] == _BACKSLASH:
+                    # Only the trailing backslash is left unmatched
+                    escape = True
+                    break
+
+                in_string = False
+                continue
+
+            match = _TOKEN.search(buffer, position)
+
+            if match is None:
+                position = len(buffer)
+                break
+
+            index = match.start()
+            char = buffer[index]
+            position = index + 1
+
+            if char == _QUOTE:
+                in_string = True
+            elif char in _OPEN:
+                depth += 1
+                if max_depth is not None and depth > max_depth:
+                    raise InvalidData(
+                        "Nesting depth exceeds the limit %d" % max_depth,
+                    )
+                if batch and depth == 1:
+                    self._start = position
+            elif char in _CLOSE:
+                depth -= 1
+                if depth < 0:
+                    raise ValueError("Unexpected %r" % chr(char))
+                if batch and depth == 0:
+                    self._element(elements, index, last=True)
+                    self._done = True
+                    break
+            elif batch and depth == 1:
+                self._element(elements, index, last=False)
+                self._start = position
+
+        self._depth = depth
+        self._position = position
+        self._in_string = in_string
+        self._escape = escape
+
+        if self._done and buffer[position:].strip():
+            raise ValueError("Extra data after the batch")
+
+        self._release()
+        return elements
+
+    def close(self) -> List[bytes]:
+        """ Finishes scanning, returns the whole body when it is not
+        a batch and ``collect`` is set """
+        if self.batch is None:
+            raise ValueError("Empty body")
+
+        if self.batch:
+            if not self._done:
+                raise ValueError("Unexpected end of the batch")
+            return []
+
+        if not self.collect:
+            return []
+
+        return [bytes(self._buffer)]
+
+    def _element(self, elements: List[bytes], end: int, last: bool) -> None:
+        if last and self.items == 0:
+            if not self._buffer[self._start:end].strip():
+                # Empty batch
+                return
+
+        self.items += 1
+        if self.max_items is not None and self.items > self.max_items:
+            raise InvalidData(
+                "Batch size exceeds the limit %d" % self.max_items,
+            )
+
+        if self.collect:
+            elements.append(bytes(self._buffer[self._start:end].strip()))
+
+    def _release(self) -> None:
+        # Drop bytes which are not needed anymore, so the buffer
+        # holds only the incomplete element
+        if not self.batch:
+            if self.collect:
+                return
+            offset = self._position
+        elif self.collect and not self._done:
+            offset = min(self._start, self._position)
+        else:
+            offset = self._position
+
+        if offset:
+            del self._buffer[:offset]
+            self._position -= offset
+            self._start = max(0, self._start - offset)
+
+
+__all__ = ("JSONScanner",)
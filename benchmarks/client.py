@@ -0,0 +1,120 @@
+"""
+Per-call overhead of the ServerProxy.
+
+The transport is replaced by the in-memory session, so only the client
+side of the call is measured: building the request, encoding the body,
+preparing headers and parsing the response. The current call path is
+compared against the legacy one, which creates the ``Method`` object
+on every attribute access, generates uuid4 request ids and awaits
+the ``prepare_body``/``prepare_headers`` hooks on every call::
+
+    python benchmarks/client.py
+"""
+import argparse
+import asyncio
+import json
+import logging
+import time
+import uuid
+
+from aiohttp_jsonrpc.client import ServerProxy
+from aiohttp_jsonrpc.codec import JSONCodec, ORJSONCodec
+
+
+class FakeResponse:
+    __slots__ = ("body",)
+
+    def __init__(self, body: bytes):
+        self.body = body
+
+    def raise_for_status(self):
+        pass
+
+    async def read(self) -> bytes:
+        return self.body
+
+    def release(self):
+        pass
+
+
+class FakeSession:
+    def __init__(self):
+        self.closed = False
+
+    async def post(self, url, headers, data):
+        request = json.loads(data)
+        return FakeResponse(json.dumps({
+            "jsonrpc": "2.0", "id": request["id"], "result": None,
+        }).encode())
+
+    async def close(self):
+        self.closed = True
+
+
+class LegacyServerProxy(ServerProxy):
+    METHOD_CACHE_SIZE = 0
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(
+            *args, id_factory=lambda: str(uuid.uuid4()), **kwargs
+        )
+
+    async def prepare_headers(self, headers):
+        return headers
+
+    async def prepare_body(self, body):
+        return body
+
+
+async def measure(proxy: ServerProxy, rounds: int) -> float:
+    started = time.perf_counter()
+    for idx in range(rounds):
+        await proxy.mirror(idx)
+    return (time.perf_counter() - started) / rounds
+
+
+async def run(codec, rounds: int):
+    results = []
+
+    for proxy_class in (LegacyServerProxy, ServerProxy):
+        proxy = proxy_class(
+            "http://localhost/", client=FakeSession(), codec=codec,
+        )
+        # Warm up
+        await measure(proxy, rounds // 10 or 1)
+        results.append(await measure(proxy, rounds))
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rounds", type=int, default=100000)
+    arguments = parser.parse_args()
+
+    # The "Server response" log line is not a subject of this benchmark
+    logging.getLogger("aiohttp_jsonrpc").setLevel(logging.WARNING)
+
+    codecs = [("json", JSONCodec())]
+    try:
+        codecs.append(("orjson", ORJSONCodec()))
+    except RuntimeError:
+        pass
+
+    loop = asyncio.new_event_loop()
+    try:
+        for name, codec in codecs:
+            legacy, current = loop.run_until_complete(
+                run(codec, arguments.rounds),
+            )
+
+            print("codec:            {0}".format(name))
+            print("legacy call:      {0:.3f} us/call".format(legacy * 1e6))
+            print("current call:     {0:.3f} us/call".format(current * 1e6))
+            print("speedup:          {0:.2f}x".format(legacy / current))
+    finally:
+        loop.close()
+
+
+if __name__ == "__main__":
+    main()
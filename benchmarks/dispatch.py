@@ -0,0 +1,115 @@
+"""
+Per-call method dispatch overhead of the JSONRPCView.
+
+Compares the precompiled dispatch table against the legacy
+``getattr`` + ``awaitable()`` lookup for a view with hundreds
+of ``rpc_`` methods::
+
+    python benchmarks/dispatch.py
+"""
+import argparse
+import asyncio
+import logging
+import time
+
+from aiohttp.test_utils import make_mocked_request
+
+from aiohttp_jsonrpc import exceptions
+from aiohttp_jsonrpc.common import awaitable
+from aiohttp_jsonrpc.handler import JSONRPCView
+
+
+def create_view_class(methods: int) -> type:
+    namespace = {}
+
+    for idx in range(methods):
+        if idx % 2:
+            async def method(self, value):
+                return value
+        else:
+            def method(self, value):
+                return value
+
+        namespace["rpc_method_{0}".format(idx)] = method
+
+    return type("BenchmarkView", (JSONRPCView,), namespace)
+
+
+class LegacyDispatchMixin:
+    def _lookup_method(self, method_name):
+        method = getattr(
+            self, "{0}{1}".format(self.METHOD_PREFIX, method_name), None,
+        )
+
+        if not callable(method):
+            raise exceptions.ApplicationError(
+                "Method %r not found" % method_name,
+            )
+        return method
+
+    async def _handle(self, json_request):
+        request_id = json_request.get("id")
+
+        try:
+            method = self._lookup_method(json_request["method"])
+            params = json_request.get("params")
+
+            args = []
+            kwargs = {}
+
+            if isinstance(params, list):
+                args = params
+            elif isinstance(params, dict):
+                kwargs = params
+
+            result = await awaitable(method)(*args, **kwargs)
+            return self._format_success(result, request_id)
+        except Exception as e:
+            return self._format_error(e, request_id)
+
+
+async def measure(view: JSONRPCView, requests: list, rounds: int) -> float:
+    started = time.perf_counter()
+    for _ in range(rounds):
+        for request in requests:
+            await view._handle(request)
+    return (time.perf_counter() - started) / (rounds * len(requests))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--methods", type=int, default=500)
+    parser.add_argument("--rounds", type=int, default=200)
+    arguments = parser.parse_args()
+
+    # The "RPC Call" log line is not a subject of this benchmark
+    logging.getLogger("aiohttp_jsonrpc").setLevel(logging.WARNING)
+
+    view_class = create_view_class(arguments.methods)
+    legacy_class = type("LegacyView", (LegacyDispatchMixin, view_class), {})
+
+    request = make_mocked_request("POST", "/")
+    requests = [
+        {"jsonrpc": "2.0", "id": idx, "method": name, "params": [idx]}
+        for idx, name in enumerate(view_class._methods)
+    ]
+
+    loop = asyncio.new_event_loop()
+    try:
+        legacy = loop.run_until_complete(
+            measure(legacy_class(request), requests, arguments.rounds),
+        )
+        table = loop.run_until_complete(
+            measure(view_class(request), requests, arguments.rounds),
+        )
+    finally:
+        loop.close()
+
+    print("methods:          {0}".format(arguments.methods))
+    print("legacy getattr:   {0:.3f} us/call".format(legacy * 1e6))
+    print("dispatch table:   {0:.3f} us/call".format(table * 1e6))
+    print("speedup:          {0:.2f}x".format(legacy / table))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Result serialization cost for large nested results.
+
+Compares the legacy ``json.dumps(py2json(value))`` two-pass
+serialization with the single-pass codecs::
+
+    python benchmarks/serializer.py
+"""
+import argparse
+import json
+import time
+from datetime import datetime
+
+from aiohttp_jsonrpc import codec
+from aiohttp_jsonrpc.common import py2json
+
+
+def create_result(size: int) -> dict:
+    now = datetime.now()
+    return {
+        "items": [
+            {
+                "id": idx,
+                "name": "item-{0}".format(idx),
+                "score": idx / 3,
+                "tags": ["foo", "bar", idx % 7],
+                "created": now,
+                "nested": {"enabled": bool(idx % 2), "parent": None},
+            }
+            for idx in range(size)
+        ],
+        "total": size,
+    }
+
+
+def legacy_dumps(value) -> bytes:
+    return json.dumps(py2json(value), ensure_ascii=False).encode()
+
+
+def measure(func, value, rounds: int) -> float:
+    started = time.perf_counter()
+    for _ in range(rounds):
+        func(value)
+    return (time.perf_counter() - started) / rounds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", type=int, default=10000)
+    parser.add_argument("--rounds", type=int, default=20)
+    arguments = parser.parse_args()
+
+    value = create_result(arguments.size)
+    candidates = [("legacy py2json + json", legacy_dumps)]
+
+    for codec_class in (codec.JSONCodec, codec.ORJSONCodec, codec.UJSONCodec):
+        try:
+            candidates.append((codec_class.__name__, codec_class().dumps))
+        except RuntimeError:
+            continue
+
+    print("elements: {0}".format(arguments.size))
+
+    baseline = None
+    for name, func in candidates:
+        elapsed = measure(func, value, arguments.rounds)
+        baseline = baseline or elapsed
+        print("{0:<24} {1:8.2f} ms  {2:5.2f}x".format(
+            name, elapsed * 1000, baseline / elapsed,
+        ))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,280 @@
+"""
+In-process benchmark suite of the server and client hot paths.
+
+Every scenario runs against the aiohttp ``TestServer`` through the
+``ServerProxy`` and reports operations per second, latency percentiles
+and memory allocations as JSON::
+
+    python benchmarks/suite.py --output results.json
+    python benchmarks/suite.py --scenario single_call --scenario batch_10
+
+Compare two result files to catch regressions between releases::
+
+    python benchmarks/suite.py --compare before.json after.json
+"""
+import argparse
+import asyncio
+import gc
+import json
+import logging
+import platform
+import sys
+import time
+import tracemalloc
+from typing import Any, Awaitable, Callable, Dict, List, NamedTuple
+
+import aiohttp
+from aiohttp import web
+from aiohttp.test_utils import TestClient, TestServer
+
+import aiohttp_jsonrpc
+from aiohttp_jsonrpc import handler
+from aiohttp_jsonrpc.client import ServerProxy
+from aiohttp_jsonrpc.common import Binary
+from aiohttp_jsonrpc.exceptions import ApplicationError
+
+
+BINARY_PAYLOAD = Binary(bytes(range(256)) * 256)
+
+LARGE_RESULT = [
+    {
+        "id": idx,
+        "name": "item-{0}".format(idx),
+        "tags": ["foo", "bar"],
+        "nested": {"score": idx / 3, "enabled": bool(idx % 2)},
+    }
+    for idx in range(10000)
+]
+
+
+class BenchmarkView(handler.JSONRPCView):
+    MAX_BATCH_SIZE = None
+
+    def rpc_mirror(self, value):
+        return value
+
+    async def rpc_async_mirror(self, value):
+        return value
+
+    def rpc_noop(self):
+        pass
+
+    def rpc_large(self):
+        return LARGE_RESULT
+
+    def rpc_binary(self):
+        return BINARY_PAYLOAD
+
+    def rpc_fail(self):
+        raise ApplicationError("Failed")
+
+
+class Scenario(NamedTuple):
+    name: str
+    iterations: int
+    # Number of calls made by the single operation
+    calls: int
+    factory: Callable[[ServerProxy], Callable[[], Awaitable[Any]]]
+
+
+def _batch(size: int) -> Callable:
+    def factory(client: ServerProxy) -> Callable[[], Awaitable[Any]]:
+        return lambda: client(
+            *[client.async_mirror.prepare(i) for i in range(size)]
+        )
+    return factory
+
+
+async def _expect_error(client: ServerProxy) -> None:
+    try:
+        await client.fail()
+    except ApplicationError:
+        return
+    raise AssertionError("Error expected")
+
+
+SCENARIOS = [
+    Scenario(
+        "single_call", 2000, 1,
+        lambda client: lambda: client.mirror("foo"),
+    ),
+    Scenario(
+        "notification", 2000, 1,
+        lambda client: client.create_notification("noop"),
+    ),
+    Scenario("batch_10", 500, 10, _batch(10)),
+    Scenario("batch_1k", 50, 1000, _batch(1000)),
+    Scenario("batch_50k", 3, 50000, _batch(50000)),
+    Scenario(
+        "large_result", 20, 1,
+        lambda client: lambda: client.large(),
+    ),
+    Scenario(
+        "binary", 500, 1,
+        lambda client: lambda: client.binary(),
+    ),
+    Scenario(
+        "errors", 2000, 1,
+        lambda client: lambda: _expect_error(client),
+    ),
+]
+
+
+def percentile(values: List[float], rank: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * rank))]
+
+
+async def run_scenario(
+    client: ServerProxy, scenario: Scenario, scale: float,
+) -> Dict[str, Any]:
+    operation = scenario.factory(client)
+    iterations = max(1, int(scenario.iterations * scale))
+
+    # Warm up connections and caches
+    for _ in range(min(10, iterations)):
+        await operation()
+
+    gc.collect()
+    durations = []
+    started = time.perf_counter()
+
+    for _ in range(iterations):
+        op_started = time.perf_counter()
+        await operation()
+        durations.append(time.perf_counter() - op_started)
+
+    elapsed = time.perf_counter() - started
+
+    # Allocations are measured separately, tracing slows everything down
+    alloc_iterations = max(1, iterations // 10)
+    gc.collect()
+    tracemalloc.start()
+    snapshot_before = tracemalloc.take_snapshot()
+
+    for _ in range(alloc_iterations):
+        await operation()
+
+    snapshot_after = tracemalloc.take_snapshot()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    allocated = sum(
+        stat.size_diff
+        for stat in snapshot_after.compare_to(snapshot_before, "filename")
+        if stat.size_diff > 0
+    )
+
+    return {
+        "iterations": iterations,
+        "calls_per_op": scenario.calls,
+        "ops_per_sec": iterations / elapsed,
+        "calls_per_sec": iterations * scenario.calls / elapsed,
+        "p50_ms": percentile(durations, 0.5) * 1000,
+        "p99_ms": percentile(durations, 0.99) * 1000,
+        "max_ms": max(durations) * 1000,
+        "alloc_peak_bytes": peak,
+        "alloc_retained_bytes_per_op": allocated // alloc_iterations,
+    }
+
+
+async def run(names: List[str], scale: float) -> Dict[str, Any]:
+    app = web.Application(client_max_size=256 * 1024 * 1024)
+    app.router.add_route("*", "/", BenchmarkView)
+
+    test_client = TestClient(TestServer(app))
+    await test_client.start_server()
+    client = ServerProxy("/", client=test_client)
+
+    results = {}
+
+    try:
+        for scenario in SCENARIOS:
+            if names and scenario.name not in names:
+                continue
+
+            logging.info("Running %s", scenario.name)
+            results[scenario.name] = await run_scenario(
+                client, scenario, scale,
+            )
+    finally:
+        await client.close()
+        await test_client.close()
+
+    return {
+        "meta": {
+            "version": aiohttp_jsonrpc.__version__,
+            "python": sys.version.split()[0],
+            "implementation": platform.python_implementation(),
+            "aiohttp": aiohttp.__version__,
+            "codec": repr(BenchmarkView._codec),
+            "timestamp": time.time(),
+        },
+        "results": results,
+    }
+
+
+def compare(before_path: str, after_path: str) -> Dict[str, Any]:
+    with open(before_path) as fp:
+        before = json.load(fp)["results"]
+    with open(after_path) as fp:
+        after = json.load(fp)["results"]
+
+    report = {}
+    for name in sorted(set(before) & set(after)):
+        report[name] = {
+            key: after[name][key] / before[name][key]
+            for key in ("ops_per_sec", "p50_ms", "p99_ms")
+            if before[name][key]
+        }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument(
+        "--scenario", action="append", default=[],
+        choices=[scenario.name for scenario in SCENARIOS],
+    )
+    parser.add_argument(
+        "--scale", type=float, default=1.,
+        help="Multiplier of the number of iterations",
+    )
+    parser.add_argument("--output", help="Write results to the file")
+    parser.add_argument(
+        "--compare", nargs=2, metavar=("BEFORE", "AFTER"),
+        help="Print the ratios of two result files",
+    )
+    arguments = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, stream=sys.stderr)
+    # The "RPC Call" log line is not a subject of this benchmark
+    logging.getLogger("aiohttp_jsonrpc").setLevel(logging.WARNING)
+    logging.getLogger("aiohttp.access").setLevel(logging.WARNING)
+
+    if arguments.compare:
+        report = compare(*arguments.compare)
+    else:
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        try:
+            report = loop.run_until_complete(
+                run(arguments.scenario, arguments.scale),
+            )
+        finally:
+            loop.close()
+
+    data = json.dumps(report, indent=2)
+
+    if arguments.output:
+        with open(arguments.output, "w") as fp:
+            fp.write(data)
+    else:
+        print(data)
+
+
+if __name__ == "__main__":
+    main()
@@ -31,6 +31,9 @@ setup(
         "typing-extensions; python_version<'3.8'"
     ),
     extras_require={
+        "msgpack": [
+            "msgpack",
+        ],
         "develop": [
             "pytest",
             "pytest-cov",
@@ -1,4 +1,4 @@
-from aiohttp_jsonrpc import client, common, handler
+from aiohttp_jsonrpc import client, codec, common, handler
 
 
-__all__ = "common", "handler", "client"
+__all__ = "codec", "common", "handler", "client"
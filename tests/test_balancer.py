@@ -0,0 +1,262 @@
+import asyncio
+from collections import Counter
+
+import aiohttp
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer, unused_port
+
+from aiohttp_jsonrpc import handler
+from aiohttp_jsonrpc.client import BalancedServerProxy, HashedServerProxy
+from aiohttp_jsonrpc.hashring import HashRing
+
+
+class JSONRPCReplica(handler.JSONRPCView):
+    def rpc_name(self):
+        return self.request.app["name"]
+
+    def rpc_get(self, key, default=None):
+        return self.request.app["name"]
+
+    async def rpc_sleep(self, delay):
+        await asyncio.sleep(delay * self.request.app["slowdown"])
+        return self.request.app["name"]
+
+
+def create_app(name, slowdown=1):
+    app = web.Application()
+    app["name"] = name
+    app["slowdown"] = slowdown
+    app.router.add_route("*", "/", JSONRPCReplica)
+    return app
+
+
+@pytest.fixture
+def start_server(loop, add_cleanup):
+    async def start(name, port=None, **kwargs):
+        server = TestServer(create_app(name, **kwargs), port=port)
+        await server.start_server()
+        add_cleanup(server.close)
+        return server
+
+    return start
+
+
+@pytest.fixture
+def create_proxy(loop, add_cleanup):
+    def create(urls, proxy_class=BalancedServerProxy, **kwargs):
+        proxy = proxy_class(urls, **kwargs)
+        add_cleanup(proxy.close)
+        return proxy
+
+    return create
+
+
+@pytest.mark.parametrize("strategy", [
+    BalancedServerProxy.POWER_OF_TWO, BalancedServerProxy.LEAST_OUTSTANDING,
+])
+async def test_spread(start_server, create_proxy, strategy):
+    servers = [await start_server(name) for name in "abc"]
+    proxy = create_proxy(
+        [server.make_url("/") for server in servers], strategy=strategy,
+    )
+
+    names = await asyncio.gather(*[proxy.sleep(0.01) for _ in range(30)])
+    assert set(names) == set("abc")
+
+    # Batches are sent to the single endpoint
+    assert len(set(await proxy(*[proxy.name.prepare()] * 3))) == 1
+    assert all(endpoint.outstanding == 0 for endpoint in proxy.endpoints)
+
+
+async def test_least_outstanding(start_server, create_proxy):
+    servers = [
+        await start_server("slow", slowdown=20),
+        await start_server("fast"),
+    ]
+    proxy = create_proxy(
+        [server.make_url("/") for server in servers],
+        strategy=BalancedServerProxy.LEAST_OUTSTANDING,
+    )
+
+    async def worker():
+        return [await proxy.sleep(0.01) for _ in range(5)]
+
+    names = Counter(
+        name for names in await asyncio.gather(*[worker() for _ in range(4)])
+        for name in names
+    )
+
+    assert names["fast"] > names["slow"] * 2
+
+
+async def test_ejection(start_server, create_proxy):
+    server = await start_server("alive")
+    port = unused_port()
+
+    proxy = create_proxy(
+        [server.make_url("/"), "http://127.0.0.1:{0}/".format(port)],
+        max_failures=2, eject_time=0.05,
+    )
+    dead = proxy.endpoints[1]
+
+    for _ in range(20):
+        # Requests failed to connect are resent to the alive endpoint
+        assert await proxy.name() == "alive"
+
+    assert dead.ejected
+    assert dead.failures == 2
+
+    await start_server("restored", port=port)
+
+    for _ in range(100):
+        if not dead.ejected:
+            break
+        await asyncio.sleep(0.05)
+
+    assert not dead.ejected
+    names = await asyncio.gather(*[proxy.sleep(0.01) for _ in range(20)])
+    assert "restored" in names
+
+
+class BrokenProbeProxy(BalancedServerProxy):
+    probes = 0
+
+    async def probe(self, endpoint):
+        BrokenProbeProxy.probes += 1
+        if BrokenProbeProxy.probes < 3:
+            raise ValueError("Unexpected error")
+        return await super().probe(endpoint)
+
+
+async def test_probe_error(start_server, create_proxy):
+    server = await start_server("alive")
+    port = unused_port()
+    proxy = create_proxy(
+        [server.make_url("/"), "http://127.0.0.1:{0}/".format(port)],
+        proxy_class=BrokenProbeProxy, max_failures=1, eject_time=0.01,
+        max_eject_time=0.02,
+    )
+    dead = proxy.endpoints[1]
+
+    for _ in range(10):
+        assert await proxy.name() == "alive"
+    assert dead.ejected
+
+    await start_server("restored", port=port)
+
+    for _ in range(100):
+        if not dead.ejected:
+            break
+        await asyncio.sleep(0.02)
+
+    # The prober survived unexpected errors
+    assert BrokenProbeProxy.probes >= 3
+    assert not dead.ejected
+
+
+async def test_all_ejected(create_proxy):
+    proxy = create_proxy(
+        ["http://127.0.0.1:{0}/".format(unused_port()) for _ in range(2)],
+        max_failures=1,
+    )
+
+    for _ in range(3):
+        with pytest.raises(aiohttp.ClientConnectorError):
+            await proxy.name()
+
+    assert all(endpoint.ejected for endpoint in proxy.endpoints)
+
+
+async def test_arguments(loop):
+    with pytest.raises(ValueError):
+        BalancedServerProxy([])
+
+    with pytest.raises(ValueError):
+        BalancedServerProxy(["http://localhost/"], strategy="foo")
+
+
+def test_hash_ring():
+    ring = HashRing(["a", "b", "c"])
+    keys = range(10000)
+    before = {key: ring.get(key) for key in keys}
+
+    assert len(ring) == 3
+    assert set(before.values()) == {"a", "b", "c"}
+    assert all(count > 2000 for count in Counter(before.values()).values())
+
+    ring.add("d")
+    moved = [key for key in keys if ring.get(key) != before[key]]
+    # Only keys taken over by the new node are moved
+    assert all(ring.get(key) == "d" for key in moved)
+    assert 1500 < len(moved) < 3500
+
+    ring.remove("d")
+    assert {key: ring.get(key) for key in keys} == before
+
+    assert list(ring.iterate(1))[0] == ring.get(1)
+    assert sorted(ring.iterate(1)) == ["a", "b", "c"]
+    assert HashRing().get(1) is None
+
+
+async def test_affinity(start_server, create_proxy):
+    servers = [await start_server(name) for name in "abc"]
+    proxy = create_proxy(
+        [server.make_url("/") for server in servers],
+        proxy_class=HashedServerProxy, keys={"get": 0},
+    )
+
+    names = {key: await proxy.get(key) for key in range(30)}
+    assert set(names.values()) == set("abc")
+
+    # Keyword arguments are not routed by the positional key
+    assert await proxy.get(key=1) in "abc"
+
+    for key in range(30):
+        assert await proxy.get(key) == names[key]
+
+    # Batches are split by the endpoint and merged back in order
+    keys = list(range(30))
+    results = await proxy(*[proxy.get.prepare(key) for key in keys])
+    assert results == [names[key] for key in keys]
+
+    results = await proxy(
+        proxy.get.prepare(1), proxy.name.prepare(), proxy.get.prepare(2),
+        {"jsonrpc": "2.0", "method": "get", "params": [3]},
+    )
+    assert results[0] == names[1]
+    assert results[1] in "abc"
+    assert results[2:] == [names[2], None]
+
+
+async def test_affinity_ejection(start_server, create_proxy):
+    server = await start_server("alive")
+    proxy = create_proxy(
+        [server.make_url("/"), "http://127.0.0.1:{0}/".format(unused_port())],
+        proxy_class=HashedServerProxy, keys={"get": "key"},
+        max_failures=1, eject_time=60,
+    )
+
+    # Keys of the dead endpoint are served by the next one
+    for key in range(20):
+        assert await proxy.get(key=key) == "alive"
+
+    assert proxy.endpoints[1].ejected
+
+
+async def test_get_key(loop):
+    proxy = HashedServerProxy(
+        ["http://localhost/"], keys={
+            "positional": 1, "named": "id",
+            "custom": lambda request: request["params"][0]["id"],
+        },
+    )
+
+    assert proxy.get_key(proxy.positional.prepare(1, 2)) == 2
+    assert proxy.get_key(proxy.positional.prepare(1)) is None
+    assert proxy.get_key(proxy.named.prepare(id=3)) == 3
+    assert proxy.get_key(proxy.named.prepare(3)) is None
+    assert proxy.get_key(proxy.custom.prepare({"id": 4})) == 4
+    assert proxy.get_key(proxy.unknown.prepare(5)) is None
+
+    await proxy.close()
@@ -0,0 +1,245 @@
+import asyncio
+import json
+from functools import wraps
+
+import pytest
+from aiohttp import web
+
+from aiohttp_jsonrpc import handler
+from aiohttp_jsonrpc.client import ServerProxy
+from aiohttp_jsonrpc.exceptions import CallTimeout, InvalidData
+
+
+def traced(func):
+    # The synchronous wrapper returns the coroutine of the method
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        return func(*args, **kwargs)
+    return wrapper
+
+
+class JSONRPCLimited(handler.JSONRPCView):
+    MAX_BATCH_SIZE = 20
+    BATCH_CONCURRENCY = 3
+    CALL_TIMEOUT = 0.5
+
+    in_flight = 0
+    max_in_flight = 0
+    sync_tasks = set()
+
+    async def rpc_sleep(self, delay):
+        cls = self.__class__
+        cls.in_flight += 1
+        cls.max_in_flight = max(cls.max_in_flight, cls.in_flight)
+
+        try:
+            await asyncio.sleep(delay)
+        finally:
+            cls.in_flight -= 1
+
+        return delay
+
+    rpc_traced = traced(rpc_sleep)
+
+    def rpc_future(self, delay):
+        future = asyncio.get_event_loop().create_future()
+        asyncio.get_event_loop().call_later(delay, future.set_result, delay)
+        return future
+
+    def rpc_task(self):
+        self.sync_tasks.add(asyncio.current_task())
+        return True
+
+
+class JSONRPCStreamResponse(handler.JSONRPCView):
+    STREAM_RESPONSE = True
+    BATCH_CONCURRENCY = 3
+    STREAM_CHUNK_SIZE = 16
+    COMPRESSION_THRESHOLD = 1024
+
+    async def rpc_sleep(self, delay):
+        await asyncio.sleep(delay)
+        return delay
+
+    def rpc_mirror(self, value):
+        return value
+
+
+class JSONRPCStreamBoth(JSONRPCStreamResponse):
+    STREAM_BATCH = True
+
+
+def create_app():
+    app = web.Application()
+    app.router.add_route("*", "/", JSONRPCLimited)
+    app.router.add_route("*", "/stream", JSONRPCStreamResponse)
+    app.router.add_route("*", "/stream-both", JSONRPCStreamBoth)
+    return app
+
+
+@pytest.fixture
+async def client(loop, jsonrpc_test_client):
+    JSONRPCLimited.max_in_flight = 0
+    JSONRPCLimited.sync_tasks.clear()
+    return await jsonrpc_test_client(create_app)
+
+
+async def test_batch_concurrency(client: ServerProxy):
+    results = await client(
+        *[client.sleep.prepare(0.01) for _ in range(10)]
+    )
+
+    assert results == [0.01] * 10
+    assert JSONRPCLimited.max_in_flight == 3
+
+
+async def test_batch_size(client: ServerProxy):
+    with pytest.raises(InvalidData):
+        await client(*[client.task.prepare() for _ in range(21)])
+
+    assert not JSONRPCLimited.sync_tasks
+
+
+async def test_batch_size_error(client: ServerProxy):
+    response = await client.client.post(
+        "/", json=[{"jsonrpc": "2.0", "id": i, "method": "task"}
+                   for i in range(21)],
+    )
+
+    payload = await response.json()
+    assert payload["id"] is None
+    assert payload["error"]["code"] == InvalidData.code
+
+
+async def test_call_timeout(client: ServerProxy):
+    results = await client(
+        client.sleep.prepare(0.01),
+        client.sleep.prepare(5),
+        client.sleep.prepare(0.02),
+    )
+
+    assert results[0] == 0.01
+    assert isinstance(results[1], CallTimeout)
+    assert results[2] == 0.02
+
+
+async def test_sync_inline(client: ServerProxy):
+    results = await client(*[client.task.prepare() for _ in range(10)])
+    assert results == [True] * 10
+
+    # All synchronous calls were made without creating a task per call
+    assert len(JSONRPCLimited.sync_tasks) == 1
+
+
+async def test_sync_returning_awaitable(client: ServerProxy):
+    results = await client(
+        *[client.traced.prepare(0.05) for _ in range(6)],
+        client.future.prepare(0.05),
+        client.task.prepare(),
+    )
+
+    assert results == [0.05] * 7 + [True]
+    # Awaitables are executed concurrently like coroutine methods
+    assert JSONRPCLimited.max_in_flight == 3
+
+    # Calls over the CALL_TIMEOUT still fail
+    results = await client(client.traced.prepare(5), client.future.prepare(5))
+    assert all(isinstance(result, CallTimeout) for result in results)
+
+
+async def test_invalid_batch_element(client: ServerProxy):
+    response = await client.client.post(
+        "/", json=[1, {"jsonrpc": "2.0", "id": 1, "method": "task"}],
+    )
+
+    payload = await response.json()
+    assert payload[0]["error"]["code"] == InvalidData.code
+    assert payload[1]["result"] is True
+
+
+@pytest.mark.parametrize("url", ["/stream", "/stream-both"])
+async def test_stream_response(client: ServerProxy, url):
+    calls = [
+        client.sleep.prepare(0.03),
+        client.mirror.prepare("foo"),
+        {"jsonrpc": "2.0", "method": "mirror", "params": [1]},
+        client.sleep.prepare(0.01),
+        client.unknown.prepare(),
+    ] * 5
+
+    response = await client.client.post(
+        url, json=calls, headers={"Accept-Encoding": "gzip"},
+    )
+
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert response.headers.getall("Vary") == ["Accept-Encoding"]
+    assert "Content-Length" not in response.headers
+
+    payload = await response.json()
+    assert [item["id"] for item in payload] == [
+        call["id"] for call in calls if "id" in call
+    ]
+    assert [item.get("result") for item in payload[:3]] == [0.03, "foo", 0.01]
+    assert "error" in payload[3]
+
+    response = await client.client.post(url, json=[])
+    assert await response.json() == []
+
+
+async def test_stream_response_first_byte(client: ServerProxy):
+    body = json.dumps([
+        client.mirror.prepare("first"), client.sleep.prepare(1),
+    ]).encode()
+
+    # Raw connection, so nothing is buffered on the client side
+    reader, writer = await asyncio.open_connection(
+        client.client.host, client.client.port,
+    )
+    writer.write(
+        b"POST /stream HTTP/1.1\r\nHost: localhost\r\n"
+        b"Content-Type: application/json\r\n"
+        b"Content-Length: %d\r\n\r\n%s" % (len(body), body),
+    )
+
+    try:
+        # The first response is received before the second call is finished
+        data = b""
+        while b"first" not in data:
+            data += await asyncio.wait_for(reader.read(1024), 0.5)
+
+        assert b"Transfer-Encoding: chunked" in data
+        assert b"\r\n[{" in data
+        assert b'"result":1' not in data
+    finally:
+        writer.close()
+
+
+async def test_stream_both_single(client: ServerProxy):
+    response = await client.client.post(
+        "/stream-both", json=client.mirror.prepare(1),
+    )
+    assert (await response.json())["result"] == 1
+
+    response = await client.client.post("/stream-both", json={
+        "jsonrpc": "2.0", "method": "mirror", "params": [1],
+    })
+    assert response.status == 204
+
+    response = await client.client.post(
+        "/stream-both", data=b"[1",
+        headers={"Content-Type": "application/json"},
+    )
+    assert response.status == 400
+
+
+async def test_stream_both_malformed(client: ServerProxy):
+    response = await client.client.post(
+        "/stream-both", data=b"[" + json.dumps(
+            client.mirror.prepare("x" * 100),
+        ).encode() + b", {]",
+        headers={"Content-Type": "application/json"},
+    )
+
+    payload = await response.json()
+    assert payload[0]["result"] == "x" * 100
+    assert payload[1]["error"]["code"] == InvalidData.code
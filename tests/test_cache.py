@@ -0,0 +1,171 @@
+import asyncio
+
+import pytest
+from aiohttp import web
+
+from aiohttp_jsonrpc import handler
+from aiohttp_jsonrpc.cache import EncodedResult, ResultCache, cached
+from aiohttp_jsonrpc.client import ServerProxy
+from aiohttp_jsonrpc.exceptions import ApplicationError
+
+
+class JSONRPCCached(handler.JSONRPCView):
+    calls = []
+
+    @cached(maxsize=2)
+    async def rpc_get(self, key, default=None):
+        self.calls.append(key)
+        await asyncio.sleep(0.05)
+        return {"key": key, "default": default}
+
+    @cached(ttl=0.05)
+    def rpc_ttl(self, key):
+        self.calls.append(key)
+        return key
+
+    @cached()
+    def rpc_fail(self):
+        self.calls.append("fail")
+        raise ApplicationError("Failed")
+
+
+def create_app():
+    app = web.Application()
+    app.router.add_route("*", "/", JSONRPCCached)
+    return app
+
+
+@pytest.fixture
+async def client(loop, jsonrpc_test_client):
+    JSONRPCCached.calls.clear()
+
+    for method in ("rpc_get", "rpc_ttl", "rpc_fail"):
+        cache = getattr(JSONRPCCached, method).__rpc_cache__
+        cache.clear()
+        cache.hits = cache.misses = cache.coalesced = 0
+
+    return await jsonrpc_test_client(create_app)
+
+
+async def test_cache(client: ServerProxy):
+    expected = {"key": "foo", "default": None}
+
+    assert await client.get("foo") == expected
+    assert await client.get(key="foo") == expected
+    assert await client.get("foo", None) == expected
+    assert await client.get("foo", 1) == {"key": "foo", "default": 1}
+
+    assert JSONRPCCached.calls == ["foo", "foo"]
+
+    info = JSONRPCCached.rpc_get.cache_info()
+    assert info["hits"] == 2
+    assert info["misses"] == 2
+    assert info["size"] == 2
+
+
+async def test_single_flight(client: ServerProxy):
+    results = await asyncio.gather(*[client.get("bar") for _ in range(10)])
+
+    assert results == [{"key": "bar", "default": None}] * 10
+    assert JSONRPCCached.calls == ["bar"]
+    assert JSONRPCCached.rpc_get.cache_info()["coalesced"] == 9
+
+
+async def test_lru(client: ServerProxy):
+    for key in ("a", "b", "a", "c", "a", "b"):
+        await client.get(key)
+
+    assert JSONRPCCached.calls == ["a", "b", "c", "b"]
+
+
+async def test_ttl(client: ServerProxy):
+    assert await client.ttl(1) == 1
+    assert await client.ttl(1) == 1
+    await asyncio.sleep(0.1)
+    assert await client.ttl(1) == 1
+
+    assert JSONRPCCached.calls == [1, 1]
+
+
+async def test_errors_are_not_cached(client: ServerProxy):
+    for _ in range(2):
+        with pytest.raises(ApplicationError):
+            await client.fail()
+
+    assert JSONRPCCached.calls == ["fail", "fail"]
+
+
+async def test_batch(client: ServerProxy):
+    await client.get("foo")
+
+    results = await client(
+        client.get.prepare("foo"),
+        client.ttl.prepare("bar"),
+        client.fail.prepare(),
+    )
+
+    assert results[:2] == [{"key": "foo", "default": None}, "bar"]
+    assert isinstance(results[2], ApplicationError)
+
+
+def test_encoded_response():
+    codec = JSONRPCCached._codec
+    result = EncodedResult([1, 2], codec.dumps([1, 2]), codec)
+    response = JSONRPCCached._format_success(result, 1)
+
+    assert codec.loads(JSONRPCCached._build_json(response)) == {
+        "jsonrpc": "2.0", "id": 1, "result": [1, 2],
+    }
+
+    # Results encoded by the other codec are encoded again
+    result.codec = None
+    assert codec.loads(JSONRPCCached._build_json([response])) == [{
+        "jsonrpc": "2.0", "id": 1, "result": [1, 2],
+    }]
+
+
+def test_result_cache():
+    cache = ResultCache(maxsize=1)
+    cache.set("a", 1)
+    cache.set("b", 2)
+
+    assert cache.get("a") is None
+    assert cache.get("b") == 2
+    assert len(cache) == 1
+
+
+async def test_leader_cancelled(loop):
+    cache = ResultCache()
+    release = asyncio.Event()
+    cancelled = asyncio.Event()
+    calls = []
+
+    async def factory():
+        calls.append(1)
+        try:
+            await release.wait()
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+        return EncodedResult(1, b"1", None)
+
+    leader = asyncio.ensure_future(cache.get_or_call("key", factory))
+    follower = asyncio.ensure_future(cache.get_or_call("key", factory))
+
+    # The timed out leader does not fail the follower
+    with pytest.raises(asyncio.TimeoutError):
+        await asyncio.wait_for(leader, 0.05)
+
+    release.set()
+    assert (await follower).value == 1
+    assert calls == [1]
+    assert cache.get("key").value == 1
+
+    # The execution is cancelled when nobody waits for it anymore
+    release.clear()
+    task = asyncio.ensure_future(cache.get_or_call("other", factory))
+    await asyncio.sleep(0.01)
+    task.cancel()
+
+    await asyncio.wait_for(cancelled.wait(), 1)
+    assert cache.get("other") is None
@@ -0,0 +1,204 @@
+import asyncio
+from functools import partial
+
+import pytest
+from aiohttp import web
+
+from aiohttp_jsonrpc import handler
+from aiohttp_jsonrpc.client import ServerProxy
+from aiohttp_jsonrpc.exceptions import ApplicationError, InvalidData
+
+
+class JSONRPCCounting(handler.JSONRPCView):
+    requests = []
+
+    async def post(self):
+        self.requests.append(await self.request.json())
+        return await super().post()
+
+    def rpc_mirror(self, arg):
+        return arg
+
+    def rpc_fail(self):
+        raise ApplicationError("Failed")
+
+
+class JSONRPCStreaming(handler.JSONRPCView):
+    STREAM_BATCH = True
+    STREAM_RESPONSE = True
+    MAX_BATCH_SIZE = 5000
+
+    def rpc_mirror(self, arg):
+        return arg
+
+    def rpc_fail(self):
+        raise ApplicationError("Failed")
+
+
+def create_app():
+    JSONRPCCounting.requests.clear()
+
+    app = web.Application()
+    app.router.add_route("*", "/", JSONRPCCounting)
+    app.router.add_route("*", "/stream", JSONRPCStreaming)
+    return app
+
+
+async def test_coalescing(jsonrpc_test_client):
+    client: ServerProxy = await jsonrpc_test_client(
+        create_app, proxy_factory=partial(ServerProxy, batch_window=0.05),
+    )
+
+    results = await asyncio.gather(
+        *[client.mirror(i) for i in range(10)],
+        client.fail(),
+        return_exceptions=True
+    )
+
+    assert results[:10] == list(range(10))
+    assert isinstance(results[10], ApplicationError)
+
+    assert len(JSONRPCCounting.requests) == 1
+    assert len(JSONRPCCounting.requests[0]) == 11
+
+
+async def test_coalescing_batch_size(jsonrpc_test_client):
+    client: ServerProxy = await jsonrpc_test_client(
+        create_app,
+        proxy_factory=partial(ServerProxy, batch_window=10, batch_size=4),
+    )
+
+    results = await asyncio.gather(*[client.mirror(i) for i in range(8)])
+
+    assert results == list(range(8))
+    assert [len(request) for request in JSONRPCCounting.requests] == [4, 4]
+
+
+async def test_coalescing_single_call(jsonrpc_test_client):
+    client: ServerProxy = await jsonrpc_test_client(
+        create_app, proxy_factory=partial(ServerProxy, batch_window=0.01),
+    )
+
+    assert await client.mirror("foo") == "foo"
+
+    with pytest.raises(ApplicationError):
+        await client.fail()
+
+    # Lonely calls are sent without the batch envelope
+    assert all(isinstance(r, dict) for r in JSONRPCCounting.requests)
+
+
+@pytest.mark.parametrize("url", ["/", "/stream"])
+@pytest.mark.parametrize("compression", [None, "gzip"])
+async def test_iter_batch(jsonrpc_test_client, url, compression):
+    client: ServerProxy = await jsonrpc_test_client(
+        create_app, url,
+        proxy_factory=partial(ServerProxy, compression=compression),
+    )
+
+    requests = (
+        client.fail.prepare() if i % 100 == 0 else client.mirror.prepare(i)
+        for i in range(1000)
+    )
+    results = [item async for item in client.iter_batch(requests)]
+
+    assert len(results) == 1000
+    assert len({request_id for request_id, _ in results}) == 1000
+
+    values = [result for _, result in results]
+    assert sum(isinstance(value, ApplicationError) for value in values) == 10
+    assert sorted(
+        value for value in values if not isinstance(value, Exception)
+    ) == [i for i in range(1000) if i % 100]
+
+
+async def test_iter_batch_async_iterable(jsonrpc_test_client):
+    client: ServerProxy = await jsonrpc_test_client(create_app, "/stream")
+
+    async def requests():
+        yield client.mirror.prepare(1)
+        yield {"jsonrpc": "2.0", "method": "mirror", "params": [2]}
+        yield client.fail
+
+    results = [result async for _, result in client.iter_batch(requests())]
+
+    assert results[0] == 1
+    assert isinstance(results[1], ApplicationError)
+
+    assert [item async for item in client.iter_batch([])] == []
+
+    with pytest.raises(ApplicationError):
+        async for _ in client.iter_batch(
+            [client.fail.prepare()], return_exceptions=False,
+        ):
+            pass
+
+
+async def test_iter_batch_rejected(jsonrpc_test_client):
+    client: ServerProxy = await jsonrpc_test_client(create_app, "/stream")
+
+    results = []
+
+    try:
+        async for item in client.iter_batch(
+            client.mirror.prepare(i) for i in range(6000)
+        ):
+            results.append(item)
+    except InvalidData:
+        # The limit is reached before the response has been started,
+        # so the whole batch is rejected
+        assert not results
+        return
+
+    # Responses were sent before the limit is reached,
+    # so the error is the last one
+    assert len(results) <= 5001
+    request_id, error = results[-1]
+    assert request_id is None
+    assert isinstance(error, InvalidData)
+
+
+async def test_request_ids(jsonrpc_test_client):
+    client: ServerProxy = await jsonrpc_test_client(create_app)
+
+    assert client.mirror is client.mirror
+    assert client["mirror"] is client.mirror
+
+    assert await client.mirror(1) == 1
+    assert await client(client.mirror.prepare(2), client.fail.prepare())
+
+    ids = [
+        request["id"] for body in JSONRPCCounting.requests
+        for request in (body if isinstance(body, list) else [body])
+    ]
+    assert len(set(ids)) == 3
+
+
+async def test_id_factory(jsonrpc_test_client):
+    ids = iter(range(100))
+
+    client: ServerProxy = await jsonrpc_test_client(
+        create_app, proxy_factory=partial(
+            ServerProxy, id_factory=lambda: "req-{0}".format(next(ids)),
+        ),
+    )
+
+    assert await client.mirror(1) == 1
+    assert await client(client.mirror.prepare(2)) == [2]
+    assert [body["id"] for body in JSONRPCCounting.requests[:1]] == ["req-0"]
+    assert JSONRPCCounting.requests[1][0]["id"] == "req-1"
+
+
+async def test_prepare_body_hook(jsonrpc_test_client):
+    class PatchingServerProxy(ServerProxy):
+        async def prepare_body(self, body):
+            body["params"] = ["patched"]
+            return body
+
+    client: ServerProxy = await jsonrpc_test_client(
+        create_app, proxy_factory=PatchingServerProxy,
+    )
+
+    assert ServerProxy._has_body_hook is False
+    assert PatchingServerProxy._has_body_hook is True
+    assert await client.mirror("foo") == "patched"
@@ -0,0 +1,357 @@
+import json
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from functools import partial
+
+import pytest
+from aiohttp import web
+
+from aiohttp_jsonrpc import codec, handler
+from aiohttp_jsonrpc.client import ServerProxy
+from aiohttp_jsonrpc.common import Binary, py2json
+from aiohttp_jsonrpc.exceptions import ApplicationError
+from aiohttp_jsonrpc.executor import PROCESS, get_default_pool
+
+
+CODECS = [codec.JSONCodec]
+
+if codec.orjson is not None:
+    CODECS.append(codec.ORJSONCodec)
+
+if codec.ujson is not None:
+    CODECS.append(codec.UJSONCodec)
+
+
+@pytest.mark.parametrize("codec_class", CODECS)
+def test_roundtrip(codec_class):
+    instance = codec_class()
+    value = {"foo": [1, 2.5, None, True, "строка"], "bar": {"1": 2}}
+
+    data = instance.dumps(value)
+    assert isinstance(data, bytes)
+    assert instance.loads(data) == value
+
+
+@pytest.mark.parametrize("codec_class", CODECS)
+def test_big_integers(codec_class):
+    instance = codec_class()
+    assert instance.loads(instance.dumps([2 ** 100])) == [2 ** 100]
+
+
+def test_get_codec():
+    assert codec.get_codec() is codec.DEFAULT_CODEC
+
+    def dumps(value, **kwargs):
+        return json.dumps({"wrapped": value}, **kwargs)
+
+    instance = codec.get_codec(dumps, json.loads)
+    assert isinstance(instance, codec.CallableCodec)
+    assert instance.loads(instance.dumps(1)) == {"wrapped": 1}
+
+
+class JSONRPCCustomDumps(handler.JSONRPCView):
+    DUMPS = staticmethod(
+        lambda value, **kwargs: json.dumps(value, indent=1, **kwargs),
+    )
+
+    def rpc_mirror(self, arg):
+        return arg
+
+
+class JSONRPCCustomCodec(handler.JSONRPCView):
+    CODEC = codec.JSONCodec()
+
+    def rpc_mirror(self, arg):
+        return arg
+
+
+class JSONRPCMsgPack(handler.JSONRPCView):
+    CODECS = (codec.MsgPackCodec(),) if codec.msgpack is not None else ()
+
+    def rpc_mirror(self, arg):
+        return arg
+
+    def rpc_binary(self):
+        return Binary(b"\x00\xff")
+
+
+class JSONRPCOffload(handler.JSONRPCView):
+    CODEC_EXECUTOR_THRESHOLD = 256
+
+    def rpc_mirror(self, arg):
+        return arg
+
+    def rpc_range(self, count):
+        # Generators are encoded, but can not be pickled
+        return (idx for idx in range(count))
+
+
+def create_app():
+    app = web.Application()
+    app.router.add_route("*", "/offload", JSONRPCOffload)
+    app.router.add_route("*", "/dumps", JSONRPCCustomDumps)
+    app.router.add_route("*", "/codec", JSONRPCCustomCodec)
+    app.router.add_route("*", "/msgpack", JSONRPCMsgPack)
+    return app
+
+
+async def test_view_codec(jsonrpc_test_client):
+    assert isinstance(JSONRPCCustomDumps._codec, codec.CallableCodec)
+    assert JSONRPCCustomCodec._codec is JSONRPCCustomCodec.CODEC
+
+    for url in ("/dumps", "/codec"):
+        client: ServerProxy = await jsonrpc_test_client(create_app, url)
+        assert await client.mirror("тест") == "тест"
+
+
+async def test_client_loads_dumps(jsonrpc_test_client):
+    calls = []
+
+    def loads(value):
+        calls.append(value)
+        return json.loads(value)
+
+    client: ServerProxy = await jsonrpc_test_client(
+        create_app, "/codec", proxy_factory=partial(ServerProxy, loads=loads),
+    )
+
+    assert await client.mirror([1, 2]) == [1, 2]
+    assert len(calls) == 1
+    assert isinstance(calls[0], str)
+
+
+class Point:
+    def __init__(self, x, y):
+        self.x = x
+        self.y = y
+
+
+@py2json.register(Point)
+def _(value):
+    return {"x": value.x, "y": value.y}
+
+
+@pytest.mark.parametrize("codec_class", CODECS + [partial(
+    codec.CallableCodec, json.dumps, json.loads,
+)])
+def test_registered_types(codec_class):
+    instance = codec_class()
+    value = {
+        "date": datetime(2020, 1, 2, 3, 4, 5),
+        "binary": Binary(b"\x00\xff"),
+        "bytes": b"bytes",
+        "set": {1},
+        "generator": (i for i in range(3)),
+        "tuple": (1, 2),
+        "points": [Point(1, 2)],
+        "exception": ApplicationError("boom"),
+    }
+
+    assert instance.loads(instance.dumps(value)) == {
+        "date": "2020-01-02T03:04:05",
+        "binary": {"type": "binary", "encoding": "base64", "data": "AP8="},
+        "bytes": "bytes",
+        "set": [1],
+        "generator": [0, 1, 2],
+        "tuple": [1, 2],
+        "points": [{"x": 1, "y": 2}],
+        "exception": {"code": ApplicationError.code, "message": "boom"},
+    }
+
+
+@pytest.mark.parametrize("codec_class", CODECS)
+def test_non_str_keys(codec_class):
+    instance = codec_class()
+    value = {1: "int key", (1, 2): [datetime(2020, 1, 1)]}
+
+    assert instance.loads(instance.dumps(value)) == {
+        "1": "int key", "(1, 2)": ["2020-01-01T00:00:00"],
+    }
+
+
+@pytest.mark.parametrize("codec_class", CODECS)
+def test_unknown_type(codec_class):
+    with pytest.raises(TypeError):
+        codec_class().dumps({"foo": [object()]})
+
+
+def baseline_dumps(value):
+    return json.dumps(
+        py2json(value), ensure_ascii=False, separators=(",", ":"),
+    ).encode()
+
+
+@pytest.mark.parametrize("codec_class", CODECS)
+def test_native_keys_and_floats(codec_class):
+    instance = codec_class()
+    value = {
+        True: "bool key", None: "none key", 1.5: "float key",
+        float("nan"): "nan key", "values": [float("nan"), float("inf")],
+        "none": None,
+    }
+
+    # py2json renders keys with str() and the json module keeps NaN
+    assert instance.dumps(value) == baseline_dumps(value)
+    assert instance.dumps({"none": None}) == b'{"none":null}'
+
+
+class Secret(str):
+    pass
+
+
+class Version(namedtuple("Version", ("major", "minor"))):
+    pass
+
+
+class Plain(str):
+    pass
+
+
+@pytest.mark.parametrize("codec_class", CODECS)
+def test_registered_subclasses(codec_class):
+    # Registered here, the check makes the json codec slower afterwards
+    py2json.register(Secret)(lambda value: "***")
+    py2json.register(Version)(lambda value: "%d.%d" % value)
+
+    instance = codec_class()
+    value = {
+        "password": Secret("pw"),
+        "version": Version(1, 2),
+        "plain": Plain("text"),
+        Secret("key"): [Secret("pw")],
+    }
+
+    assert instance.dumps(value) == baseline_dumps(value)
+    assert instance.loads(instance.dumps(value)) == {
+        "password": "***", "version": "1.2", "plain": "text", "key": ["***"],
+    }
+
+
+@pytest.mark.skipif(codec.msgpack is None, reason="msgpack is not installed")
+def test_msgpack():
+    instance = codec.MsgPackCodec()
+    value = {
+        "binary": Binary(b"\x00\xff"),
+        "date": datetime(2020, 1, 2, 3, 4, 5),
+        "points": (Point(1, 2),),
+        1: "int key",
+    }
+
+    assert instance.loads(instance.dumps(value)) == {
+        "binary": b"\x00\xff",
+        "date": "2020-01-02T03:04:05",
+        "points": [{"x": 1, "y": 2}],
+        1: "int key",
+    }
+
+    response = instance.dumps_batch([
+        instance.dumps_result(1, instance.dumps([1, 2])),
+    ])
+    assert instance.loads(response) == [
+        {"jsonrpc": "2.0", "id": 1, "result": [1, 2]},
+    ]
+
+    with pytest.raises(ValueError):
+        instance.loads(b"\x93\x01")
+
+
+@pytest.mark.skipif(codec.msgpack is None, reason="msgpack is not installed")
+async def test_msgpack_negotiation(jsonrpc_test_client):
+    msgpack_codec = codec.MsgPackCodec()
+
+    client: ServerProxy = await jsonrpc_test_client(
+        create_app, "/msgpack",
+        proxy_factory=partial(ServerProxy, codec=msgpack_codec),
+    )
+
+    assert client.headers["Content-Type"] == "application/msgpack"
+    assert await client.binary() == b"\x00\xff"
+    assert await client.mirror(b"bytes") == b"bytes"
+
+    # JSON is still served by the same view
+    response = await client.client.post("/msgpack", json={
+        "jsonrpc": "2.0", "id": 1, "method": "mirror", "params": ["foo"],
+    })
+    assert response.content_type == "application/json"
+    assert (await response.json())["result"] == "foo"
+
+    # Response codec is selected by the Accept header
+    response = await client.client.post(
+        "/msgpack",
+        data=msgpack_codec.dumps({
+            "jsonrpc": "2.0", "id": 1, "method": "mirror", "params": ["foo"],
+        }),
+        headers={
+            "Content-Type": "application/msgpack",
+            "Accept": "application/json",
+        },
+    )
+    assert (await response.json())["result"] == "foo"
+
+    response = await client.client.post(
+        "/codec", data=msgpack_codec.dumps({}),
+        headers={"Content-Type": "application/msgpack"},
+    )
+    assert response.status == 400
+
+
+@pytest.mark.parametrize("executor_factory", [
+    lambda: get_default_pool(PROCESS), ThreadPoolExecutor,
+])
+async def test_offload(loop, executor_factory):
+    executor = executor_factory()
+    instance = codec.JSONCodec()
+    batch = [{"id": idx, "value": "x" * 10} for idx in range(100)]
+    data = instance.dumps(batch)
+
+    for threshold in (None, 10, 100, 1 << 20):
+        encoded = await codec.dumps_batch_async(
+            instance, batch, executor_threshold=threshold, executor=executor,
+        )
+        assert encoded == data
+
+        assert await codec.loads_async(
+            instance, data, executor_threshold=threshold, executor=executor,
+        ) == batch
+
+    assert await codec.dumps_batch_async(
+        instance, [], executor_threshold=1, executor=executor,
+    ) == b"[]"
+
+    with pytest.raises(ValueError):
+        await codec.loads_async(
+            instance, b"[1,", executor_threshold=1, executor=executor,
+        )
+
+
+async def test_offload_unpicklable(loop):
+    instance = codec.CallableCodec(
+        lambda value: json.dumps(value), lambda data: json.loads(data),
+    )
+
+    # The codec is not passed to the process pool
+    assert await codec.loads_async(
+        instance, b"[1, 2]", executor_threshold=1,
+        executor=get_default_pool(PROCESS),
+    ) == [1, 2]
+
+
+async def test_offload_view(jsonrpc_test_client):
+    client: ServerProxy = await jsonrpc_test_client(
+        create_app, "/offload", proxy_factory=partial(
+            ServerProxy, codec_executor_threshold=256,
+        ),
+    )
+
+    value = {"data": "x" * 1000}
+    assert await client.mirror(value) == value
+    assert await client(
+        *[client.mirror.prepare(idx) for idx in range(100)]
+    ) == list(range(100))
+    assert await client(
+        *[client.mirror.prepare(value) for _ in range(3)]
+    ) == [value] * 3
+    assert await client(
+        *[client.range.prepare(100) for _ in range(20)]
+    ) == [list(range(100))] * 20
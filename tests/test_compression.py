@@ -0,0 +1,122 @@
+from functools import partial
+
+import pytest
+from aiohttp import web
+
+from aiohttp_jsonrpc import compression, handler
+from aiohttp_jsonrpc.client import ServerProxy
+
+
+class JSONRPCCompressed(handler.JSONRPCView):
+    COMPRESSION_THRESHOLD = 100
+    COMPRESSION_EXECUTOR_THRESHOLD = 1000
+
+    encodings = []
+
+    async def post(self):
+        self.encodings.append(self.request.headers.get("Content-Encoding"))
+        return await super().post()
+
+    def rpc_repeat(self, value, count):
+        return value * count
+
+
+class JSONRPCDefault(handler.JSONRPCView):
+    def rpc_repeat(self, value, count):
+        return value * count
+
+
+def create_app():
+    JSONRPCCompressed.encodings.clear()
+
+    app = web.Application()
+    app.router.add_route("*", "/", JSONRPCCompressed)
+    app.router.add_route("*", "/default", JSONRPCDefault)
+    return app
+
+
+@pytest.mark.parametrize("header,expected", [
+    (None, None),
+    ("", None),
+    ("identity", None),
+    ("gzip", "gzip"),
+    ("gzip;q=0.5, deflate", "deflate"),
+    ("gzip;q=0, deflate;q=0", None),
+    ("*", next(iter(compression.COMPRESSORS))),
+])
+def test_negotiate(header, expected):
+    assert compression.negotiate(header) == expected
+
+
+def test_negotiate_encodings():
+    assert compression.negotiate("gzip, deflate", ["deflate"]) == "deflate"
+    assert compression.negotiate("gzip, deflate", ["foo"]) is None
+
+
+@pytest.mark.parametrize("encoding", list(compression.COMPRESSORS))
+def test_roundtrip(encoding):
+    data = b"foo bar " * 100
+    compressed = compression.compress(encoding, data)
+
+    assert len(compressed) < len(data)
+    assert compression.decompress(encoding, compressed) == data
+
+
+@pytest.mark.parametrize("count", [1, 10, 1000])
+async def test_response(jsonrpc_test_client, count):
+    client: ServerProxy = await jsonrpc_test_client(create_app)
+
+    response = await client.client.post(
+        "/", json={
+            "jsonrpc": "2.0", "id": 1, "method": "repeat",
+            "params": ["foo", count],
+        },
+        headers={"Accept-Encoding": "gzip"},
+    )
+
+    assert (await response.json())["result"] == "foo" * count
+    # The response might be compressed for other clients
+    assert "Accept-Encoding" in response.headers["Vary"]
+
+    if count > 10:
+        assert response.headers["Content-Encoding"] == "gzip"
+    else:
+        assert "Content-Encoding" not in response.headers
+
+
+async def test_request(jsonrpc_test_client):
+    client: ServerProxy = await jsonrpc_test_client(
+        create_app,
+        proxy_factory=partial(
+            ServerProxy, compression="gzip", compression_threshold=100,
+        ),
+    )
+
+    assert await client.repeat("a", 2) == "aa"
+    assert await client.repeat("a" * 1000, 2) == "a" * 2000
+    assert await client(client.repeat.prepare("b" * 1000, 1)) == ["b" * 1000]
+
+    assert JSONRPCCompressed.encodings == [None, "gzip", "gzip"]
+
+
+async def test_unsupported_request_compression():
+    # The server decodes only some encodings of the request body
+    for encoding in ("foo", "zstd", "br"):
+        with pytest.raises(ValueError):
+            ServerProxy(
+                "http://localhost", client=object(), compression=encoding,
+            )
+
+
+async def test_disabled_by_default(jsonrpc_test_client):
+    client: ServerProxy = await jsonrpc_test_client(create_app, "/default")
+
+    response = await client.client.post(
+        "/default", headers={"Accept-Encoding": "gzip"},
+        json={"jsonrpc": "2.0", "id": 1, "method": "repeat",
+              "params": ["a", 10000]},
+    )
+
+    assert "Content-Encoding" not in response.headers
+    assert "Vary" not in response.headers
+    assert (await response.json())["result"] == "a" * 10000
@@ -0,0 +1,168 @@
+import asyncio
+from functools import partial
+
+import pytest
+from aiohttp import web
+
+from aiohttp_jsonrpc import handler
+from aiohttp_jsonrpc.client import ServerProxy
+from aiohttp_jsonrpc.deadline import (
+    TIMEOUT_HEADER, deadline, parse_timeout, remaining,
+)
+from aiohttp_jsonrpc.exceptions import CallTimeout
+from aiohttp_jsonrpc.executor import run_in_thread
+
+
+class JSONRPCDeadline(handler.JSONRPCView):
+    DISCONNECT_CHECK_INTERVAL = 0.01
+
+    calls = []
+    cancelled = None
+
+    async def rpc_sleep(self, delay):
+        self.calls.append(delay)
+
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            self.cancelled.set()
+            raise
+
+        return delay
+
+    def rpc_budget(self):
+        return remaining()
+
+    @run_in_thread
+    def rpc_thread_budget(self):
+        return remaining()
+
+
+def create_app():
+    JSONRPCDeadline.calls = []
+    JSONRPCDeadline.cancelled = asyncio.Event()
+
+    app = web.Application()
+    app.router.add_route("*", "/", JSONRPCDeadline)
+    return app
+
+
+async def post(client: ServerProxy, body, timeout: str):
+    response = await client.client.post(
+        "/", json=body, headers={TIMEOUT_HEADER: timeout},
+    )
+    return await response.json()
+
+
+def test_deadline(loop):
+    assert remaining() is None
+
+    with deadline(None):
+        assert remaining() is None
+
+    with deadline(10):
+        assert 9 < remaining() <= 10
+
+        # The nested deadline might only shorten the current one
+        with deadline(20):
+            assert remaining() <= 10
+
+        with deadline(1):
+            assert remaining() <= 1
+
+        assert remaining() > 9
+
+    assert remaining() is None
+
+
+def test_parse_timeout():
+    assert parse_timeout(None) is None
+    assert parse_timeout("") is None
+    assert parse_timeout("foo") is None
+    assert parse_timeout("inf") is None
+    assert parse_timeout("nan") is None
+    assert parse_timeout("1.5") == 1.5
+    assert parse_timeout("-1") == -1
+
+
+async def test_remaining_budget(jsonrpc_test_client):
+    client: ServerProxy = await jsonrpc_test_client(create_app)
+
+    assert await client.budget() is None
+
+    with deadline(10):
+        budget = await client.budget()
+        assert 0 < budget <= 10
+
+        # The context is propagated into the executor
+        budget = await client.thread_budget()
+        assert 0 < budget <= 10
+
+
+async def test_call_timeout(jsonrpc_test_client):
+    client: ServerProxy = await jsonrpc_test_client(
+        create_app, proxy_factory=partial(ServerProxy, call_timeout=5),
+    )
+
+    budget = await client.budget()
+    assert 0 < budget <= 5
+
+    with deadline(1):
+        assert 0 < await client.budget() <= 1
+
+
+async def test_expired_call_skipped(jsonrpc_test_client):
+    client: ServerProxy = await jsonrpc_test_client(create_app)
+
+    response = await post(
+        client,
+        [
+            {"jsonrpc": "2.0", "id": 1, "method": "sleep", "params": [0]},
+            {"jsonrpc": "2.0", "id": 2, "method": "budget"},
+        ],
+        "0",
+    )
+
+    assert [item["error"]["code"] for item in response] == [
+        CallTimeout.code, CallTimeout.code,
+    ]
+    assert JSONRPCDeadline.calls == []
+
+
+async def test_expired_call_cancelled(jsonrpc_test_client):
+    client: ServerProxy = await jsonrpc_test_client(create_app)
+
+    response = await post(
+        client,
+        {"jsonrpc": "2.0", "id": 1, "method": "sleep", "params": [10]},
+        "0.1",
+    )
+
+    assert response["error"]["code"] == CallTimeout.code
+    assert JSONRPCDeadline.cancelled.is_set()
+
+
+async def test_client_deadline(jsonrpc_test_client):
+    client: ServerProxy = await jsonrpc_test_client(create_app)
+
+    with deadline(0.1):
+        with pytest.raises(CallTimeout):
+            await client.sleep(10)
+
+    await asyncio.wait_for(JSONRPCDeadline.cancelled.wait(), 5)
+
+    # The expired call is not sent at all
+    with deadline(-1):
+        with pytest.raises(CallTimeout):
+            await client.sleep(0)
+
+    assert JSONRPCDeadline.calls == [10]
+
+
+async def test_cancel_on_disconnect(jsonrpc_test_client):
+    client: ServerProxy = await jsonrpc_test_client(create_app)
+
+    with pytest.raises(asyncio.TimeoutError):
+        await asyncio.wait_for(client.sleep(10), 0.1)
+
+    await asyncio.wait_for(JSONRPCDeadline.cancelled.wait(), 5)
@@ -0,0 +1,80 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from aiohttp import web
+
+from aiohttp_jsonrpc import handler
+from aiohttp_jsonrpc.client import ServerProxy
+from aiohttp_jsonrpc.exceptions import QueueFull
+from aiohttp_jsonrpc.executor import run_in_process, run_in_thread
+
+
+class JSONRPCOffload(handler.JSONRPCView):
+    THREAD_POOL = ThreadPoolExecutor(2, thread_name_prefix="test")
+    EXECUTOR_QUEUE_SIZE = 2
+
+    event = threading.Event()
+
+    @run_in_thread
+    def rpc_thread(self, value):
+        return threading.current_thread().name, value
+
+    @run_in_thread
+    def rpc_block(self):
+        self.event.wait(5)
+        return True
+
+    @staticmethod
+    @run_in_process
+    def rpc_process(value):
+        return os.getpid(), value ** 2
+
+
+def create_app():
+    app = web.Application()
+    app.router.add_route("*", "/", JSONRPCOffload)
+    return app
+
+
+@pytest.fixture
+async def client(loop, jsonrpc_test_client):
+    return await jsonrpc_test_client(create_app)
+
+
+async def test_thread(client: ServerProxy):
+    name, value = await client.thread(value=1)
+    assert name.startswith("test")
+    assert value == 1
+
+
+async def test_process(client: ServerProxy):
+    pid, value = await client.process(4)
+    assert pid != os.getpid()
+    assert value == 16
+
+
+async def test_queue_size(client: ServerProxy):
+    JSONRPCOffload.event.clear()
+
+    blocked = [asyncio.ensure_future(client.block()) for _ in range(2)]
+    await asyncio.sleep(0.1)
+
+    try:
+        with pytest.raises(QueueFull):
+            await client.thread(1)
+    finally:
+        JSONRPCOffload.event.set()
+
+    assert await asyncio.gather(*blocked) == [True, True]
+    assert (await client.thread(1))[1] == 1
+
+
+def test_process_method_must_be_static():
+    with pytest.raises(TypeError):
+        class JSONRPCInvalid(handler.JSONRPCView):
+            @run_in_process
+            def rpc_process(self):
+                pass
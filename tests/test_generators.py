@@ -0,0 +1,188 @@
+import asyncio
+from functools import partial
+
+import pytest
+from aiohttp import web
+
+from aiohttp_jsonrpc import handler
+from aiohttp_jsonrpc.client import ServerProxy
+from aiohttp_jsonrpc.codec import NDJSON_CONTENT_TYPE
+from aiohttp_jsonrpc.exceptions import ApplicationError, CallTimeout
+
+
+class JSONRPCGenerators(handler.JSONRPCView):
+    STREAM_CHUNK_SIZE = 256
+    STREAM_FLUSH_INTERVAL = 0.01
+
+    received = None
+
+    async def rpc_rows(self, count):
+        for idx in range(count):
+            yield {"id": idx, "name": "row-{0}".format(idx)}
+
+    def rpc_range(self, count):
+        yield from range(count)
+
+    async def rpc_fail(self, count):
+        for idx in range(count):
+            yield idx
+        raise ApplicationError("Failed")
+
+    async def rpc_wait(self):
+        yield 1
+        # The item above must be delivered before the generator is finished
+        await asyncio.wait_for(self.received.wait(), 5)
+        yield 2
+
+    async def rpc_sleep(self, delay):
+        await asyncio.sleep(delay)
+        yield delay
+
+    async def rpc_ticks(self, count, delay):
+        for idx in range(count):
+            await asyncio.sleep(delay)
+            yield idx
+
+
+class JSONRPCTimeout(JSONRPCGenerators):
+    CALL_TIMEOUT = 0.05
+
+
+async def stall(request):
+    # Sends the first item and hangs without any deadline
+    response = web.StreamResponse(
+        headers={"Content-Type": NDJSON_CONTENT_TYPE},
+    )
+    await response.prepare(request)
+    await response.write(b'{"item":1}\n')
+    await asyncio.sleep(10)
+    return response
+
+
+def create_app():
+    app = web.Application()
+    app.router.add_route("*", "/", JSONRPCGenerators)
+    app.router.add_route("*", "/timeout", JSONRPCTimeout)
+    app.router.add_route("POST", "/stall", stall)
+    return app
+
+
+@pytest.fixture
+async def client(loop, jsonrpc_test_client):
+    return await jsonrpc_test_client(create_app)
+
+
+async def test_stream(client: ServerProxy):
+    rows = [row async for row in client.rows.stream(1000)]
+    assert rows == [
+        {"id": idx, "name": "row-{0}".format(idx)} for idx in range(1000)
+    ]
+
+    assert [item async for item in client.range.stream(count=5)] == [
+        0, 1, 2, 3, 4,
+    ]
+    assert [item async for item in client.range.stream(0)] == []
+
+
+async def test_collected(client: ServerProxy):
+    assert await client.range(3) == [0, 1, 2]
+    assert await client.rows(1) == [{"id": 0, "name": "row-0"}]
+    assert await client(client.rows.prepare(1), client.range.prepare(2)) == [
+        [{"id": 0, "name": "row-0"}], [0, 1],
+    ]
+
+
+async def test_collected_concurrently(client: ServerProxy):
+    loop = asyncio.get_event_loop()
+    started = loop.time()
+
+    results = await client(*[client.sleep.prepare(0.2) for _ in range(10)])
+
+    assert results == [[0.2]] * 10
+    # Generators of the batch are not collected one by one
+    assert loop.time() - started < 1
+
+
+async def test_collected_timeout(jsonrpc_test_client):
+    client = await jsonrpc_test_client(create_app, "/timeout")
+
+    assert await client.sleep(0) == [0]
+
+    with pytest.raises(CallTimeout):
+        await client.sleep(0.2)
+
+
+async def test_stream_timeout(jsonrpc_test_client):
+    client = await jsonrpc_test_client(create_app, "/timeout")
+    items = []
+
+    # Items are written within the CALL_TIMEOUT
+    with pytest.raises(CallTimeout):
+        async for item in client.ticks.stream(100, 0.01):
+            items.append(item)
+
+    assert 0 < len(items) < 100
+
+
+async def test_stream_client_timeout(jsonrpc_test_client):
+    client = await jsonrpc_test_client(
+        create_app, "/stall",
+        proxy_factory=partial(ServerProxy, call_timeout=0.1),
+    )
+    loop = asyncio.get_event_loop()
+    started = loop.time()
+    items = []
+
+    with pytest.raises(CallTimeout):
+        async for item in client.ticks.stream():
+            items.append(item)
+
+    assert items == [1]
+
+    # Reading of the regular response is limited as well
+    with pytest.raises(CallTimeout):
+        await client.ticks()
+
+    assert loop.time() - started < 1
+
+
+async def test_stream_error(client: ServerProxy):
+    items = []
+
+    with pytest.raises(ApplicationError):
+        async for item in client.fail.stream(3):
+            items.append(item)
+
+    assert items == [0, 1, 2]
+
+    with pytest.raises(ApplicationError):
+        async for _ in client.unknown.stream():
+            pass
+
+    # Wrong arguments are reported by the regular response
+    with pytest.raises(Exception, match="positional arguments"):
+        async for _ in client.range.stream(1, 2, 3):
+            pass
+
+
+async def test_stream_frames(client: ServerProxy):
+    response = await client.client.post(
+        "/", json=client.range.prepare(2),
+        headers={"Accept": NDJSON_CONTENT_TYPE},
+    )
+
+    assert response.content_type == NDJSON_CONTENT_TYPE
+    lines = (await response.read()).splitlines()
+    assert lines[:2] == [b'{"item":0}', b'{"item":1}']
+    assert b'"result":2' in lines[2]
+
+
+async def test_stream_incremental(client: ServerProxy):
+    JSONRPCGenerators.received = asyncio.Event()
+    items = []
+
+    async for item in client.wait.stream():
+        items.append(item)
+        JSONRPCGenerators.received.set()
+
+    assert items == [1, 2]
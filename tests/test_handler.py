@@ -1,3 +1,5 @@
+import functools
+
 import aiohttp.client_exceptions
 import pytest
 from aiohttp import web
@@ -28,6 +30,21 @@ class JSONRPCMain(handler.JSONRPCView):
     def rpc_mirror(self, arg):
         return arg
 
+    async def rpc_async_mirror(self, arg):
+        return arg
+
+    @staticmethod
+    def rpc_static(arg):
+        return arg
+
+    @classmethod
+    def rpc_class(cls):
+        return cls.__name__
+
+    @functools.lru_cache()
+    def rpc_square(self, value):
+        return value * value
+
 
 class JSONRPCWithAuth(JSONRPCMain):
     async def authorize(self):
@@ -36,10 +53,18 @@ class JSONRPCWithAuth(JSONRPCMain):
             raise HTTPUnauthorized()
 
 
+class JSONRPCPrefixed(JSONRPCMain):
+    METHOD_PREFIX = "remote_"
+
+    def remote_mirror(self, arg):
+        return "remote", arg
+
+
 def create_app():
     app = web.Application()
     app.router.add_route("*", "/", JSONRPCMain)
     app.router.add_route("*", "/restricted", JSONRPCWithAuth)
+    app.router.add_route("*", "/prefixed", JSONRPCPrefixed)
     return app
 
 
@@ -138,3 +163,34 @@ async def test_with_auth(jsonrpc_test_client):
 
     assert await client.mirror("Foo") == "Foo"
     assert await client(client.mirror.prepare("Foo")) == ["Foo"]
+
+
+async def test_method_kinds(client: ServerProxy):
+    assert await client.async_mirror("foo") == "foo"
+    assert await client.static("bar") == "bar"
+    assert await client["class"]() == "JSONRPCMain"
+    # Wrapped by the descriptor other than the function
+    assert await client.square(2) == 4
+
+
+def test_dispatch_table():
+    methods = JSONRPCMain._methods
+
+    assert methods["mirror"].bound
+    assert not methods["mirror"].is_coroutine
+    assert methods["async_mirror"].is_coroutine
+    assert not methods["static"].bound
+    assert not methods["class"].bound
+    assert list(methods["mirror"].signature.parameters) == ["arg"]
+
+    assert "mirror" in JSONRPCWithAuth._methods
+    assert set(JSONRPCPrefixed._methods) == {"mirror"}
+
+
+async def test_method_prefix(jsonrpc_test_client):
+    client: ServerProxy = await jsonrpc_test_client(create_app, "/prefixed")
+
+    assert await client.mirror(1) == ["remote", 1]
+
+    with pytest.raises(ApplicationError):
+        await client.test()
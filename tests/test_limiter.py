@@ -0,0 +1,207 @@
+import asyncio
+from functools import partial, wraps
+
+import aiohttp
+import pytest
+from aiohttp import web
+from multidict import CIMultiDict
+
+from aiohttp_jsonrpc import handler
+from aiohttp_jsonrpc.client import ServerProxy
+from aiohttp_jsonrpc.common import py2json
+from aiohttp_jsonrpc.exceptions import Overloaded, json2py_exception
+from aiohttp_jsonrpc.limiter import (
+    CRITICAL, LOW, NORMAL, AdaptiveLimiter, priority,
+)
+from aiohttp_jsonrpc.retry import RetryPolicy, retry_after
+
+
+class JSONRPCLimited(handler.JSONRPCView):
+    CONCURRENCY_LIMITER = None
+
+    async def rpc_wait(self, delay):
+        await asyncio.sleep(delay)
+        return delay
+
+    @priority(CRITICAL)
+    async def rpc_critical(self):
+        return "critical"
+
+    def rpc_inline(self):
+        return "inline"
+
+    @wraps(rpc_wait)
+    def rpc_wrapped(self, delay):
+        return self.rpc_wait(delay)
+
+    async def rpc_rows(self):
+        yield 0
+        await asyncio.sleep(0.2)
+        yield 1
+
+
+def create_app(limiter):
+    view = type("JSONRPCView", (JSONRPCLimited,), {
+        "CONCURRENCY_LIMITER": limiter,
+    })
+
+    app = web.Application()
+    app.router.add_route("*", "/", view)
+    return app
+
+
+def test_acquire_share():
+    limiter = AdaptiveLimiter(initial_limit=10, min_limit=1)
+
+    assert all(limiter.acquire(LOW) for _ in range(5))
+    assert not limiter.acquire(LOW)
+    assert all(limiter.acquire(NORMAL) for _ in range(3))
+    assert not limiter.acquire(NORMAL)
+    assert all(limiter.acquire(CRITICAL) for _ in range(2))
+    assert not limiter.acquire(CRITICAL)
+    assert limiter.inflight == 10
+
+    # At least one call is admitted
+    limiter = AdaptiveLimiter(initial_limit=1, min_limit=1)
+    assert limiter.acquire(LOW)
+    assert not limiter.acquire(CRITICAL)
+
+
+def test_limit_adapts():
+    limiter = AdaptiveLimiter(initial_limit=10, min_limit=2, max_limit=50)
+
+    def run(latency, count=100):
+        for _ in range(count):
+            while limiter.acquire(CRITICAL):
+                pass
+            limiter.release(latency)
+
+    # The latency is stable, so the limit grows up to the maximum
+    run(0.01)
+    assert limiter.limit == 50
+
+    # Calls are queueing, so the limit shrinks
+    run(0.1, count=20)
+    assert limiter.limit < 20
+
+    # The dropped call shrinks the limit
+    limit = limiter.limit
+    limiter.acquire(CRITICAL)
+    limiter.release(None)
+    assert limiter.limit < limit
+
+    with pytest.raises(ValueError):
+        AdaptiveLimiter(initial_limit=1, min_limit=2)
+
+    with pytest.raises(ValueError):
+        priority(0)
+
+
+def test_overloaded_serialization():
+    error = py2json(Overloaded("Overloaded", retry_after=2))
+    assert error == {
+        "code": Overloaded.code,
+        "message": "Overloaded",
+        "data": {"retry_after": 2},
+    }
+
+    exc = json2py_exception(
+        error["code"], error["message"], data=error["data"],
+    )
+    assert isinstance(exc, Overloaded)
+    assert exc.retry_after == 2
+
+    assert Overloaded().retry_after is None
+    assert "data" not in py2json(Overloaded())
+
+
+def test_retry_after():
+    assert retry_after(Overloaded(retry_after=3)) == 3
+    assert retry_after(Overloaded()) is None
+    assert retry_after(ValueError()) is None
+
+    exc = aiohttp.ClientResponseError(
+        None, (), status=503, headers=CIMultiDict({"Retry-After": "5"}),
+    )
+    assert retry_after(exc) == 5
+
+    policy = RetryPolicy(backoff=0.001)
+    assert 3 <= policy.delay(1, Overloaded(retry_after=3)) < 3.01
+
+
+async def test_load_shedding(jsonrpc_test_client):
+    limiter = AdaptiveLimiter(
+        initial_limit=4, min_limit=4, max_limit=4, retry_after=0.5,
+    )
+    client: ServerProxy = await jsonrpc_test_client(
+        partial(create_app, limiter),
+    )
+
+    results = await client(
+        *[client.wait.prepare(0.1) for _ in range(5)],
+        client.critical.prepare(),
+        client.inline.prepare(),
+    )
+
+    # The rest of the limit is reserved for more important calls
+    assert results[:3] == [0.1] * 3
+    assert all(isinstance(result, Overloaded) for result in results[3:5])
+    assert results[3].retry_after == 0.5
+    assert results[5:] == ["critical", "inline"]
+    assert limiter.inflight == 0
+
+
+async def test_wrapped_limited(jsonrpc_test_client):
+    limiter = AdaptiveLimiter(initial_limit=4, min_limit=4, max_limit=4)
+    client: ServerProxy = await jsonrpc_test_client(
+        partial(create_app, limiter),
+    )
+
+    # The synchronous method returning the coroutine is not inline
+    results = await client(*[client.wrapped.prepare(0.1) for _ in range(5)])
+
+    assert results[:3] == [0.1] * 3
+    assert all(isinstance(result, Overloaded) for result in results[3:])
+    assert limiter.inflight == 0
+
+
+async def test_retry_overloaded(jsonrpc_test_client):
+    limiter = AdaptiveLimiter(
+        initial_limit=1, min_limit=1, max_limit=1, retry_after=0.2,
+    )
+    client: ServerProxy = await jsonrpc_test_client(
+        partial(create_app, limiter),
+        proxy_factory=partial(
+            ServerProxy, retry_policies={"wait": RetryPolicy(attempts=2)},
+        ),
+    )
+
+    loop = asyncio.get_event_loop()
+    started = loop.time()
+
+    results = await asyncio.gather(client.wait(0.1), client.wait(0.1))
+
+    assert results == [0.1, 0.1]
+    # The rejected call is retried after the hint
+    assert loop.time() - started >= 0.3
+
+
+async def test_stream_limited(jsonrpc_test_client):
+    limiter = AdaptiveLimiter(initial_limit=1, min_limit=1, max_limit=1)
+    client: ServerProxy = await jsonrpc_test_client(
+        partial(create_app, limiter),
+    )
+
+    stream = client.rows.stream().__aiter__()
+    assert await stream.__anext__() == 0
+    assert limiter.inflight == 1
+
+    with pytest.raises(Overloaded):
+        await client.critical()
+
+    with pytest.raises(Overloaded):
+        [item async for item in client.rows.stream()]
+
+    assert [item async for item in stream] == [1]
+    assert limiter.inflight == 0
+    assert limiter.limit == 1
@@ -0,0 +1,79 @@
+from functools import partial
+
+import pytest
+from aiohttp import web
+
+from aiohttp_jsonrpc import handler
+from aiohttp_jsonrpc.client import ServerProxy
+from aiohttp_jsonrpc.exceptions import ApplicationError
+from aiohttp_jsonrpc.metrics import Histogram, Metrics, metrics_handler
+
+
+SERVER_METRICS = Metrics("jsonrpc_server")
+
+
+class JSONRPCInstrumented(handler.JSONRPCView):
+    METRICS = SERVER_METRICS
+
+    def rpc_mirror(self, arg):
+        return arg
+
+    def rpc_fail(self):
+        raise ApplicationError("Failed")
+
+
+def create_app():
+    app = web.Application()
+    app.router.add_route("*", "/", JSONRPCInstrumented)
+    app.router.add_get("/metrics", metrics_handler(SERVER_METRICS))
+    return app
+
+
+def test_histogram():
+    histogram = Histogram((1, 5))
+
+    for value in (0.5, 1, 2, 10):
+        histogram.observe(value)
+
+    assert list(histogram.cumulative()) == [
+        ("1.0", 2), ("5.0", 3), ("+Inf", 4),
+    ]
+    assert histogram.sum == 13.5
+
+
+async def test_metrics(jsonrpc_test_client):
+    client_metrics = Metrics("jsonrpc_client")
+    client: ServerProxy = await jsonrpc_test_client(
+        create_app, proxy_factory=partial(ServerProxy, metrics=client_metrics),
+    )
+
+    assert await client.mirror(1) == 1
+
+    with pytest.raises(ApplicationError):
+        await client.fail()
+
+    await client(client.mirror.prepare(2), client.unknown.prepare())
+
+    assert SERVER_METRICS.calls["mirror"].count == 2
+    assert SERVER_METRICS.errors[("fail", ApplicationError.code)] == 1
+    assert SERVER_METRICS.errors[("<unknown>", ApplicationError.code)] == 1
+    assert SERVER_METRICS.batch_size.count == 1
+    assert SERVER_METRICS.request_bytes.count == 3
+    assert set(SERVER_METRICS.phases) == {"parse", "execute", "serialize"}
+
+    assert client_metrics.calls["mirror"].count == 2
+    assert client_metrics.errors[("fail", ApplicationError.code)] == 1
+    assert client_metrics.errors[("unknown", ApplicationError.code)] == 1
+    assert client_metrics.response_bytes.count == 3
+
+    response = await client.client.get("/metrics")
+    text = await response.text()
+
+    assert response.headers["Content-Type"].startswith("text/plain")
+    assert (
+        'jsonrpc_server_call_duration_seconds_count{method="mirror"} 2'
+    ) in text
+    assert (
+        'jsonrpc_server_call_errors_total{code="-32500",method="fail"} 1'
+    ) in text
+    assert 'jsonrpc_server_batch_size_bucket{le="2.0"} 1' in text
@@ -0,0 +1,155 @@
+import asyncio
+from functools import partial
+
+import aiohttp
+import pytest
+from aiohttp import web
+
+from aiohttp_jsonrpc import handler
+from aiohttp_jsonrpc.client import Notification, ServerProxy
+from aiohttp_jsonrpc.notifications import NotificationQueue
+
+
+class JSONRPCBackground(handler.JSONRPCView):
+    NOTIFICATION_QUEUE_SIZE = 2
+    NOTIFICATION_WORKERS = 1
+
+    values = []
+    release = None
+
+    async def rpc_store(self, value):
+        await self.release.wait()
+        self.values.append(value)
+
+    def rpc_mirror(self, value):
+        return value
+
+
+class JSONRPCThrottled(JSONRPCBackground):
+    NOTIFICATION_OVERLOAD_STATUS = 429
+
+
+def create_app():
+    JSONRPCBackground.values.clear()
+    JSONRPCBackground.release = asyncio.Event()
+
+    app = web.Application()
+    app.router.add_route("*", "/", JSONRPCBackground)
+    app.router.add_route("*", "/throttled", JSONRPCThrottled)
+    app.on_shutdown.append(JSONRPCBackground.drain_notifications)
+    return app
+
+
+def test_notification_prepare():
+    notification = Notification("foo", None)
+
+    assert notification.prepare(1, 2) == {
+        "jsonrpc": "2.0", "method": "foo", "params": (1, 2),
+    }
+    assert "id" not in notification.prepare(bar=1)
+
+    with pytest.raises(TypeError):
+        notification.stream()
+
+
+async def test_background(jsonrpc_test_client):
+    client: ServerProxy = await jsonrpc_test_client(create_app)
+    store = client.create_notification("store")
+
+    # The method is blocked, but notifications are acknowledged
+    for value in range(3):
+        assert await asyncio.wait_for(store(value), 1) is None
+
+    # One is processed and two are queued
+    with pytest.raises(aiohttp.ClientResponseError) as e:
+        await store(3)
+
+    assert e.value.status == 503
+    assert e.value.headers["Retry-After"]
+
+    # Batch is rejected as a whole when notifications do not fit
+    with pytest.raises(aiohttp.ClientResponseError):
+        await client(client.mirror.prepare(1), store.prepare(4))
+
+    # Calls are not queued
+    assert await client(client.mirror.prepare(1)) == [1]
+    assert JSONRPCBackground.values == []
+
+    JSONRPCBackground.release.set()
+    await JSONRPCBackground.drain_notifications()
+
+    assert JSONRPCBackground.values == [0, 1, 2]
+    assert len(JSONRPCBackground._notifications) == 0
+
+
+async def test_batch_over_queue_size(jsonrpc_test_client):
+    client: ServerProxy = await jsonrpc_test_client(create_app)
+    store = client.create_notification("store")
+    JSONRPCBackground.release.set()
+
+    # Would never fit into the queue, so the rest is processed in place
+    results = await client(
+        client.mirror.prepare(1), *[store.prepare(i) for i in range(5)]
+    )
+    assert results == [1] + [None] * 5
+
+    await JSONRPCBackground.drain_notifications()
+    assert sorted(JSONRPCBackground.values) == list(range(5))
+
+
+async def test_overload_status(jsonrpc_test_client):
+    client: ServerProxy = await jsonrpc_test_client(create_app, "/throttled")
+    store = client.create_notification("store")
+
+    for value in range(3):
+        await store(value)
+
+    with pytest.raises(aiohttp.ClientResponseError) as e:
+        await store(3)
+
+    assert e.value.status == 429
+
+    JSONRPCBackground.release.set()
+    await JSONRPCThrottled.drain_notifications()
+
+
+async def test_notify(jsonrpc_test_client):
+    client: ServerProxy = await jsonrpc_test_client(
+        create_app, proxy_factory=partial(ServerProxy, client_owner=False),
+    )
+    JSONRPCBackground.release.set()
+
+    tasks = [client.notify("store", value) for value in range(2)]
+    await asyncio.gather(*tasks)
+
+    client.notify("store", 2)
+    # Notifications in-flight are sent before closing
+    await client.close()
+    await JSONRPCBackground.drain_notifications()
+
+    assert sorted(JSONRPCBackground.values) == [0, 1, 2]
+
+
+async def test_queue_drain(loop):
+    queue = NotificationQueue(size=10, workers=2)
+    processed = []
+
+    async def process(value):
+        await asyncio.sleep(0.01)
+        processed.append(value)
+
+    async def fail():
+        raise RuntimeError("Failed")
+
+    assert queue.put_nowait(fail)
+    for value in range(5):
+        assert queue.put_nowait(partial(process, value))
+
+    assert queue.free == 4
+    await queue.drain(timeout=5)
+
+    assert sorted(processed) == [0, 1, 2, 3, 4]
+    assert queue.free == 10
+
+    with pytest.raises(ValueError):
+        NotificationQueue(size=0)
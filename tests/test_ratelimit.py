@@ -0,0 +1,174 @@
+import time
+
+import pytest
+from aiohttp import web
+
+from aiohttp_jsonrpc import handler
+from aiohttp_jsonrpc.client import ServerProxy
+from aiohttp_jsonrpc.exceptions import Overloaded, RateLimited
+from aiohttp_jsonrpc.metrics import Metrics
+from aiohttp_jsonrpc.ratelimit import RateLimiter
+
+
+class JSONRPCRateLimited(handler.JSONRPCView):
+    CLIENT_ID_HEADER = "X-Client-Id"
+    METRICS = Metrics()
+    RATE_LIMITER = RateLimiter(rate=0.01, burst=5)
+    METHOD_RATE_LIMITERS = {
+        "search": RateLimiter(rate=0.01, burst=2),
+        "rows": RateLimiter(rate=0.01, burst=1),
+    }
+
+    calls = []
+
+    def rpc_ping(self):
+        self.calls.append("ping")
+        return "pong"
+
+    async def rpc_search(self, query):
+        self.calls.append("search")
+        return query
+
+    async def rpc_rows(self, count):
+        self.calls.append("rows")
+        for idx in range(count):
+            yield idx
+
+
+class JSONRPCStreaming(JSONRPCRateLimited):
+    # The instrumented view does not stream items
+    METRICS = None
+
+
+class JSONRPCTenants(JSONRPCRateLimited):
+    async def get_client_id(self):
+        return self.request.query.get("tenant")
+
+
+def create_app():
+    JSONRPCRateLimited.calls.clear()
+    JSONRPCRateLimited.RATE_LIMITER.clear()
+    for limiter in JSONRPCRateLimited.METHOD_RATE_LIMITERS.values():
+        limiter.clear()
+
+    app = web.Application()
+    app.router.add_route("*", "/", JSONRPCRateLimited)
+    app.router.add_route("*", "/tenants", JSONRPCTenants)
+    app.router.add_route("*", "/stream", JSONRPCStreaming)
+    return app
+
+
+@pytest.fixture
+async def client(loop, jsonrpc_test_client):
+    return await jsonrpc_test_client(create_app)
+
+
+def test_token_bucket(monkeypatch):
+    now = 1000.
+    monkeypatch.setattr(time, "monotonic", lambda: now)
+
+    limiter = RateLimiter(rate=2, burst=4)
+
+    assert [limiter.take("a") for _ in range(4)] == [0] * 4
+    assert limiter.take("a") == pytest.approx(0.5)
+    assert limiter.take("b") == 0
+
+    # Tokens are refilled lazily
+    now += 1
+    assert [limiter.take("a") for _ in range(2)] == [0] * 2
+    assert limiter.take("a") > 0
+
+    # The idle bucket is full again
+    now += 10
+    assert [limiter.take("a") for _ in range(4)] == [0] * 4
+
+    with pytest.raises(ValueError):
+        RateLimiter(rate=0)
+
+
+def test_bounded_memory():
+    limiter = RateLimiter(rate=1, burst=1, maxsize=100)
+
+    for key in range(1000):
+        assert limiter.take(key) == 0
+
+    assert len(limiter) == 100
+    # The least recently used buckets are evicted
+    assert limiter.take(999) > 0
+    assert limiter.take(0) == 0
+
+
+async def test_batch_elements_counted(client: ServerProxy):
+    results = await client(
+        *[client.ping.prepare() for _ in range(4)],
+        *[client.search.prepare("foo") for _ in range(3)],
+    )
+
+    assert results[:4] == ["pong"] * 4
+    assert results[4] == "foo"
+    # The method bucket allows two calls, but the client bucket is empty
+    assert all(isinstance(result, RateLimited) for result in results[5:])
+    assert isinstance(results[5], Overloaded)
+    assert results[5].retry_after > 0
+    assert JSONRPCRateLimited.calls == ["ping"] * 4 + ["search"]
+
+    metrics = JSONRPCRateLimited.METRICS
+    assert metrics.errors[("search", RateLimited.code)] >= 2
+
+
+async def test_method_rate_limit(client: ServerProxy):
+    assert await client.search("foo") == "foo"
+    assert await client.search("foo") == "foo"
+
+    with pytest.raises(RateLimited):
+        await client.search("foo")
+
+    # Other methods are limited only by the client bucket
+    assert await client.ping() == "pong"
+
+
+async def test_stream_rate_limit(jsonrpc_test_client):
+    client = await jsonrpc_test_client(create_app, "/stream")
+
+    assert [item async for item in client.rows.stream(3)] == [0, 1, 2]
+
+    with pytest.raises(RateLimited):
+        [item async for item in client.rows.stream(3)]
+
+    with pytest.raises(RateLimited):
+        await client.rows(3)
+
+    assert JSONRPCRateLimited.calls == ["rows"]
+
+
+async def test_client_identity(client: ServerProxy):
+    for client_id in ("first", "second"):
+        client.headers["X-Client-Id"] = client_id
+        assert [await client.ping() for _ in range(5)] == ["pong"] * 5
+
+        with pytest.raises(RateLimited):
+            await client.ping()
+
+    # The peer address is used without the header
+    del client.headers["X-Client-Id"]
+    assert [await client.ping() for _ in range(5)] == ["pong"] * 5
+
+    # Notifications over the limit are dropped
+    await client.create_notification("ping")()
+    assert JSONRPCRateLimited.calls == ["ping"] * 15
+
+
+async def test_client_id_hook(client: ServerProxy):
+    for tenant in ("first", "second"):
+        response = await client.client.post(
+            "/tenants?tenant=" + tenant,
+            json=[
+                {"jsonrpc": "2.0", "id": i, "method": "ping"}
+                for i in range(6)
+            ],
+        )
+        payload = await response.json()
+
+        assert [item.get("result") for item in payload[:5]] == ["pong"] * 5
+        assert payload[5]["error"]["code"] == RateLimited.code
+        assert payload[5]["error"]["data"]["retry_after"] > 0
@@ -0,0 +1,208 @@
+import asyncio
+from functools import partial
+
+import aiohttp
+import pytest
+from aiohttp import web
+
+from aiohttp_jsonrpc import handler
+from aiohttp_jsonrpc.client import ServerProxy
+from aiohttp_jsonrpc.exceptions import ApplicationError, QueueFull
+from aiohttp_jsonrpc.retry import LatencyTracker, RetryBudget, RetryPolicy
+
+
+class JSONRPCFlaky(handler.JSONRPCView):
+    calls = []
+    failures = 0
+    delays = []
+
+    def _fail(self, method):
+        self.calls.append(method)
+
+        if JSONRPCFlaky.failures > 0:
+            JSONRPCFlaky.failures -= 1
+            return True
+        return False
+
+    def rpc_get(self):
+        if self._fail("get"):
+            raise QueueFull("Queue is full")
+        return "ok"
+
+    def rpc_put(self):
+        if self._fail("put"):
+            raise QueueFull("Queue is full")
+        return "ok"
+
+    def rpc_invalid(self):
+        self._fail("invalid")
+        raise ApplicationError("Invalid")
+
+    async def rpc_slow(self):
+        self.calls.append("slow")
+        await asyncio.sleep(self.delays.pop(0) if self.delays else 0)
+        return len(self.calls)
+
+
+@web.middleware
+async def unavailable(request, handler):
+    if request.app["unavailable"] > 0:
+        request.app["unavailable"] -= 1
+        JSONRPCFlaky.calls.append("unavailable")
+        raise web.HTTPServiceUnavailable
+
+    return await handler(request)
+
+
+def create_app(unavailable_count=0):
+    JSONRPCFlaky.calls.clear()
+    JSONRPCFlaky.delays.clear()
+    JSONRPCFlaky.failures = 0
+
+    app = web.Application(middlewares=[unavailable])
+    app["unavailable"] = unavailable_count
+    app.router.add_route("*", "/", JSONRPCFlaky)
+    return app
+
+
+POLICIES = {
+    "get": RetryPolicy(attempts=3, backoff=0.001),
+    "invalid": RetryPolicy(attempts=3, backoff=0.001),
+    "slow": RetryPolicy(hedge_quantile=0.9),
+}
+
+
+@pytest.fixture
+async def client(loop, jsonrpc_test_client):
+    return await jsonrpc_test_client(
+        create_app, proxy_factory=partial(ServerProxy, retry_policies=POLICIES),
+    )
+
+
+async def test_retry(client: ServerProxy):
+    JSONRPCFlaky.failures = 2
+    assert await client.get() == "ok"
+    assert JSONRPCFlaky.calls == ["get"] * 3
+
+    JSONRPCFlaky.calls.clear()
+    JSONRPCFlaky.failures = 3
+
+    with pytest.raises(QueueFull):
+        await client.get()
+
+    assert JSONRPCFlaky.calls == ["get"] * 3
+
+
+async def test_not_retried(client: ServerProxy):
+    # The method without the policy is not idempotent
+    JSONRPCFlaky.failures = 1
+    with pytest.raises(QueueFull):
+        await client.put()
+
+    # Errors which are not retryable are the answer
+    with pytest.raises(ApplicationError):
+        await client.invalid()
+
+    # Batches are never retried
+    JSONRPCFlaky.failures = 1
+    result = await client(client.get.prepare())
+    assert isinstance(result[0], QueueFull)
+
+    assert JSONRPCFlaky.calls == ["put", "invalid", "get"]
+
+
+async def test_retry_transport(jsonrpc_test_client):
+    client: ServerProxy = await jsonrpc_test_client(
+        partial(create_app, unavailable_count=2),
+        proxy_factory=partial(ServerProxy, retry_policies=POLICIES),
+    )
+
+    assert await client.get() == "ok"
+    assert JSONRPCFlaky.calls == ["unavailable", "unavailable", "get"]
+
+
+async def test_retry_coalesced(jsonrpc_test_client):
+    client: ServerProxy = await jsonrpc_test_client(
+        partial(create_app, unavailable_count=1),
+        proxy_factory=partial(
+            ServerProxy, retry_policies=POLICIES, batch_window=0.01,
+        ),
+    )
+
+    # The whole batch fails, only calls of idempotent methods are retried
+    results = await asyncio.gather(
+        client.get(), client.put(), return_exceptions=True,
+    )
+    assert results[0] == "ok"
+    assert isinstance(results[1], aiohttp.ClientResponseError)
+
+    JSONRPCFlaky.calls.clear()
+    JSONRPCFlaky.failures = 2
+
+    # Failed elements of the batch are retried one by one
+    results = await asyncio.gather(
+        client.get(), client.get(), client.put(), return_exceptions=True,
+    )
+    assert results == ["ok"] * 3
+    assert JSONRPCFlaky.calls == ["get", "get", "put", "get", "get"]
+
+
+async def test_retry_budget(jsonrpc_test_client):
+    client: ServerProxy = await jsonrpc_test_client(
+        create_app, proxy_factory=partial(
+            ServerProxy, retry_policies=POLICIES,
+            retry_budget=RetryBudget(ratio=0, min_per_second=0, max_tokens=1),
+        ),
+    )
+
+    JSONRPCFlaky.failures = 10
+    for _ in range(3):
+        with pytest.raises(QueueFull):
+            await client.get()
+
+    # Only one retry was allowed
+    assert JSONRPCFlaky.calls == ["get"] * 4
+
+
+async def test_hedging(client: ServerProxy):
+    for _ in range(20):
+        await client.slow()
+
+    JSONRPCFlaky.calls.clear()
+    JSONRPCFlaky.delays.extend([5, 0])
+
+    # The duplicate request is answered first
+    assert await asyncio.wait_for(client.slow(), 2) == 2
+    assert JSONRPCFlaky.calls == ["slow", "slow"]
+
+
+def test_policy():
+    policy = RetryPolicy(backoff=0.1, max_backoff=0.3)
+
+    assert all(0 <= policy.delay(1) <= 0.1 for _ in range(100))
+    assert all(0 <= policy.delay(10) <= 0.3 for _ in range(100))
+
+    assert policy.is_retryable(QueueFull("full"))
+    assert policy.is_retryable(aiohttp.ServerDisconnectedError())
+    assert not policy.is_retryable(ApplicationError("error"))
+
+    with pytest.raises(ValueError):
+        RetryPolicy(attempts=0)
+
+    with pytest.raises(ValueError):
+        RetryPolicy(hedge_quantile=1)
+
+
+def test_latency_tracker():
+    tracker = LatencyTracker(window=100, min_samples=10)
+
+    for value in range(9):
+        tracker.observe(value)
+    assert tracker.quantile(0.5) is None
+
+    for value in range(9, 200):
+        tracker.observe(value)
+
+    assert len(tracker) == 100
+    assert tracker.quantile(0.5) == 150
+    assert tracker.quantile(0.99) == 199
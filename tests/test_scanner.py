@@ -0,0 +1,182 @@
+import asyncio
+import json
+import time
+
+import pytest
+from aiohttp import web
+
+from aiohttp_jsonrpc import handler
+from aiohttp_jsonrpc.client import ServerProxy
+from aiohttp_jsonrpc.exceptions import InvalidData
+from aiohttp_jsonrpc.scanner import JSONScanner
+
+
+BATCH = [
+    {"jsonrpc": "2.0", "id": 1, "method": "foo", "params": ["a,]\"[{"]},
+    {"jsonrpc": "2.0", "id": 2, "method": "bar", "params": {"x": [[1], {}]}},
+    {"jsonrpc": "2.0", "method": "baz"},
+]
+
+
+def scan(data: bytes, chunk_size: int, **kwargs):
+    scanner = JSONScanner(**kwargs)
+    elements = []
+
+    for idx in range(0, len(data), chunk_size):
+        elements.extend(scanner.feed(data[idx:idx + chunk_size]))
+
+    elements.extend(scanner.close())
+    return scanner, [json.loads(element) for element in elements]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 7, 1024])
+@pytest.mark.parametrize("indent", [None, 2])
+def test_scanner_batch(chunk_size, indent):
+    data = json.dumps(BATCH, indent=indent).encode()
+    scanner, elements = scan(data, chunk_size)
+
+    assert scanner.batch
+    assert scanner.items == 3
+    assert scanner.size == len(data)
+    assert elements == BATCH
+
+
+@pytest.mark.parametrize("body,expected", [
+    (b"[]", []),
+    (b" [ ] ", []),
+    (b'{"id": [1, 2]}', [{"id": [1, 2]}]),
+])
+def test_scanner_values(body, expected):
+    assert scan(body, 1)[1] == expected
+
+
+@pytest.mark.parametrize("body", [b"", b"[1, 2", b"[1]]", b"[1] 2"])
+def test_scanner_malformed(body):
+    with pytest.raises(ValueError):
+        scan(body, 2)
+
+
+@pytest.mark.parametrize("batch", [True, False])
+def test_scanner_long_string(batch):
+    # Escapes are split by chunks, and the string must not be rescanned
+    # from its beginning on every chunk
+    value = 'a\\"b' * (1024 * 1024)
+    body = {"jsonrpc": "2.0", "method": "foo", "params": [value]}
+    data = json.dumps([body, body] if batch else body).encode()
+
+    started = time.monotonic()
+    scanner, elements = scan(data, 16 * 1024 + 1)
+
+    assert time.monotonic() - started < 2
+    assert elements == ([body, body] if batch else [body])
+
+
+def test_scanner_limits():
+    with pytest.raises(InvalidData):
+        scan(b"[[[1]]]", 2, max_depth=2)
+
+    with pytest.raises(InvalidData):
+        scan(b'{"a": {"b": {}}}', 2, max_depth=2)
+
+    with pytest.raises(InvalidData):
+        scan(b"[1, 2, 3]", 2, max_items=2)
+
+    assert scan(b"[[1], 2]", 2, max_depth=2, max_items=2)[1] == [[1], 2]
+
+
+def test_scanner_releases_buffer():
+    scanner = JSONScanner()
+    scanner.feed(b'[{"data": "' + b"x" * 1000 + b'"}, {"data": "')
+
+    assert len(scanner._buffer) < 20
+
+
+class JSONRPCLimits(handler.JSONRPCView):
+    MAX_BODY_SIZE = 1024
+    MAX_BATCH_SIZE = 5
+    MAX_DEPTH = 4
+
+    def rpc_mirror(self, value):
+        return value
+
+
+class JSONRPCStreaming(handler.JSONRPCView):
+    STREAM_BATCH = True
+    MAX_BATCH_SIZE = 10
+    BATCH_CONCURRENCY = 2
+
+    started = None
+
+    def rpc_mirror(self, value):
+        return value
+
+    async def rpc_start(self):
+        self.started.set()
+        return True
+
+
+def create_app():
+    app = web.Application()
+    app.router.add_route("*", "/limits", JSONRPCLimits)
+    app.router.add_route("*", "/stream", JSONRPCStreaming)
+    return app
+
+
+async def post(client: ServerProxy, url: str, data):
+    return await client.client.post(
+        url, data=data, headers={"Content-Type": "application/json"},
+    )
+
+
+async def test_limits(jsonrpc_test_client):
+    client: ServerProxy = await jsonrpc_test_client(create_app, "/limits")
+
+    assert await client.mirror([[1]]) == [[1]]
+    assert await client(*[client.mirror.prepare(i) for i in range(5)]) == [
+        0, 1, 2, 3, 4,
+    ]
+
+    with pytest.raises(InvalidData):
+        await client.mirror([[[1]]])
+
+    with pytest.raises(InvalidData):
+        await client(*[client.mirror.prepare(i) for i in range(6)])
+
+    response = await post(client, "/limits", b"[" + b" " * 2048 + b"]")
+    assert response.status == 413
+
+    response = await post(client, "/limits", b"[1, 2")
+    assert response.status == 400
+
+
+async def test_stream_batch(jsonrpc_test_client):
+    client: ServerProxy = await jsonrpc_test_client(create_app, "/stream")
+
+    assert await client.mirror(1) == 1
+    assert await client(*[client.mirror.prepare(i) for i in range(10)]) == [
+        i for i in range(10)
+    ]
+
+    with pytest.raises(InvalidData):
+        await client(*[client.mirror.prepare(i) for i in range(11)])
+
+    response = await post(client, "/stream", b'[{"id": 1}, 1')
+    assert response.status == 400
+
+    response = await post(client, "/stream", b"1")
+    assert response.status == 400
+
+
+async def test_stream_batch_early_execution(jsonrpc_test_client):
+    client: ServerProxy = await jsonrpc_test_client(create_app, "/stream")
+    JSONRPCStreaming.started = asyncio.Event()
+
+    async def body():
+        yield b'[{"jsonrpc": "2.0", "id": 1, "method": "start"},'
+        # The rest of the body is not sent until the first call is started
+        await asyncio.wait_for(JSONRPCStreaming.started.wait(), 5)
+        yield b'{"jsonrpc": "2.0", "id": 2, "method": "mirror", "params": [2]}]'
+
+    response = await post(client, "/stream", body())
+
+    assert [item["result"] for item in await response.json()] == [True, 2]
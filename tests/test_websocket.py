@@ -0,0 +1,132 @@
+import asyncio
+from functools import partial
+
+import pytest
+from aiohttp import web
+
+from aiohttp_jsonrpc import handler
+from aiohttp_jsonrpc.client import WebSocketServerProxy
+from aiohttp_jsonrpc.exceptions import (
+    ApplicationError, CallTimeout, InvalidData,
+)
+from aiohttp_jsonrpc.retry import RetryPolicy
+
+
+class JSONRPCWebSocketMain(handler.JSONRPCWebSocketView):
+    MAX_BATCH_SIZE = 5
+
+    notifications = []
+
+    def rpc_mirror(self, arg):
+        return arg
+
+    async def rpc_sleep(self, delay, value):
+        await asyncio.sleep(delay)
+        return value
+
+    def rpc_notify(self, value):
+        self.notifications.append(value)
+
+    def rpc_peer(self):
+        return id(self)
+
+
+def create_app():
+    app = web.Application()
+    app.router.add_route("*", "/ws", JSONRPCWebSocketMain)
+    return app
+
+
+@pytest.fixture
+async def client(loop, jsonrpc_test_client):
+    return await jsonrpc_test_client(
+        create_app, "/ws",
+        proxy_factory=partial(WebSocketServerProxy, reconnect_delay=0.05),
+    )
+
+
+async def test_call(client: WebSocketServerProxy):
+    assert await client.mirror("foo") == "foo"
+    assert await client.mirror(arg=[1, 2]) == [1, 2]
+
+    with pytest.raises(ApplicationError):
+        await client.unknown()
+
+
+async def test_stream_unsupported(client: WebSocketServerProxy):
+    with pytest.raises(TypeError):
+        client.test.stream()
+
+
+async def test_call_timeout(jsonrpc_test_client):
+    client = await jsonrpc_test_client(
+        create_app, "/ws",
+        proxy_factory=partial(WebSocketServerProxy, call_timeout=0.1),
+    )
+
+    with pytest.raises(CallTimeout):
+        await client.sleep(1, "slow")
+
+    with pytest.raises(CallTimeout):
+        await client(client.sleep.prepare(1, "slow"))
+
+    # The connection is still usable
+    assert await client.mirror("foo") == "foo"
+    assert not client._pending
+
+
+@pytest.mark.parametrize("option", [
+    {"batch_window": 0.01},
+    {"retry_policies": {"mirror": RetryPolicy()}},
+    {"compression": "gzip"},
+])
+async def test_unsupported_options(option):
+    with pytest.raises(TypeError):
+        WebSocketServerProxy("ws://localhost", client=object(), **option)
+
+
+async def test_multiplexing(client: WebSocketServerProxy):
+    results = await asyncio.gather(
+        client.sleep(0.1, "slow"),
+        client.sleep(0, "fast"),
+        *[client.mirror(i) for i in range(10)]
+    )
+
+    assert results == ["slow", "fast"] + list(range(10))
+
+    # All calls are served by the single connection
+    peers = await asyncio.gather(*[client.peer() for _ in range(5)])
+    assert len(set(peers)) == 1
+
+
+async def test_batch(client: WebSocketServerProxy):
+    results = await client(
+        client.mirror.prepare(1),
+        client.create_notification("notify").prepare(1),
+        client.unknown.prepare(),
+    )
+
+    assert results[:2] == [1, None]
+    assert isinstance(results[2], ApplicationError)
+
+    results = await client(*[client.mirror.prepare(i) for i in range(6)])
+    assert all(isinstance(result, InvalidData) for result in results)
+
+
+async def test_reconnect(client: WebSocketServerProxy):
+    assert await client.mirror(1) == 1
+
+    await client._ws.close()
+
+    for _ in range(50):
+        if client.connected:
+            break
+        await asyncio.sleep(0.02)
+
+    assert client.connected
+    assert await client.mirror(2) == 2
+
+
+async def test_post(jsonrpc_test_client):
+    client = await jsonrpc_test_client(create_app, "/ws")
+    assert await client.mirror("post") == "post"